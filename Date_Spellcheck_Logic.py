@@ -1,85 +1,97 @@
-import re
-import requests
-import logging
 from docx import Document
 from typing import List, Dict
+from dates import find_date_spaces
+from document_walker import count_paragraphs, iter_paragraphs, paragraph_runs
+from transform import RunTextMap, apply_corrections, apply_edits
 
 
 def fix_dates_in_paragraph(paragraph):
     """
     Заменяет пробелы в датах на неразрывные пробелы.
-    Поддерживает форматы: 26.01.1990 и 26 января 1990
-    """
-    # Регулярные выражения для различных форматов даты
-    date_patterns = [
-        r'\d{1,2}\.\d{1,2}\.\d{4}',  # дд.мм.гггг
-        r'\d{1,2}\s+[а-яА-Я]+\s+\d{4}'  # дд месяц гггг
-    ]
-
-    for run in paragraph.runs:
-        text = run.text
-        for pattern in date_patterns:
-            # Находим все даты в тексте
-            dates = re.findall(pattern, text)
-            for date in dates:
-                # Заменяем пробелы на неразрывные пробелы
-                text = text.replace(date, date.replace(' ', '\u00A0'))
-        run.text = text
-
-
-def yandex_spellcheck(text: str):
-    """
-    Проверка орфографии с помощью Яндекс.Спеллера
+    Поддерживает форматы: 26.01.1990, 1990-01-26, 26 января 1990 г., 1–5 мая,
+    2024 г., 2023–2024 гг., XX век. Дата может быть разбита на несколько runs.
+
+    Returns:
+        Количество замененных пробелов
     """
-    try:
-        # Используем GET-запрос вместо POST
-        response = requests.get(
-            'https://speller.yandex.net/services/spellservice.json/checkText',
-            params={
-                'text': text,
-                'format': 'plain',
-                'lang': 'ru',
-                'options': 511  # Максимальный уровень проверки
-            }
-        )
-        return response.json()
-    except Exception as e:
-        logging.error(f"Ошибка при проверке орфографии: {e}")
-        return []
+    runs = paragraph_runs(paragraph)
+    run_map = RunTextMap([run.text for run in runs])
+    positions = find_date_spaces(run_map.text)
+    for index, text in apply_edits(run_map, positions).items():
+        runs[index].text = text
+    return len(positions)
 
 
 def apply_spellcheck_to_run(run, corrections):
     """
     Применяет исправления орфографии к конкретному run
     с сохранением форматирования
-    """
-    text = run.text
-    for error in corrections:
-        start = error.get('pos', 0)
-        end = start + error.get('len', 0)
-        suggestions = error.get('s', [])
-
-        if suggestions:
-            # Заменяем слово первым предложенным вариантом
-            text = text[:start] + suggestions[0] + text[end:]
 
-    run.text = text
+    Смещения исправлений считаются от начала текста run.
+    """
+    changed, _ = apply_corrections(RunTextMap([run.text]), corrections)
+    if changed:
+        run.text = changed[0]
 
 
 def process_paragraph_spellcheck(paragraph):
     """
     Проверяет орфографию в параграфе
+
+    Returns:
+        Количество исправлений, для которых были варианты замены
     """
     # Собираем весь текст параграфа
-    full_text = ''.join([run.text for run in paragraph.runs])
+    full_text = ''.join([run.text for run in paragraph_runs(paragraph)])
 
     # Получаем исправления от Яндекс.Спеллера
+    from speller import yandex_spellcheck
     corrections = yandex_spellcheck(full_text)
 
-    if corrections:
-        # Применяем исправления к каждому run
-        for run in paragraph.runs:
-            apply_spellcheck_to_run(run, corrections)
+    return apply_paragraph_corrections(paragraph, corrections)
+
+
+def apply_paragraph_corrections(paragraph, corrections):
+    """
+    Применяет исправления спеллера к параграфу
+
+    Returns:
+        Количество исправлений, для которых были варианты замены
+    """
+    if not corrections:
+        return 0
+
+    # Смещения исправлений относятся к склеенному тексту параграфа,
+    # каждый run получает только свои правки и меняется не больше одного раза
+    runs = paragraph_runs(paragraph)
+    changed, applied = apply_corrections(RunTextMap(run.text for run in runs), corrections)
+    for index, text in changed.items():
+        runs[index].text = text
+
+    return applied
+
+
+def spellcheck_paragraphs(paragraphs, speller=None):
+    """
+    Проверяет орфографию списка параграфов пакетными запросами
+
+    Тексты параграфов упаковываются в запросы checkTexts до лимита сервиса,
+    ответы раскладываются обратно по своим параграфам.
+
+    Returns:
+        Количество исправлений во всех параграфах
+    """
+    if speller is None:
+        from speller import get_speller
+        speller = get_speller()
+
+    texts = [''.join(run.text for run in paragraph_runs(paragraph)) for paragraph in paragraphs]
+    results = speller.check_texts(texts)
+
+    return sum(
+        apply_paragraph_corrections(paragraph, corrections)
+        for paragraph, corrections in zip(paragraphs, results)
+    )
 
 
 def process_document_with_dates_and_spellcheck(input_path, output_path, progress_callback=None):
@@ -87,47 +99,20 @@ def process_document_with_dates_and_spellcheck(input_path, output_path, progress
     Обрабатывает документ: исправляет даты и проверяет орфографию
     """
     doc = Document(input_path)
-    total_elements = (
-            len(doc.paragraphs) +
-            sum(len(row.cells) for table in doc.tables for row in table.rows) +
-            sum(len(section.header.paragraphs) + len(section.footer.paragraphs) for section in doc.sections)
-    )
+    total_elements = count_paragraphs(doc) or 1
 
     processed = 0
+    # Орфография проверяется одним пакетным проходом после дат
+    checked_paragraphs = []
 
-    # Обрабатываем обычные абзацы
-    for paragraph in doc.paragraphs:
+    # Все параграфы документа, колонтитулов и сносок, каждый по одному разу
+    for paragraph in iter_paragraphs(doc):
         fix_dates_in_paragraph(paragraph)
-        process_paragraph_spellcheck(paragraph)
+        checked_paragraphs.append(paragraph)
         processed += 1
         if progress_callback:
             progress_callback(processed / total_elements)
 
-    # Обрабатываем текст в таблицах
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    fix_dates_in_paragraph(paragraph)
-                    process_paragraph_spellcheck(paragraph)
-                    processed += 1
-                    if progress_callback:
-                        progress_callback(processed / total_elements)
-
-    # Обрабатываем колонтитулы
-    for section in doc.sections:
-        for paragraph in section.header.paragraphs:
-            fix_dates_in_paragraph(paragraph)
-            process_paragraph_spellcheck(paragraph)
-            processed += 1
-            if progress_callback:
-                progress_callback(processed / total_elements)
-
-        for paragraph in section.footer.paragraphs:
-            fix_dates_in_paragraph(paragraph)
-            process_paragraph_spellcheck(paragraph)
-            processed += 1
-            if progress_callback:
-                progress_callback(processed / total_elements)
+    spellcheck_paragraphs(checked_paragraphs)
 
     doc.save(output_path)
\ No newline at end of file
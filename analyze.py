@@ -0,0 +1,246 @@
+"""
+Анализ без записи: сколько правок внесла бы обработка в каждый документ.
+
+Документ читается потоково (как в движке stream), к параграфам применяются те же
+правила типографики, но ничего не изменяется и не сериализуется, поэтому анализ
+архива в разы быстрее настоящей обработки. Удобно перед изменением списка
+предлогов или правил: можно заранее увидеть, какие файлы и сколько правок затронет.
+
+Орфография не анализируется (для нее нужны запросы к спеллеру).
+
+Примеры:
+    python analyze.py archive/ -r -j 8 --format csv -o report.csv
+    python analyze.py contracts/ --add "из-за,из-под" --remove "и" --details -o report.json
+"""
+import sys
+import csv
+import json
+import time
+import zipfile
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batch import describe_error, resolve_workers
+from cli import expand_inputs
+from config import current_config
+from package_writer import text_part_names
+from stream_engine import iter_part_paragraphs
+from typography import get_scanner
+
+# Сколько символов текста вокруг правки попадает в подробный отчет
+FRAGMENT_CONTEXT = 30
+
+# Колонки CSV для отчета по документам и по отдельным правкам
+DOCUMENT_COLUMNS = ('input', 'status', 'paragraphs', 'edits', 'seconds', 'error')
+DETAIL_COLUMNS = ('input', 'part', 'paragraph', 'rule', 'edits', 'fragment')
+
+
+def _fragment(text, positions):
+    """Отрывок текста вокруг правки; пробелы, которые станут неразрывными, отмечены знаком '⍽'."""
+    start = max(0, positions[0] - FRAGMENT_CONTEXT)
+    end = min(len(text), positions[-1] + FRAGMENT_CONTEXT + 1)
+    chars = list(text[start:end])
+    for position in positions:
+        chars[position - start] = '⍽'
+    return ''.join(chars).replace('\n', ' ').replace('\t', ' ')
+
+
+def analyze_document(input_path, short_words=None, details=False):
+    """
+    Считает правки, которые внесла бы обработка, не изменяя документ.
+
+    Параграфы разбираются тем же iter_part_paragraphs, что и в потоковом движке, а движок
+    docx берет те же runs (document_walker.paragraph_runs, включая текст гиперссылок
+    и вставок при рецензировании), поэтому счет совпадает с обработкой любым движком.
+
+    Args:
+        input_path: Путь к .docx
+        short_words: Набор предлогов и союзов (по умолчанию из настроек)
+        details: Перечислить каждую правку (часть пакета, номер параграфа, правило, отрывок)
+
+    Returns:
+        Словарь с количеством параграфов и правок, статусом 'changed' или 'unchanged',
+        правками по правилам (result['rules']) и, при details, списком result['items']
+    """
+    start = time.perf_counter()
+    scanner = get_scanner(short_words)
+    result = {'edits': 0, 'paragraphs': 0, 'rules': {}}
+    items = [] if details else None
+
+    with zipfile.ZipFile(input_path) as package:
+        for name in text_part_names(package):
+            with package.open(name) as source:
+                for number, texts in enumerate(iter_part_paragraphs(source), 1):
+                    result['paragraphs'] += 1
+                    text = ''.join(texts)
+                    for rule, positions in scanner.matches(text):
+                        result['edits'] += len(positions)
+                        result['rules'][rule] = result['rules'].get(rule, 0) + len(positions)
+                        if items is not None:
+                            items.append({'part': name, 'paragraph': number, 'rule': rule,
+                                          'edits': len(positions), 'fragment': _fragment(text, positions)})
+
+    result['status'] = 'changed' if result['edits'] else 'unchanged'
+    if items is not None:
+        result['items'] = items
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def analyze_files(files, workers=None, short_words=None, details=False):
+    """
+    Анализирует документы параллельно в нескольких процессах.
+
+    Returns:
+        Список записей по документам в порядке files; ошибка чтения файла
+        попадает в запись со статусом 'error', остальные файлы анализируются дальше
+    """
+    workers = min(resolve_workers(workers), len(files)) or 1
+    records = [None] * len(files)
+
+    def record(index, result=None, error=None):
+        entry = {'input': files[index]}
+        if error is None:
+            entry.update(result)
+        else:
+            entry.update({'status': 'error', 'error': describe_error(files[index], error)})
+            logging.error(entry['error'])
+        records[index] = entry
+
+    if workers == 1:
+        for index, path in enumerate(files):
+            try:
+                record(index, analyze_document(path, short_words, details))
+            except Exception as e:
+                record(index, error=e)
+        return records
+
+    logging.info(f"Анализ {len(files)} файлов в {workers} процессах")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {
+            executor.submit(analyze_document, path, short_words, details): index
+            for index, path in enumerate(files)
+        }
+        for future in as_completed(pending):
+            try:
+                record(pending[future], future.result())
+            except Exception as e:
+                record(pending[future], error=e)
+    return records
+
+
+def summarize(records, seconds):
+    """Итоги анализа: количество документов по статусам, правки всего и по правилам."""
+    rules = {}
+    for entry in records:
+        for rule, count in entry.get('rules', {}).items():
+            rules[rule] = rules.get(rule, 0) + count
+    return {
+        'files': len(records),
+        'changed': sum(1 for entry in records if entry['status'] == 'changed'),
+        'unchanged': sum(1 for entry in records if entry['status'] == 'unchanged'),
+        'errors': sum(1 for entry in records if entry['status'] == 'error'),
+        'edits': sum(entry.get('edits', 0) for entry in records),
+        'paragraphs': sum(entry.get('paragraphs', 0) for entry in records),
+        'rules': rules,
+        'seconds': round(seconds, 3),
+    }
+
+
+def write_csv(stream, records, rules, details=False):
+    """
+    Пишет отчет в CSV: по строке на документ (с колонкой на каждое правило)
+    или, при details, по строке на каждую правку.
+    """
+    if details:
+        writer = csv.DictWriter(stream, DETAIL_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for entry in records:
+            for item in entry.get('items', []):
+                writer.writerow({'input': entry['input'], **item})
+        return
+
+    writer = csv.DictWriter(stream, DOCUMENT_COLUMNS + tuple(rules), extrasaction='ignore')
+    writer.writeheader()
+    for entry in records:
+        writer.writerow({**entry, **{rule: entry.get('rules', {}).get(rule, 0) for rule in rules}})
+
+
+def _split_words(values):
+    """Разбирает значения --add/--remove: слова через запятую, параметр можно повторять."""
+    return {word.strip().lower() for value in values for word in value.split(',') if word.strip()}
+
+
+def candidate_words(add=(), remove=(), words_file=None):
+    """
+    Список предлогов для анализа: из файла (по слову в строке) или из настроек,
+    с добавленными и удаленными словами. None, если список совпадает с настройками.
+    """
+    current = current_config().short_words
+    if words_file:
+        with open(words_file, encoding='utf-8') as f:
+            words = {line.strip().lower() for line in f if line.strip()}
+    else:
+        words = set(current)
+    words = frozenset((words | _split_words(add)) - _split_words(remove))
+    return None if words == current else words
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="Файлы, каталоги, шаблоны glob или '-' для списка файлов из stdin")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Искать документы во вложенных каталогах")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="Количество процессов (по умолчанию из app_config.json или по числу ядер)")
+    parser.add_argument('--add', action='append', default=[], metavar='WORDS',
+                        help="Добавить предлоги к списку из настроек (через запятую)")
+    parser.add_argument('--remove', action='append', default=[], metavar='WORDS',
+                        help="Убрать предлоги из списка (через запятую)")
+    parser.add_argument('--words-file', help="Проверить список предлогов из файла (по слову в строке)")
+    parser.add_argument('--details', action='store_true',
+                        help="Перечислить каждую правку: часть документа, параграф, правило и отрывок текста")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json', help="Формат отчета")
+    parser.add_argument('-o', '--output', help="Файл отчета (по умолчанию stdout)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Подробный лог в stderr")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s | %(levelname)-8s | %(message)s',
+        datefmt='%H:%M:%S',
+        stream=sys.stderr
+    )
+
+    try:
+        short_words = candidate_words(args.add, args.remove, args.words_file)
+    except OSError as e:
+        parser.error(f"Не удалось прочитать список слов: {e}")
+
+    files = expand_inputs(args.inputs, args.recursive)
+    start = time.perf_counter()
+    records = analyze_files(files, args.workers, short_words, args.details)
+    totals = summarize(records, time.perf_counter() - start)
+    if short_words is not None:
+        totals['short_words'] = sorted(short_words)
+
+    stream = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            write_csv(stream, records, sorted(totals['rules']), args.details)
+        else:
+            json.dump({'files': records, 'totals': totals}, stream, ensure_ascii=False, indent=2)
+            stream.write('\n')
+    finally:
+        if args.output:
+            stream.close()
+
+    if args.output or args.format == 'csv':
+        # Итоги в stderr, если сам отчет не содержит их
+        sys.stderr.write(f"Документов: {totals['files']}, с правками: {totals['changed']}, "
+                         f"правок: {totals['edits']}, ошибок: {totals['errors']}, {totals['seconds']:.2f} с\n")
+    return 1 if totals['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
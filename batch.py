@@ -0,0 +1,284 @@
+import os
+import time
+import queue
+import cProfile
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from config import get_setting
+from logic import fix_hanging_prepositions
+from manifest import ManifestSet
+from metrics import MetricsWriter, SlowestProfiles, format_metrics
+from progress import ProgressReporter
+
+# Минимальное изменение прогресса файла, о котором воркер сообщает родителю
+PROGRESS_STEP = 0.01
+
+# Очередь прогресса внутри процесса-воркера (задается в _init_worker)
+_progress_queue = None
+
+
+def resolve_workers(workers=None):
+    """Возвращает количество процессов: из аргумента, из настроек или по числу ядер."""
+    if workers is None:
+        workers = get_setting('workers')
+    if not workers or workers < 1:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def describe_error(file_path, error):
+    """Формирует сообщение об ошибке для итогового отчета, как его ожидает processing_complete."""
+    if isinstance(error, FileNotFoundError):
+        return f"Файл не найден: {file_path}"
+    if isinstance(error, PermissionError):
+        return f"Нет доступа к файлу или файл открыт: {file_path}"
+    return f"Ошибка обработки файла {file_path}: {str(error)}"
+
+
+def _init_worker(progress_queue):
+    """Инициализирует процесс-воркер: запоминает очередь для отправки прогресса."""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _timed_fix(input_path, output_path, paragraph_progress, options, profile_path=None):
+    """
+    Вызывает fix_hanging_prepositions и добавляет в результат время обработки.
+
+    paragraph_progress получает (доля 0..1, обработано параграфов).
+
+    Если задан profile_path, обработка выполняется под cProfile, а статистика
+    сохраняется в этот файл (result['profile']).
+    """
+    profiler = cProfile.Profile() if profile_path else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = fix_hanging_prepositions(input_path, output_path, paragraph_progress=paragraph_progress, **options)
+    finally:
+        if profiler:
+            profiler.disable()
+    result['seconds'] = round(time.perf_counter() - start, 3)
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+        result['profile'] = profile_path
+    return result
+
+
+def _file_size(path):
+    """Размер файла для оценки обработанных байт; недоступный файл считается пустым."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _process_file(index, input_path, output_path, options, profile_path=None):
+    """Обрабатывает один файл в процессе-воркере."""
+    last_sent = [0.0]
+
+    def report(progress, paragraphs):
+        # Не шлем в очередь каждый параграф: межпроцессная передача дорогая
+        if progress - last_sent[0] >= PROGRESS_STEP or progress >= 1.0:
+            last_sent[0] = progress
+            _progress_queue.put((index, progress, paragraphs))
+
+    return _timed_fix(input_path, output_path, report, options, profile_path)
+
+
+class BatchExecutor:
+    """
+    Пакетная обработка файлов в нескольких процессах.
+
+    Каждый воркер обрабатывает один файл через fix_hanging_prepositions. Прогресс
+    воркеров собирается в родительском процессе, результаты сообщаются по мере готовности.
+
+    В режиме incremental файлы, не изменившиеся с прошлого запуска с теми же
+    настройками, пропускаются по манифесту в каталоге результатов.
+
+    Метрики каждого документа пишутся в лог и в файл metrics_path (JSON Lines,
+    по умолчанию настройка metrics_file). При profile_slowest > 0 документы
+    обрабатываются под cProfile, и в profile_dir остаются профили самых медленных.
+    """
+
+    def __init__(self, workers=None, with_spellcheck=False, engine='docx', short_words=None,
+                 incremental=False, metrics_path=None, profile_dir='profiles', profile_slowest=0,
+                 coalesce_runs=None):
+        self.workers = resolve_workers(workers)
+        self.incremental = incremental
+        self.metrics_path = metrics_path if metrics_path is not None else get_setting('metrics_file')
+        self.profile_dir = profile_dir
+        self.profile_slowest = profile_slowest
+        self.options = {
+            'with_spellcheck': with_spellcheck,
+            'engine': engine,
+            # Передаем набор слов явно: при spawn воркеры не видят несохраненные изменения
+            'short_words': frozenset(short_words) if short_words is not None else None,
+            # None - настройка coalesce_runs из снимка настроек каждого задания
+            'coalesce_runs': coalesce_runs,
+        }
+
+    def run(self, jobs, on_progress=None, on_result=None):
+        """
+        Обрабатывает список заданий.
+
+        Args:
+            jobs: Список пар (исходный путь, путь результата)
+            on_progress: Функция, принимающая ProgressEvent; события прорежены
+                         ProgressReporter (не чаще 10 в секунду)
+            on_result: Функция (исходный путь, результат или None, исключение или None),
+                       вызывается в порядке завершения файлов
+
+        Returns:
+            Словарь с количеством успешных, неизмененных и пропущенных по манифесту
+            файлов, списком ошибок, суммарными счетчиками спеллера и путями
+            сохраненных профилей
+        """
+        summary = {'successful': 0, 'unchanged': 0, 'skipped': 0, 'errors': [], 'spellcheck': {},
+                   'profiles': []}
+
+        manifests = ManifestSet(self.options) if self.incremental else None
+        if manifests:
+            jobs, skipped = manifests.split(jobs)
+            summary['skipped'] = len(skipped)
+            if skipped:
+                logging.info(f"Пропущено без изменений с прошлого запуска: {len(skipped)} файлов")
+
+        if not jobs:
+            if manifests:
+                manifests.save()
+            return summary
+        outputs = dict(jobs)
+        writer = MetricsWriter(self.metrics_path) if self.metrics_path else None
+        profiles = SlowestProfiles(self.profile_dir, self.profile_slowest) if self.profile_slowest > 0 else None
+        profile_paths = [
+            profiles.profile_path(index, input_path) if profiles else None
+            for index, (input_path, _) in enumerate(jobs)
+        ]
+
+        def handle(file_path, result, error):
+            if error is None:
+                summary['successful'] += 1
+                # Суммируем счетчики спеллера (запросы, попадания и промахи кэша)
+                for key, value in result.get('spellcheck', {}).items():
+                    summary['spellcheck'][key] = summary['spellcheck'].get(key, 0) + value
+                if result['status'] == 'unchanged':
+                    summary['unchanged'] += 1
+                    logging.info(f"Файл не требует изменений, скопирован: {file_path}")
+                else:
+                    logging.info(f"Файл успешно обработан ({result['edits']} правок): {file_path}")
+                if result.get('metrics'):
+                    logging.info(f"Метрики ({result.get('seconds', 0):.2f} с): {format_metrics(result['metrics'])}")
+                if writer:
+                    writer.write(file_path, outputs[file_path], result)
+                if profiles:
+                    # Какие профили останутся, известно только в конце пакета (summary['profiles'])
+                    profiles.add(result.get('seconds', 0), result.pop('profile', None))
+            else:
+                error_message = describe_error(file_path, error)
+                summary['errors'].append(error_message)
+                # Трассировку пишем только для непредвиденных ошибок
+                expected = isinstance(error, (FileNotFoundError, PermissionError))
+                logging.error(error_message, exc_info=None if expected else error)
+            if manifests:
+                manifests.record(file_path, outputs[file_path], result, error)
+            if on_result:
+                on_result(file_path, result, error)
+
+        sizes = [_file_size(input_path) for input_path, _ in jobs]
+        reporter = ProgressReporter(on_progress or (lambda event: None),
+                                    files_total=len(jobs), bytes_total=sum(sizes))
+
+        try:
+            if self.workers == 1 or len(jobs) == 1:
+                self._run_inline(jobs, sizes, reporter, handle, profile_paths)
+            else:
+                self._run_pool(jobs, sizes, reporter, handle, profile_paths)
+        finally:
+            # Уже обработанные файлы не придется повторять, даже если пакет прерван
+            if manifests:
+                manifests.save()
+
+        if profiles:
+            summary['profiles'] = profiles.kept()
+            logging.info(f"Профили самых медленных документов: {', '.join(summary['profiles'])}")
+        return summary
+
+    def _run_inline(self, jobs, sizes, reporter, handle, profile_paths):
+        """Обрабатывает файлы в текущем процессе, без затрат на запуск воркеров."""
+        done_paragraphs = 0
+        done_bytes = 0
+        for index, (input_path, output_path) in enumerate(jobs):
+            current = [0]
+
+            def report(progress, paragraphs, index=index):
+                current[0] = paragraphs
+                reporter.update((index + progress) / len(jobs), index, done_paragraphs + paragraphs,
+                                done_bytes + int(sizes[index] * progress))
+
+            logging.info(f"Начало обработки файла: {input_path}")
+            try:
+                result = _timed_fix(input_path, output_path, report, self.options, profile_paths[index])
+            except Exception as e:
+                handle(input_path, None, e)
+            else:
+                handle(input_path, result, None)
+
+            done_paragraphs += current[0]
+            done_bytes += sizes[index]
+            reporter.update((index + 1) / len(jobs), index + 1, done_paragraphs, done_bytes)
+
+    def _run_pool(self, jobs, sizes, reporter, handle, profile_paths):
+        """Распределяет файлы по процессам и собирает прогресс и результаты."""
+        context = multiprocessing.get_context()
+        progress_queue = context.Queue()
+        file_progress = [0.0] * len(jobs)
+        file_paragraphs = [0] * len(jobs)
+        completed = 0
+
+        with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(jobs)),
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(progress_queue,)
+        ) as executor:
+            logging.info(f"Пакетная обработка {len(jobs)} файлов в {self.workers} процессах")
+            pending = {
+                executor.submit(_process_file, index, input_path, output_path, self.options,
+                                profile_paths[index]): index
+                for index, (input_path, output_path) in enumerate(jobs)
+            }
+
+            while pending:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+
+                # Забираем накопившийся прогресс воркеров
+                while True:
+                    try:
+                        index, progress, paragraphs = progress_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    file_progress[index] = max(file_progress[index], progress)
+                    file_paragraphs[index] = max(file_paragraphs[index], paragraphs)
+
+                for future in done:
+                    index = pending.pop(future)
+                    input_path = jobs[index][0]
+                    file_progress[index] = 1.0
+                    completed += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        handle(input_path, None, e)
+                    else:
+                        file_paragraphs[index] = result.get('paragraphs', file_paragraphs[index])
+                        handle(input_path, result, None)
+
+                reporter.update(
+                    sum(file_progress) / len(jobs), completed, sum(file_paragraphs),
+                    int(sum(progress * size for progress, size in zip(file_progress, sizes)))
+                )
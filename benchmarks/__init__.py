@@ -0,0 +1,11 @@
+"""
+Бенчмарки проекта.
+
+    corpus            - генератор синтетических документов .docx
+    stand_in_speller  - локальный заменитель Яндекс.Спеллера
+    harness           - замеры по этапам, результаты в JSON и сравнение с базовым прогоном
+    bench_engines     - python-docx против потокового движка (время и память)
+    bench_matcher     - микробенчмарк поиска предлогов
+
+Запускаются из корня проекта как модули: python -m benchmarks.harness
+"""
@@ -0,0 +1,82 @@
+"""
+Сравнение движков обработки: python-docx против потокового XML (stream_engine).
+
+Каждый движок запускается в отдельном процессе, чтобы честно измерить пиковую память.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_engines --paragraphs 20000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from docx import Document
+
+PARAGRAPH = "Договор заключен 26 января 2024 между сторонами и вступает в силу с момента подписания."
+
+
+def build_document(path, paragraphs):
+    """Создает тестовый документ с заданным количеством параграфов."""
+    doc = Document()
+    for _ in range(paragraphs):
+        doc.add_paragraph(PARAGRAPH)
+    doc.save(path)
+
+
+def run_engine(engine, input_path, output_path):
+    """Обрабатывает документ одним движком и печатает время и пиковую память."""
+    from logic import fix_hanging_prepositions
+
+    start = time.perf_counter()
+    fix_hanging_prepositions(input_path, output_path, engine=engine)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss на Linux в килобайтах
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{engine}\t{elapsed:.2f}\t{peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, default=20000)
+    parser.add_argument('--build', help=argparse.SUPPRESS)
+    parser.add_argument('--engine', help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.build:
+        build_document(args.build, args.paragraphs)
+        return
+    if args.engine:
+        run_engine(args.engine, args.input, args.output)
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Документ тоже строится в отдельном процессе: ru_maxrss наследуется через exec,
+        # и память родителя исказила бы замеры
+        input_path = os.path.join(temp_dir, 'input.docx')
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_engines', '--build', input_path,
+             '--paragraphs', str(args.paragraphs)],
+            check=True
+        )
+        print(f"Параграфов: {args.paragraphs}, размер файла: {os.path.getsize(input_path) / 1024 / 1024:.1f} МБ")
+        print("Движок\tВремя, с\tПиковая память, МБ")
+
+        for engine in ('docx', 'stream'):
+            output_path = os.path.join(temp_dir, f'output_{engine}.docx')
+            result = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_engines', '--engine', engine,
+                 '--input', input_path, '--output', output_path],
+                capture_output=True, text=True, check=True
+            )
+            print(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Микробенчмарк поиска предлогов: пересборка regex на каждый run против PrepositionMatcher.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_matcher
+"""
+import re
+import time
+
+from config import current_config
+from matcher import get_matcher
+
+SHORT_WORDS = current_config().short_words
+
+SAMPLE_RUNS = [
+    "Договор заключен в г. Москве между сторонами и вступает в силу с момента подписания.",
+    "Со дня подписания об этом уведомляется каждая из сторон по почте или через курьера.",
+    "Оплата производится до 10 числа за счет средств заказчика без задержек.",
+    "Исполнитель обязуется ко времени сдачи работ предоставить отчет о проделанной работе",
+] * 250
+
+
+def run_baseline(runs):
+    """Старый подход: паттерн строится заново для каждого run и каждой пары run."""
+    matches = 0
+    for text in runs:
+        pattern = r'(?<!\w)(' + '|'.join(re.escape(word) for word in SHORT_WORDS) + r')(?=\s)'
+        matches += sum(1 for _ in re.finditer(pattern, text, re.IGNORECASE))
+    for i in range(len(runs) - 1):
+        if re.search(r'(?<!\w)(' + '|'.join(re.escape(word) for word in SHORT_WORDS) + r')$', runs[i],
+                     re.IGNORECASE):
+            matches += 1
+    return matches
+
+
+def run_matcher(runs):
+    """Новый подход: общий скомпилированный PrepositionMatcher."""
+    matcher = get_matcher()
+    matches = 0
+    for text in runs:
+        matches += len(matcher.find_inner(text))
+    for i in range(len(runs) - 1):
+        if matcher.ends_with_short_word(runs[i]):
+            matches += 1
+    return matches
+
+
+def measure(func, runs, repeat=5):
+    """Возвращает (количество совпадений, совпадений в секунду) по лучшему из повторов."""
+    best = float('inf')
+    matches = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = func(runs)
+        best = min(best, time.perf_counter() - start)
+    return matches, matches / best
+
+
+def main():
+    baseline_matches, baseline_rate = measure(run_baseline, SAMPLE_RUNS)
+    matcher_matches, matcher_rate = measure(run_matcher, SAMPLE_RUNS)
+
+    assert baseline_matches == matcher_matches, "Результаты поиска расходятся"
+
+    print(f"Совпадений за проход: {matcher_matches}")
+    print(f"До (regex на каждый run): {baseline_rate:,.0f} совпадений/с")
+    print(f"После (PrepositionMatcher): {matcher_rate:,.0f} совпадений/с")
+    print(f"Ускорение: x{matcher_rate / baseline_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Генератор синтетических документов .docx для бенчмарков.
+
+Документы детерминированы (зависят только от параметров и seed) и содержат
+русский текст с заданной плотностью предлогов, дат и опечаток, дробление
+абзацев на мелкие runs с разным форматированием, таблицы, колонтитулы и картинки.
+
+Запуск из корня проекта:
+    python -m benchmarks.corpus corpus/ --documents 5 --paragraphs 2000 --runs 6 --tables 3 --images 2
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import zlib
+
+from docx import Document
+from docx.shared import Cm
+
+from config import DEFAULT_SHORT_WORDS
+
+WORDS = (
+    "договор стороны исполнитель заказчик обязуется оплатить работы услуги срок порядок "
+    "выполнения настоящего условия ответственность приложение акт сдачи приемки сумма "
+    "налог счет расчет платеж уведомление претензия поставка товар качество количество "
+    "гарантия доставка адрес реквизиты подпись печать представитель основание устав "
+    "доверенность изменение расторжение соглашение спор суд законодательство период "
+    "отчет документ копия оригинал экземпляр сила момент подписания обязательство"
+).split()
+
+MONTHS = ("января", "февраля", "марта", "апреля", "мая", "июня", "июля", "августа",
+          "сентября", "октября", "ноября", "декабря")
+
+# Опечатки, которые распознает локальный заменитель спеллера (benchmarks.stand_in_speller)
+TYPOS = {
+    "догавор": "договор",
+    "исполнитиль": "исполнитель",
+    "заказчек": "заказчик",
+    "обязуеться": "обязуется",
+    "плотеж": "платеж",
+}
+
+SHORT_WORDS = sorted(DEFAULT_SHORT_WORDS)
+
+
+def make_png(width=64, height=48, seed=0):
+    """Создает небольшое PNG-изображение без сторонних библиотек."""
+    rng = random.Random(seed)
+    color = bytes(rng.randrange(256) for _ in range(3))
+    raw = b''.join(b'\x00' + color * width for _ in range(height))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+def make_date(rng):
+    """Создает дату в одном из форматов, которые распознает модуль dates."""
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1990, 2030)
+    return rng.choice((
+        f"{day:02d}.{month:02d}.{year}",
+        f"{year}-{month:02d}-{day:02d}",
+        f"{day} {MONTHS[month - 1]} {year} г.",
+        f"{day}–{day + rng.randint(1, 3)} {MONTHS[month - 1]}",
+        f"{year}–{year + 1} гг.",
+        f"{rng.choice(('XIX', 'XX', 'XXI'))} век",
+    ))
+
+
+def make_sentence(rng, words=14, preposition_density=0.25, date_density=0.1, typo_density=0.02):
+    """
+    Создает одно предложение.
+
+    Args:
+        preposition_density: Доля слов, перед которыми стоит предлог или союз
+        date_density: Вероятность даты в предложении
+        typo_density: Доля слов, замененных опечаткой
+    """
+    tokens = []
+    for _ in range(words):
+        if rng.random() < preposition_density:
+            tokens.append(rng.choice(SHORT_WORDS))
+        if rng.random() < typo_density:
+            tokens.append(rng.choice(list(TYPOS)))
+        else:
+            tokens.append(rng.choice(WORDS))
+
+    if rng.random() < date_density:
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(1990, 2030)
+        date = f"{day:02d}.{month:02d}.{year}" if rng.random() < 0.5 else f"{day} {MONTHS[month - 1]} {year}"
+        tokens.insert(rng.randrange(len(tokens) + 1), date)
+
+    sentence = ' '.join(tokens)
+    return sentence[0].upper() + sentence[1:] + '.'
+
+
+def split_runs(rng, text, runs):
+    """Делит текст на runs примерно равной длины по случайным позициям."""
+    if runs <= 1 or len(text) < runs:
+        return [text]
+    cuts = sorted(rng.sample(range(1, len(text)), runs - 1))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+def add_paragraph(container, rng, options):
+    """Добавляет абзац, раздробленный на runs с чередующимся форматированием."""
+    text = ' '.join(
+        make_sentence(rng, preposition_density=options['preposition_density'],
+                      date_density=options['date_density'], typo_density=options['typo_density'])
+        for _ in range(options['sentences'])
+    )
+    paragraph = container.add_paragraph()
+    for index, fragment in enumerate(split_runs(rng, text, options['runs'])):
+        run = paragraph.add_run(fragment)
+        # Разное форматирование не дает Word склеить runs обратно
+        run.bold = index % 3 == 1
+        run.italic = index % 3 == 2
+    return paragraph
+
+
+def generate_document(path, paragraphs=1000, runs=1, sentences=2, tables=0, table_rows=5, table_cols=3,
+                      headers=True, images=0, preposition_density=0.25, date_density=0.1,
+                      typo_density=0.02, seed=0):
+    """
+    Создает синтетический документ.
+
+    Args:
+        path: Путь для сохранения
+        paragraphs: Количество абзацев в теле документа (без учета таблиц и колонтитулов)
+        runs: На сколько runs дробится каждый абзац
+        sentences: Предложений в абзаце
+        tables: Количество таблиц, равномерно распределенных по документу
+        table_rows, table_cols: Размер таблиц
+        headers: Добавить верхний и нижний колонтитулы
+        images: Количество картинок, равномерно распределенных по документу
+        preposition_density, date_density, typo_density: Плотность предлогов, дат и опечаток
+        seed: Начальное значение генератора случайных чисел
+
+    Returns:
+        Общее количество абзацев с текстом
+    """
+    rng = random.Random(seed)
+    options = {
+        'runs': runs,
+        'sentences': sentences,
+        'preposition_density': preposition_density,
+        'date_density': date_density,
+        'typo_density': typo_density,
+    }
+    doc = Document()
+    total = 0
+
+    if headers:
+        section = doc.sections[0]
+        section.header.paragraphs[0].text = make_sentence(rng, words=6)
+        section.footer.paragraphs[0].text = make_sentence(rng, words=6)
+        total += 2
+
+    table_every = paragraphs // tables if tables else 0
+    image_every = paragraphs // images if images else 0
+    for index in range(paragraphs):
+        add_paragraph(doc, rng, options)
+        total += 1
+
+        if table_every and index % table_every == table_every - 1:
+            table = doc.add_table(rows=table_rows, cols=table_cols)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.paragraphs[0].text = make_sentence(rng, words=5, typo_density=typo_density)
+                    total += 1
+        if image_every and index % image_every == image_every - 1:
+            doc.add_paragraph().add_run().add_picture(io.BytesIO(make_png(seed=index)), width=Cm(3))
+
+    doc.save(path)
+    return total
+
+
+def generate_corpus(directory, documents=5, seed=0, **options):
+    """
+    Создает набор документов в каталоге.
+
+    Returns:
+        Список путей к документам
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(documents):
+        path = os.path.join(directory, f"doc_{index:03d}.docx")
+        generate_document(path, seed=seed + index, **options)
+        paths.append(path)
+    return paths
+
+
+def add_corpus_arguments(parser):
+    """Добавляет параметры корпуса в парсер (используется и генератором, и harness)."""
+    parser.add_argument('--documents', type=int, default=5, help="Количество документов")
+    parser.add_argument('--paragraphs', type=int, default=2000, help="Абзацев в документе")
+    parser.add_argument('--runs', type=int, default=6, help="На сколько runs дробится абзац")
+    parser.add_argument('--sentences', type=int, default=2, help="Предложений в абзаце")
+    parser.add_argument('--tables', type=int, default=3, help="Таблиц в документе")
+    parser.add_argument('--images', type=int, default=2, help="Картинок в документе")
+    parser.add_argument('--no-headers', dest='headers', action='store_false', help="Без колонтитулов")
+    parser.add_argument('--preposition-density', type=float, default=0.25)
+    parser.add_argument('--date-density', type=float, default=0.1)
+    parser.add_argument('--typo-density', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def corpus_options(args):
+    """Извлекает параметры корпуса из разобранных аргументов."""
+    return {
+        'documents': args.documents,
+        'paragraphs': args.paragraphs,
+        'runs': args.runs,
+        'sentences': args.sentences,
+        'tables': args.tables,
+        'images': args.images,
+        'headers': args.headers,
+        'preposition_density': args.preposition_density,
+        'date_density': args.date_density,
+        'typo_density': args.typo_density,
+        'seed': args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help="Каталог для документов")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.directory, **corpus_options(args))
+    size = sum(os.path.getsize(path) for path in paths)
+    print(f"Создано документов: {len(paths)}, общий размер: {size / 1024 / 1024:.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Бенчмарк нормализации дат на документах с большими таблицами дат.
+
+В каждой ячейке несколько дат разных форматов (benchmarks.corpus.make_date),
+ячейки дробятся на runs так, что даты попадают на границы runs. Замеряются
+поиск дат в склеенном тексте (dates.find_date_spaces), нормализация строки
+(dates.normalize_dates) и обработка параграфов документа (fix_dates_in_paragraph)
+в абзацах, датах и мегабайтах текста в секунду; из нескольких повторов берется лучший.
+
+Запуск из корня проекта:
+    python -m benchmarks.dates --tables 20 --rows 50 --cols 4 --dates 3 --repeat 5
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from docx import Document
+
+from benchmarks.corpus import make_date, split_runs
+from dates import DATE_PATTERN, find_date_spaces, normalize_dates
+from document_walker import iter_paragraphs
+from logic import fix_dates_in_paragraph
+
+
+def generate_date_tables(path, tables=20, rows=50, cols=4, dates=3, runs=3, seed=0):
+    """
+    Создает документ из таблиц, заполненных датами.
+
+    Returns:
+        Количество ячеек с датами
+    """
+    rng = random.Random(seed)
+    doc = Document()
+    cells = 0
+    for _ in range(tables):
+        table = doc.add_table(rows=rows, cols=cols)
+        for row in table.rows:
+            for cell in row.cells:
+                text = ', '.join(make_date(rng) for _ in range(dates))
+                paragraph = cell.paragraphs[0]
+                for index, fragment in enumerate(split_runs(rng, text, runs)):
+                    paragraph.add_run(fragment).bold = index % 2 == 1
+                cells += 1
+    doc.save(path)
+    return cells
+
+
+def best_of(repeat, function):
+    """Лучшее время из нескольких повторов."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def run_benchmark(path, repeat=3):
+    """
+    Замеряет этапы нормализации дат на одном документе.
+
+    Returns:
+        Словарь {этап: {'seconds', 'paragraphs_per_second', 'dates_per_second', 'mb_per_second'}}
+    """
+    texts = [paragraph.text for paragraph in iter_paragraphs(Document(path))]
+    paragraphs = len(texts)
+    dates = sum(1 for text in texts for _ in DATE_PATTERN.finditer(text))
+    megabytes = sum(len(text.encode('utf-8')) for text in texts) / 1048576
+
+    def documents():
+        # Каждый повтор на свежей копии: иначе пробелы уже заменены
+        for paragraph in iter_paragraphs(Document(path)):
+            fix_dates_in_paragraph(paragraph)
+
+    load = best_of(repeat, lambda: list(iter_paragraphs(Document(path))))
+    timings = {
+        'find': best_of(repeat, lambda: [find_date_spaces(text) for text in texts]),
+        'normalize': best_of(repeat, lambda: [normalize_dates(text) for text in texts]),
+        # Время открытия документа вычитается, остается работа с runs
+        'paragraphs': max(best_of(repeat, documents) - load, 1e-9),
+    }
+    return {
+        stage: {
+            'seconds': round(seconds, 4),
+            'paragraphs_per_second': round(paragraphs / seconds, 1),
+            'dates_per_second': round(dates / seconds, 1),
+            'mb_per_second': round(megabytes / seconds, 3),
+        }
+        for stage, seconds in timings.items()
+    }, paragraphs, dates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tables', type=int, default=20, help="Таблиц в документе")
+    parser.add_argument('--rows', type=int, default=50, help="Строк в таблице")
+    parser.add_argument('--cols', type=int, default=4, help="Столбцов в таблице")
+    parser.add_argument('--dates', type=int, default=3, help="Дат в ячейке")
+    parser.add_argument('--runs', type=int, default=3, help="На сколько runs дробится ячейка")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов, берется лучший")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'dates.docx')
+        generate_date_tables(path, args.tables, args.rows, args.cols, args.dates, args.runs, args.seed)
+        results, paragraphs, dates = run_benchmark(path, args.repeat)
+
+    print(f"Абзацев: {paragraphs}, дат: {dates}, повторов: {args.repeat}")
+    print("Этап\tВремя, с\tАбз/с\tДат/с\tМБ/с")
+    for stage, values in results.items():
+        print(f"{stage}\t{values['seconds']:.3f}\t{values['paragraphs_per_second']:.0f}\t"
+              f"{values['dates_per_second']:.0f}\t{values['mb_per_second']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Воспроизводимый бенчмарк обработки документов по этапам.
+
+Этапы: load (открытие документа и обход параграфов), dates, prepositions,
+typography (все правила реестра typography_rules одним проходом), spellcheck (через локальный заменитель спеллера, без сети), save и end_to_end
+(fix_hanging_prepositions целиком). Для каждого этапа считается пропускная
+способность в абзацах и мегабайтах исходных файлов в секунду; из нескольких
+повторов берется лучший.
+
+Результаты сохраняются в JSON и сравниваются с базовым прогоном: этап считается
+регрессией, если его скорость упала больше чем на порог.
+
+Запуск из корня проекта:
+    python -m benchmarks.harness --output baseline.json
+    python -m benchmarks.harness --baseline baseline.json --threshold 0.1 --stage-threshold spellcheck=0.3
+    python -m benchmarks.harness --corpus corpus/ --repeat 5
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from docx import Document
+
+from benchmarks.corpus import add_corpus_arguments, corpus_options, generate_corpus
+from benchmarks.stand_in_speller import start_server
+from document_walker import iter_paragraphs, paragraph_runs
+from logic import fix_dates_in_paragraph, fix_hanging_prepositions
+from matcher import get_matcher
+from package_writer import save_document
+from speller import YandexSpeller
+from spell_pipeline import SpellcheckPipeline
+from transform import RunTextMap, apply_edits, find_preposition_spaces, transform_texts
+from typography import get_scanner
+
+STAGES = ('load', 'dates', 'prepositions', 'typography', 'spellcheck', 'save', 'end_to_end')
+
+# Версия формата файла результатов
+RESULTS_FORMAT = 1
+
+
+def fix_prepositions_in_paragraph(paragraph, matcher):
+    """Только висячие предлоги, без дат (отдельный этап бенчмарка)."""
+    runs = paragraph_runs(paragraph)
+    run_map = RunTextMap([run.text for run in runs])
+    for index, text in apply_edits(run_map, find_preposition_spaces(run_map.text, matcher)).items():
+        runs[index].text = text
+
+
+def fix_typography_in_paragraph(paragraph, scanner):
+    """Все правила типографики одним проходом сканера."""
+    runs = paragraph_runs(paragraph)
+    changed, _ = transform_texts([run.text for run in runs], scanner)
+    for index, text in changed.items():
+        runs[index].text = text
+
+
+def measure_document(path, output_path, stages, matcher, scanner, speller):
+    """
+    Прогоняет один документ по этапам.
+
+    Returns:
+        Словарь {этап: секунды}
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    doc = Document(path)
+    paragraphs = list(iter_paragraphs(doc))
+    timings['load'] = time.perf_counter() - start
+
+    if 'dates' in stages:
+        start = time.perf_counter()
+        for paragraph in paragraphs:
+            fix_dates_in_paragraph(paragraph)
+        timings['dates'] = time.perf_counter() - start
+
+    if 'prepositions' in stages:
+        start = time.perf_counter()
+        for paragraph in paragraphs:
+            fix_prepositions_in_paragraph(paragraph, matcher)
+        timings['prepositions'] = time.perf_counter() - start
+
+    if 'typography' in stages:
+        start = time.perf_counter()
+        for paragraph in paragraphs:
+            fix_typography_in_paragraph(paragraph, scanner)
+        timings['typography'] = time.perf_counter() - start
+
+    if 'spellcheck' in stages:
+        start = time.perf_counter()
+        with SpellcheckPipeline(speller) as pipeline:
+            for paragraph in paragraphs:
+                pipeline.add(paragraph)
+            pipeline.finish()
+        timings['spellcheck'] = time.perf_counter() - start
+
+    if 'save' in stages:
+        start = time.perf_counter()
+        save_document(doc, path, output_path)
+        timings['save'] = time.perf_counter() - start
+
+    if 'end_to_end' in stages:
+        start = time.perf_counter()
+        fix_hanging_prepositions(path, output_path)
+        timings['end_to_end'] = time.perf_counter() - start
+
+    return {stage: seconds for stage, seconds in timings.items() if stage in stages}, len(paragraphs)
+
+
+def git_commit():
+    """Текущий коммит репозитория, если он доступен."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(paths, stages=STAGES, repeat=3, latency=0.02):
+    """
+    Измеряет этапы на наборе документов.
+
+    Returns:
+        Словарь результатов, готовый к сохранению в JSON
+    """
+    matcher = get_matcher()
+    scanner = get_scanner()
+    server, url = start_server(latency=latency)
+    speller = YandexSpeller(base_url=url)
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+
+    best = {}
+    paragraphs = 0
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for _ in range(repeat):
+                totals = dict.fromkeys(stages, 0.0)
+                paragraphs = 0
+                for path in paths:
+                    output_path = os.path.join(temp_dir, os.path.basename(path))
+                    timings, count = measure_document(path, output_path, stages, matcher, scanner, speller)
+                    paragraphs += count
+                    for stage, seconds in timings.items():
+                        totals[stage] += seconds
+                for stage, seconds in totals.items():
+                    best[stage] = min(best.get(stage, seconds), seconds)
+    finally:
+        speller.close()
+        server.shutdown()
+
+    return {
+        'format': RESULTS_FORMAT,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'documents': len(paths),
+        'paragraphs': paragraphs,
+        'bytes': total_bytes,
+        'repeat': repeat,
+        'latency': latency,
+        'stages': {
+            stage: {
+                'seconds': round(seconds, 4),
+                'paragraphs_per_second': round(paragraphs / seconds, 1) if seconds else None,
+                'mb_per_second': round(total_bytes / 1048576 / seconds, 3) if seconds else None,
+            }
+            for stage, seconds in best.items()
+        },
+    }
+
+
+def compare(results, baseline, threshold=0.1, stage_thresholds=None):
+    """
+    Сравнивает результаты с базовым прогоном по абзацам в секунду.
+
+    Returns:
+        Список словарей по этапам: stage, baseline, current, change (доля), threshold, regression
+    """
+    stage_thresholds = stage_thresholds or {}
+    rows = []
+    for stage, current in results['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or not base.get('paragraphs_per_second') or not current.get('paragraphs_per_second'):
+            continue
+        limit = stage_thresholds.get(stage, threshold)
+        change = current['paragraphs_per_second'] / base['paragraphs_per_second'] - 1
+        rows.append({
+            'stage': stage,
+            'baseline': base['paragraphs_per_second'],
+            'current': current['paragraphs_per_second'],
+            'change': round(change, 4),
+            'threshold': limit,
+            'regression': change < -limit,
+        })
+    return rows
+
+
+def print_results(results):
+    """Печатает таблицу скоростей по этапам."""
+    print(f"Документов: {results['documents']}, абзацев: {results['paragraphs']}, "
+          f"размер: {results['bytes'] / 1048576:.1f} МБ, повторов: {results['repeat']}")
+    print("Этап\tВремя, с\tАбз/с\tМБ/с")
+    for stage, values in results['stages'].items():
+        print(f"{stage}\t{values['seconds']:.3f}\t{values['paragraphs_per_second']:.0f}\t{values['mb_per_second']:.2f}")
+
+
+def print_comparison(rows):
+    """Печатает сравнение с базовым прогоном."""
+    print("Этап\tБаза, абз/с\tСейчас, абз/с\tИзменение\tПорог")
+    for row in rows:
+        mark = "  РЕГРЕССИЯ" if row['regression'] else ""
+        print(f"{row['stage']}\t{row['baseline']:.0f}\t{row['current']:.0f}\t{row['change']:+.1%}\t"
+              f"-{row['threshold']:.0%}{mark}")
+
+
+def parse_stage_thresholds(items):
+    """Разбирает значения вида stage=0.3."""
+    thresholds = {}
+    for item in items or []:
+        stage, _, value = item.partition('=')
+        if stage not in STAGES or not value:
+            raise argparse.ArgumentTypeError(f"Ожидается этап=порог, например spellcheck=0.3: {item}")
+        thresholds[stage] = float(value)
+    return thresholds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="Каталог с готовыми .docx (иначе корпус генерируется во временном каталоге)")
+    add_corpus_arguments(parser)
+    parser.add_argument('--stages', default=','.join(STAGES), help="Этапы через запятую")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов, берется лучший")
+    parser.add_argument('--latency', type=float, default=0.02, help="Задержка заменителя спеллера, секунды")
+    parser.add_argument('--output', help="Сохранить результаты в JSON")
+    parser.add_argument('--baseline', help="JSON базового прогона для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Допустимое падение скорости этапа относительно базы (доля)")
+    parser.add_argument('--stage-threshold', action='append',
+                        help="Порог для отдельного этапа, например spellcheck=0.3")
+    args = parser.parse_args(argv)
+
+    stages = tuple(stage for stage in args.stages.split(',') if stage)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Неизвестные этапы: {', '.join(sorted(unknown))}")
+    try:
+        stage_thresholds = parse_stage_thresholds(args.stage_threshold)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.corpus:
+            paths = sorted(glob.glob(os.path.join(args.corpus, '*.docx')))
+            corpus = {'directory': os.path.abspath(args.corpus)}
+        else:
+            corpus = corpus_options(args)
+            paths = generate_corpus(temp_dir, **corpus)
+        if not paths:
+            parser.error("В корпусе нет документов .docx")
+
+        results = run_benchmark(paths, stages, args.repeat, args.latency)
+        results['corpus'] = corpus
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold, stage_thresholds)
+        print()
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Локальный заменитель Яндекс.Спеллера для бенчмарков и отладки без доступа к сети.
+
+Реализует POST /checkTexts в формате сервиса и находит опечатки из
+benchmarks.corpus.TYPOS. Задержка ответа имитирует сетевую.
+
+Запуск из корня проекта:
+    python -m benchmarks.stand_in_speller --port 8765 --latency 0.05
+а затем "speller_url": "http://127.0.0.1:8765" в app_config.json.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from benchmarks.corpus import TYPOS
+
+TYPO_PATTERN = re.compile(r'(?<!\w)(' + '|'.join(map(re.escape, TYPOS)) + r')(?!\w)', re.IGNORECASE)
+
+
+def check_text(text):
+    """Возвращает исправления для одного текста в формате Яндекс.Спеллера."""
+    return [
+        {'code': 1, 'pos': match.start(), 'row': 0, 'col': match.start(), 'len': len(match.group()),
+         'word': match.group(), 's': [TYPOS[match.group().lower()]]}
+        for match in TYPO_PATTERN.finditer(text)
+    ]
+
+
+class StandInSpellerHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов checkTexts; задержка задается атрибутом сервера latency."""
+
+    def do_POST(self):
+        if not self.path.endswith('/checkTexts'):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+        self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        body = json.dumps([check_text(text) for text in form.get('text', [])], ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Лог каждого запроса исказил бы замеры
+        pass
+
+
+def start_server(latency=0.0, port=0):
+    """
+    Запускает сервер в фоновом потоке.
+
+    Returns:
+        Кортеж (сервер, базовый адрес для настройки speller_url); остановка - server.shutdown()
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInSpellerHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.requests = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help="Задержка ответа, секунды")
+    args = parser.parse_args()
+
+    server, url = start_server(args.latency, args.port)
+    print(f"Заменитель спеллера: {url} (Ctrl+C для остановки)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
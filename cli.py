@@ -0,0 +1,216 @@
+"""
+Консольный запуск обработки без графического интерфейса.
+
+Модуль не импортирует tkinter/ttkbootstrap и подходит для серверов без дисплея.
+
+Примеры:
+    python cli.py contracts/ -o processed/ -j 8
+    python cli.py "archive/**/*.docx" --suffix _fixed --spellcheck
+    find . -name "*.docx" | python cli.py - -o processed/
+"""
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+
+from batch import BatchExecutor
+from progress import describe_progress
+
+# Каталог результатов по умолчанию, как в графическом интерфейсе
+DEFAULT_OUTPUT_DIR = "output_files"
+
+
+def is_docx(path):
+    """Проверяет, что путь указывает на документ Word, а не на файл блокировки (~$*.docx)."""
+    name = os.path.basename(path)
+    return name.endswith(".docx") and not name.startswith("~$")
+
+
+def expand_inputs(inputs, recursive=False):
+    """
+    Раскрывает аргументы в список .docx файлов.
+
+    Args:
+        inputs: Пути к файлам, каталогам или шаблоны glob ('**' для рекурсивного поиска);
+                '-' означает чтение списка файлов из stdin, по одному на строку
+        recursive: Искать документы во вложенных каталогах
+
+    Returns:
+        Список путей без повторов в порядке появления
+    """
+    files = []
+    for item in inputs:
+        if item == "-":
+            files.extend(line.strip() for line in sys.stdin if line.strip())
+        elif os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*.docx") if recursive else os.path.join(item, "*.docx")
+            files.extend(sorted(glob.glob(pattern, recursive=recursive)))
+        elif glob.has_magic(item):
+            files.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            # Несуществующий файл попадет в отчет как ошибка
+            files.append(item)
+
+    seen = set()
+    return [path for path in files if is_docx(path) and not (path in seen or seen.add(path))]
+
+
+def output_path_for(input_path, output_dir=None, suffix=None, root=None):
+    """
+    Вычисляет путь результата: в выбранный каталог, рядом с суффиксом или в output_files.
+
+    Args:
+        root: Общий каталог исходных файлов. Если задан вместе с output_dir, в output_dir
+              повторяются подкаталоги исходного файла относительно root; иначе берется только имя
+    """
+    if suffix:
+        stem, ext = os.path.splitext(input_path)
+        return f"{stem}{suffix}{ext}"
+    if output_dir is None:
+        output_dir = os.path.join(os.path.dirname(input_path), DEFAULT_OUTPUT_DIR)
+        return os.path.join(output_dir, os.path.basename(input_path))
+    if root is None:
+        return os.path.join(output_dir, os.path.basename(input_path))
+    return os.path.join(output_dir, os.path.relpath(os.path.abspath(input_path), root))
+
+
+def plan_jobs(files, output_dir=None, suffix=None):
+    """
+    Составляет пары (исходный файл, результат) для пакета.
+
+    При output_dir файлы из разных каталогов (-r, '**') раскладываются по подкаталогам
+    относительно общего каталога исходных файлов, поэтому одноименные документы
+    не перезаписывают друг друга.
+
+    Raises:
+        ValueError: Два файла пишутся в один результат
+    """
+    root = None
+    if output_dir is not None and not suffix and files:
+        try:
+            root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+        except ValueError:
+            # Файлы на разных дисках: общего каталога нет, остается проверка повторов ниже
+            root = None
+
+    jobs = [(path, output_path_for(path, output_dir, suffix, root)) for path in files]
+    targets = {}
+    for input_path, output_path in jobs:
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in targets:
+            raise ValueError(f"Файлы {targets[key]} и {input_path} сохраняются в один результат {output_path}")
+        targets[key] = input_path
+    return jobs
+
+
+def build_parser():
+    """Создает парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description="Обработка висячих предлогов и дат в документах .docx без графического интерфейса.",
+        epilog=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="Файлы, каталоги, шаблоны glob или '-' для списка файлов из stdin")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Искать документы во вложенных каталогах")
+
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("-o", "--output-dir",
+                        help="Каталог для результатов (по умолчанию output_files рядом с исходным файлом)")
+    target.add_argument("--suffix",
+                        help="Сохранять результат рядом с исходным файлом, добавив суффикс к имени")
+
+    parser.add_argument("--spellcheck", action="store_true", help="Включить проверку орфографии")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Пропускать файлы, не изменившиеся с прошлого запуска (манифест в каталоге результатов)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Количество процессов (по умолчанию из app_config.json или по числу ядер)")
+    parser.add_argument("--engine", choices=("docx", "stream"), default="docx",
+                        help="Движок обработки: python-docx или потоковый XML")
+    parser.add_argument("--coalesce-runs", action="store_true", default=None,
+                        help="Объединять соседние runs с одинаковым форматированием (только движок docx)")
+    parser.add_argument("--metrics", default=None,
+                        help="Файл JSON Lines для метрик документов (по умолчанию настройка metrics_file)")
+    parser.add_argument("--profile-slowest", type=int, default=0, metavar="N",
+                        help="Сохранить профили cProfile для N самых медленных документов")
+    parser.add_argument("--profile-dir", default="profiles", help="Каталог для профилей (по умолчанию profiles)")
+    parser.add_argument("--progress", action="store_true",
+                        help="Показывать прогресс, скорость и оставшееся время в stderr")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Подробный лог в stderr")
+    return parser
+
+
+def main(argv=None):
+    """Точка входа. Печатает JSON-отчет в stdout и возвращает код завершения."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Лог уходит в stderr, чтобы stdout содержал только JSON
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s | %(levelname)-8s | %(message)s',
+        datefmt='%H:%M:%S',
+        stream=sys.stderr
+    )
+
+    files = expand_inputs(args.inputs, args.recursive)
+    try:
+        jobs = plan_jobs(files, args.output_dir, args.suffix)
+    except ValueError as e:
+        parser.error(str(e))
+    for _, output_path in jobs:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    outputs = dict(jobs)
+    records = []
+
+    def on_result(input_path, result, error):
+        record = {"input": input_path, "output": outputs[input_path]}
+        if error is None:
+            record.update(result)
+        else:
+            record.update({"status": "error", "error": str(error)})
+        records.append(record)
+
+    def on_progress(event):
+        # Перезаписываем одну строку; события уже прорежены ProgressReporter
+        sys.stderr.write("\r" + describe_progress(event).ljust(100))
+        if event.finished:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    start = time.perf_counter()
+    executor = BatchExecutor(workers=args.workers, with_spellcheck=args.spellcheck, engine=args.engine,
+                             incremental=args.incremental, metrics_path=args.metrics,
+                             profile_dir=args.profile_dir, profile_slowest=args.profile_slowest,
+                             coalesce_runs=args.coalesce_runs)
+    summary = executor.run(jobs, on_progress=on_progress if args.progress else None, on_result=on_result)
+
+    report = {
+        "files": records,
+        "totals": {
+            "files": len(jobs),
+            "changed": summary["successful"] - summary["unchanged"],
+            "unchanged": summary["unchanged"],
+            "skipped": summary["skipped"],
+            "errors": len(summary["errors"]),
+            "edits": sum(record.get("edits", 0) for record in records),
+            "seconds": round(time.perf_counter() - start, 3),
+            "workers": executor.workers,
+            "spellcheck": summary["spellcheck"],
+        },
+        "errors": summary["errors"],
+        "profiles": summary["profiles"],
+    }
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,9 @@
 import json
 import os
+import copy
+import hashlib
+import logging
+import threading
 
 # Путь к файлу с настройками
 CONFIG_FILE = "app_config.json"
@@ -11,31 +15,166 @@ DEFAULT_SHORT_WORDS = {
     "вместо", "со", "ко", "во", "и", "а", "но", "или"
 }
 
-def load_short_words():
-    """Загружает список коротких слов из конфигурационного файла."""
+# Стандартный реестр правил неразрывных пробелов (typography.TypographyScanner).
+# Все обычные пробелы внутри совпадения шаблона заменяются на неразрывные;
+# у встроенных правил prepositions и dates шаблон строится в коде
+DEFAULT_TYPOGRAPHY_RULES = [
+    {"name": "prepositions", "enabled": True, "description": "Предлоги и союзы из short_words"},
+    {"name": "dates", "enabled": True, "description": "Даты: 26 января 1990 г., 2023–2024 гг., XX век"},
+    {"name": "initials", "enabled": True, "description": "Инициалы: А. С. Пушкин, Иванов И. И.",
+     "pattern": r"(?<![\w.])(?:[А-ЯЁ]\.\s?(?:[А-ЯЁ]\.\s?)?[А-ЯЁ][а-яё]+"
+                r"|[А-ЯЁ][а-яё]+\s[А-ЯЁ]\.\s?[А-ЯЁ]\.(?!\s?[А-ЯЁ][а-яё]))"},
+    {"name": "abbreviations", "enabled": True, "ignore_case": True,
+     "description": "Сокращения: т. е., и т. д., г. Москва, рис. 5",
+     "pattern": r"(?<![\w.])(?:т\.\s?[еодпкн]\."
+                r"|(?:г|ул|пер|д|корп|кв|стр|рис|табл|гл|ст|пп|п|ч|с|см|ср)\.\s(?=[\w№]))"},
+    {"name": "number_units", "enabled": True, "description": "Число и единица измерения: 10 кг, 5 %",
+     "pattern": r"(?<![\w.,])\d+(?:[.,]\d+)?\s(?:%|‰|°[CС]?|кг|мг|г|км|см|мм|м|мл|л|га|руб\.|коп\.|₽|€|\$"
+                r"|шт\.|тыс\.|млн|млрд|мин|ч|КБ|МБ|ГБ|кВт|Вт)(?!\w)"},
+    {"name": "numero", "enabled": True, "description": "Знаки № и § перед числом", "pattern": r"[№§]+\s(?=\d)"},
+    {"name": "dashes", "enabled": True, "description": "Пробел перед тире",
+     "pattern": r"(?<=\S)[^\S\t\n\r\v\f\u00A0](?=[–—])"},
+]
+
+# Стандартные значения остальных настроек
+DEFAULT_SETTINGS = {
+    "workers": 0,  # Количество процессов для пакетной обработки, 0 - по числу ядер
+    "spell_backend": "yandex",  # Движок орфографии: "yandex" или "local" (pyspellchecker, без сети)
+    "local_spell_dictionary": None,  # Дополнительный частотный словарь для локального движка
+    "local_spell_distance": 1,  # Максимальное расстояние правки для локального движка
+    "speller_url": None,  # Адрес спеллера, None - сервис Яндекса
+    "spell_cache": True,  # Кэшировать ответы спеллера на диске
+    "spell_cache_path": "spell_cache.sqlite",
+    "spell_cache_max_entries": 100000,
+    "spell_cache_ttl_days": None,  # Время жизни записи кэша, None - без ограничения
+    "spell_max_in_flight": 4,  # Сколько запросов к спеллеру выполняется одновременно
+    "metrics_file": "logs/metrics.jsonl",  # Метрики обработки документов (JSON Lines), None - не писать
+    "coalesce_runs": False,  # Объединять соседние runs с одинаковым форматированием перед обработкой
+    "typography_rules": DEFAULT_TYPOGRAPHY_RULES  # Реестр правил неразрывных пробелов
+}
+
+def _read_config():
+    """Читает конфигурационный файл; отсутствующий файл - пустой словарь, ошибки не перехватываются."""
+    if not os.path.exists(CONFIG_FILE):
+        return {}
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_config():
+    """Загружает весь конфигурационный файл как словарь."""
     try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return set(config.get('short_words', DEFAULT_SHORT_WORDS))
-        return DEFAULT_SHORT_WORDS
+        return _read_config()
     except Exception:
-        # В случае ошибки возвращаем стандартный список
-        return DEFAULT_SHORT_WORDS
+        # В случае ошибки работаем со стандартными настройками
+        return {}
+
+
+class ConfigSnapshot:
+    """
+    Неизменяемый снимок настроек: набор предлогов, правила, параметры орфографии и т.д.
+
+    Задание берет снимок один раз в начале и работает с ним до конца, даже если
+    файл настроек тем временем изменился. version - хэш содержимого, по нему
+    кэшируются скомпилированные правила и отпечаток манифеста.
+    """
+
+    def __init__(self, data):
+        self.short_words = frozenset(data.get('short_words', DEFAULT_SHORT_WORDS))
+        settings = {name: data.get(name, default) for name, default in DEFAULT_SETTINGS.items()}
+        self._settings = copy.deepcopy(settings)
+        # Реестр правил в каноническом виде: ключ кэша typography.get_scanner
+        self.rules_key = json.dumps(settings['typography_rules'], ensure_ascii=False, sort_keys=True)
+
+        raw = json.dumps({'short_words': sorted(self.short_words), 'settings': settings},
+                         ensure_ascii=False, sort_keys=True, default=str)
+        self.version = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:12]
+
+    def get(self, name):
+        """Значение настройки; списки и словари возвращаются копией, снимок не меняется."""
+        value = self._settings.get(name)
+        if isinstance(value, (list, dict)):
+            return copy.deepcopy(value)
+        return value
+
+
+# Текущий снимок и отметка файла (mtime, размер), по которой он прочитан.
+# Хранятся одним кортежем, чтобы читать их без блокировки
+_current = (None, None)
+_reload_lock = threading.Lock()
+
+def _config_stamp():
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def current_config():
+    """
+    Возвращает снимок настроек, перечитывая файл только если изменились его mtime или размер.
+
+    Проверка - один вызов os.stat, поэтому ее можно делать в начале каждого задания:
+    долгоживущие процессы (пакетная обработка, сервис, наблюдение за папками)
+    видят изменения app_config.json без перезапуска.
+    """
+    global _current
+    stamp = _config_stamp()
+    current_stamp, snapshot = _current
+    if snapshot is not None and stamp == current_stamp:
+        return snapshot
+
+    with _reload_lock:
+        current_stamp, snapshot = _current
+        if snapshot is not None and stamp == current_stamp:
+            return snapshot
+        try:
+            data = _read_config()
+        except Exception as e:
+            if snapshot is not None:
+                # Файл может быть записан не до конца: остаемся на прошлом снимке
+                # и перечитаем файл, когда он изменится снова
+                logging.warning(f"Не удалось перечитать {CONFIG_FILE}, используются прежние настройки: {e}")
+                _current = (stamp, snapshot)
+                return snapshot
+            data = {}
+        new_snapshot = ConfigSnapshot(data)
+        if snapshot is not None and new_snapshot.version != snapshot.version:
+            logging.info(f"Настройки перечитаны из {CONFIG_FILE}, версия {new_snapshot.version}")
+        _current = (stamp, new_snapshot)
+        return new_snapshot
+
+def reload_config():
+    """Принудительно перечитывает файл настроек (например, сразу после записи)."""
+    global _current
+    with _reload_lock:
+        _current = (None, None)
+    return current_config()
+
+def get_setting(name):
+    """Возвращает значение настройки из текущего снимка или стандартное значение."""
+    return current_config().get(name)
+
+def load_short_words():
+    """Возвращает изменяемую копию списка коротких слов из текущих настроек."""
+    return set(current_config().short_words)
 
 def save_short_words(words_set):
-    """Сохраняет список коротких слов в конфигурационный файл."""
+    """Сохраняет список коротких слов в конфигурационный файл, не затрагивая остальные настройки."""
+    temp_path = CONFIG_FILE + '.tmp'
     try:
-        config = {'short_words': list(words_set)}
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+        config = load_config()
+        config['short_words'] = list(words_set)
+        # Файл заменяется целиком, чтобы другие процессы не прочитали его наполовину записанным
+        with open(temp_path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, CONFIG_FILE)
+        reload_config()
         return True
     except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         return False
 
-# Загружаем список слов при импорте модуля
-SHORT_WORDS = load_short_words()
-
 # Настройки приложения
 APP_NAME = "Обработка висячих предлогов"
-VERSION = "3.0"
\ No newline at end of file
+VERSION = "3.1"
\ No newline at end of file
@@ -0,0 +1,64 @@
+import re
+
+# Неразрывный пробел
+NBSP = '\u00A0'
+
+# Обычный пробельный символ, который можно заменить на неразрывный.
+# Табуляции и переносы строк не трогаем: python-docx так представляет w:tab и w:br
+BREAKABLE_SPACE = re.compile(r'[^\S\t\n\r\v\f\u00A0]')
+
+# Месяцы в родительном падеже: "5 мая", но не "5 домов"
+MONTHS_GENITIVE = ('января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля', 'августа',
+                   'сентября', 'октября', 'ноября', 'декабря')
+
+_SPACE = r'[^\S\t\n\r\v\f]+'
+_DASH = r'[^\S\t\n\r\v\f]*[-–—][^\S\t\n\r\v\f]*'
+_DAY = r'(?:0?[1-9]|[12]\d|3[01])'
+_MONTH_NUMBER = r'(?:0?[1-9]|1[0-2])'
+_YEAR = r'\d{4}'
+_MONTH = '(?:' + '|'.join(MONTHS_GENITIVE) + ')'
+_ROMAN = r'(?-i:[IVXLC]+)'
+
+# "г.", "гг.", "год", "года", "году" ... после года
+_YEAR_WORD = rf'(?:{_SPACE}(?:гг?\.|год(?:а|у|ом|ах|ы)?(?!\w)))'
+# "в.", "вв.", "век", "века", "веке" ... после римского числа
+_CENTURY_WORD = rf'{_SPACE}(?:вв?\.|век(?:а|е|у|ом|ов|ам|ах|и)?(?!\w))'
+
+_NUMERIC = rf'(?:{_DAY}\.{_MONTH_NUMBER}\.{_YEAR}|{_YEAR}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01]))'
+_DAY_MONTH = rf'{_DAY}(?:{_DASH}{_DAY})?{_SPACE}{_MONTH}'
+
+# Все форматы в одном выражении, чтобы текст просматривался один раз:
+# 26.01.1990, 1990-01-26, 26 января 1990 г., 1–5 мая, 1 мая – 5 июня 2024 года,
+# 2024 г., 2023–2024 гг., XX век, XIX–XX вв.
+DATE_PATTERN = re.compile(
+    r'(?<![\w.])(?:'
+    rf'{_NUMERIC}(?:{_DASH}{_NUMERIC})?{_YEAR_WORD}?'
+    rf'|{_DAY_MONTH}(?:{_DASH}{_DAY_MONTH})?(?:{_SPACE}{_YEAR}{_YEAR_WORD}?)?'
+    rf'|{_YEAR}(?:{_DASH}{_YEAR})?{_YEAR_WORD}'
+    rf'|{_ROMAN}(?:{_DASH}{_ROMAN})?{_CENTURY_WORD}'
+    r')(?![\w-])',
+    re.IGNORECASE
+)
+
+
+def find_date_spaces(text):
+    """Возвращает позиции пробелов внутри дат."""
+    positions = set()
+    for match in DATE_PATTERN.finditer(text):
+        start, end = match.span()
+        positions.update(space.start() for space in BREAKABLE_SPACE.finditer(text, start, end))
+    return positions
+
+
+def _protect_date(match):
+    return BREAKABLE_SPACE.sub(NBSP, match.group())
+
+
+def normalize_dates(text):
+    """
+    Заменяет пробелы в датах строки на неразрывные одним проходом re.sub.
+
+    Для текста, не разбитого на runs; в документах правки раскладываются по runs
+    через find_date_spaces.
+    """
+    return DATE_PATTERN.sub(_protect_date, text)
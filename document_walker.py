@@ -0,0 +1,80 @@
+from lxml import etree
+
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.part import PartFactory, XmlPart
+from docx.oxml.ns import nsmap, qn
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+# Части пакета с текстом, связанные с основным документом
+TEXT_PART_RELTYPES = (RT.HEADER, RT.FOOTER, RT.FOOTNOTES, RT.ENDNOTES)
+
+W_P = qn('w:p')
+
+# Корневые элементы сносок - обычные элементы lxml, поэтому пространство имен задаем явно
+_COUNT_PARAGRAPHS = etree.XPath('count(.//w:p)', namespaces={'w': nsmap['w']})
+# Глубина параграфа и его runs: w:r на любой глубине, кроме runs вложенных параграфов (надписей)
+_PARAGRAPH_DEPTH = etree.XPath('count(ancestor-or-self::w:p)', namespaces={'w': nsmap['w']})
+_PARAGRAPH_RUNS = etree.XPath('.//w:r[count(ancestor::w:p) = $depth]', namespaces={'w': nsmap['w']})
+
+# python-docx загружает сноски как двоичные части без XML-дерева, и изменить их нельзя.
+# XmlPart разбирает их при открытии документа и сериализует обратно при сохранении.
+PartFactory.part_type_for.setdefault(CT.WML_FOOTNOTES, XmlPart)
+PartFactory.part_type_for.setdefault(CT.WML_ENDNOTES, XmlPart)
+
+
+def text_parts(doc):
+    """
+    Возвращает части документа с текстом: основной документ, все колонтитулы
+    (обычные, первой страницы, четных страниц) и сноски.
+
+    Каждая часть возвращается один раз, даже если на нее ссылаются несколько разделов.
+    """
+    parts = [doc.part]
+    seen = {id(doc.part)}
+    for rel in doc.part.rels.values():
+        if rel.is_external or rel.reltype not in TEXT_PART_RELTYPES:
+            continue
+        part = rel.target_part
+        if id(part) not in seen and isinstance(part, XmlPart):
+            seen.add(id(part))
+            parts.append(part)
+    return parts
+
+
+def count_paragraphs(doc):
+    """Быстро считает параграфы во всех текстовых частях (подсчет выполняется в lxml, без объектов python-docx)."""
+    return sum(int(_COUNT_PARAGRAPHS(part.element)) for part in text_parts(doc))
+
+
+def paragraph_runs(paragraph):
+    """
+    Возвращает все runs параграфа в порядке документа.
+
+    paragraph.runs видит только прямые дочерние w:r, а runs внутри гиперссылок,
+    вставок при рецензировании (w:ins), smartTag и полей пропускает. Здесь берутся
+    все w:r параграфа, кроме runs вложенных параграфов, - ровно те, тексты которых
+    склеивает потоковый движок (stream_engine.transform_part) и анализ.
+    """
+    element = paragraph._p
+    depth = _PARAGRAPH_DEPTH(element)
+    return [Run(run, paragraph) for run in _PARAGRAPH_RUNS(element, depth=depth)]
+
+
+def iter_paragraphs(doc):
+    """
+    Перебирает все параграфы документа ровно по одному разу за один проход по дереву.
+
+    В отличие от обхода doc.paragraphs / table.rows / row.cells:
+      - вложенные таблицы, надписи (текстовые поля) и элементы управления содержимым
+        не пропускаются;
+      - объединенные ячейки не повторяются: каждый w:tc встречается в дереве один раз;
+      - колонтитулы читаются из частей пакета, поэтому не создаются пустые колонтитулы
+        для разделов, которые наследуют колонтитул предыдущего раздела.
+
+    Yields:
+        Paragraph python-docx
+    """
+    for part in text_parts(doc):
+        for element in part.element.iter(W_P):
+            yield Paragraph(element, part)
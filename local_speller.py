@@ -0,0 +1,238 @@
+import re
+import logging
+import threading
+
+try:
+    from spellchecker import SpellChecker
+except ImportError:  # pragma: no cover - зависит от окружения
+    SpellChecker = None
+
+from speller import SpellBackend
+
+# Слова только из кириллицы; составные слова через дефис и слова с латиницей или цифрами пропускаются
+WORD_PATTERN = re.compile(r'(?<![\w-])[а-яёА-ЯЁ]+(?![\w-])')
+
+# Короткие слова чаще оказываются сокращениями, чем опечатками
+MIN_WORD_LENGTH = 4
+
+# Во сколько раз вариант замены должен быть частотнее слова (с учетом других форм того же слова)
+FREQUENCY_RATIO = 10
+
+# Окончания, которые отбрасываются при сравнении основ: в частотном словаре часто есть
+# только одна форма слова, а остальные формы (основании, действующим) не являются опечатками
+ENDINGS = sorted({
+    'а', 'я', 'о', 'е', 'ё', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+    'ам', 'ям', 'ом', 'ем', 'ой', 'ей', 'ою', 'ею', 'ах', 'ях', 'ами', 'ями', 'ов', 'ев', 'ие', 'ия', 'ии', 'ью',
+    'ый', 'ий', 'ая', 'яя', 'ое', 'ее', 'ые', 'ого', 'его', 'ому', 'ему', 'ым', 'им', 'ых', 'их', 'ую', 'юю',
+    'ать', 'ять', 'еть', 'ить', 'уть', 'ти', 'ешь', 'ет', 'ете', 'ут', 'ют', 'ишь', 'ит', 'ите', 'ат', 'ят',
+    'ает', 'яет', 'ают', 'яют', 'ует', 'уют', 'ал', 'ала', 'али', 'ало', 'ил', 'ила', 'или', 'ило',
+}, key=len, reverse=True)
+
+# Минимальная длина основы после отбрасывания окончания
+MIN_STEM_LENGTH = 3
+
+
+def word_stem(word):
+    """Грубая основа слова: без возвратной частицы и самого длинного подходящего окончания."""
+    if word.endswith(('ся', 'сь')) and len(word) - 2 > MIN_STEM_LENGTH:
+        word = word[:-2]
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def _deletes(word, distance):
+    """Возвращает все варианты слова, полученные удалением не более distance букв."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {item[:i] + item[i + 1:] for item in frontier for i in range(len(item))}
+        variants |= frontier
+    return variants
+
+
+def _edit_distance(first, second, limit):
+    """
+    Расстояние Дамерау-Левенштейна (с перестановкой соседних букв).
+
+    Возвращает limit + 1, если расстояние заведомо больше limit.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i in range(1, len(first) + 1):
+        current = [i] + [0] * len(second)
+        for j in range(1, len(second) + 1):
+            cost = 0 if first[i - 1] == second[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and first[i - 1] == second[j - 2] and first[i - 2] == second[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class LocalSpeller(SpellBackend):
+    """
+    Офлайн-проверка орфографии по частотному словарю pyspellchecker.
+
+    При создании строится индекс удалений (symmetric delete): каждое слово словаря
+    записывается под всеми вариантами с удаленными буквами. Поиск кандидатов для
+    незнакомого слова сводится к нескольким обращениям к словарю вместо перебора
+    всех правок, а результат для каждого слова запоминается.
+
+    Встроенный словарь pyspellchecker для русского языка мал и почти не содержит
+    словоформ, поэтому без собственного частотного словаря (local_spell_dictionary)
+    движок работает только на отчет: незнакомые слова считаются, но не исправляются.
+    Со словарем слово заменяется, только если вариант намного частотнее самого слова
+    и всех известных форм с той же основой и не является другой формой того же слова;
+    слова с заглавной буквы не проверяются.
+    """
+
+    name = 'local'
+    options = 'local'
+
+    def __init__(self, dictionary_path=None, distance=1, language='ru'):
+        """
+        Args:
+            dictionary_path: Дополнительный словарь: .json/.json.gz в формате pyspellchecker
+                             или обычный текст, из которого считаются частоты слов
+            distance: Максимальное расстояние правки
+            language: Язык встроенного словаря pyspellchecker
+        """
+        if SpellChecker is None:
+            raise RuntimeError("Для локальной проверки орфографии установите пакет pyspellchecker")
+
+        self.lang = language
+        self.distance = distance
+        self.report_only = not dictionary_path
+        self.checked_words = 0
+        self.corrected_words = 0
+        self.unknown_words = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+        # check_texts вызывается из потоков SpellcheckPipeline
+        self._counter_lock = threading.Lock()
+
+        checker = SpellChecker(language=language, distance=distance)
+        if dictionary_path:
+            if dictionary_path.endswith(('.json', '.json.gz')):
+                checker.word_frequency.load_dictionary(dictionary_path)
+            else:
+                checker.word_frequency.load_text_file(dictionary_path)
+        self.frequencies = dict(checker.word_frequency.dictionary)
+
+        self.index = {}
+        # Наибольшая частота среди слов словаря с той же основой
+        self.stem_frequencies = {}
+        for word, frequency in self.frequencies.items():
+            for variant in _deletes(word, distance):
+                self.index.setdefault(variant, []).append(word)
+            stem = word_stem(word)
+            self.stem_frequencies[stem] = max(self.stem_frequencies.get(stem, 0), frequency)
+        logging.info(f"Локальный словарь орфографии: {len(self.frequencies)} слов, "
+                     f"{len(self.index)} записей индекса")
+        if self.report_only:
+            logging.warning("Локальная проверка орфографии без частотного словаря (local_spell_dictionary) "
+                            "только считает незнакомые слова и не исправляет их")
+
+    def is_known(self, word):
+        """Проверяет, есть ли слово в словаре (с учетом написания через "е" вместо "ё")."""
+        return word in self.frequencies or word.replace('ё', 'е') in self.frequencies
+
+    def suggest(self, word):
+        """
+        Возвращает варианты замены для слова в нижнем регистре.
+
+        Returns:
+            Список слов, сначала ближайшие и самые частые; пустой список, если слово
+            известно или похожих слов нет
+        """
+        if word in self._memo:
+            return self._memo[word]
+
+        suggestions = []
+        if not self.is_known(word):
+            candidates = {}
+            for variant in _deletes(word, self.distance):
+                for candidate in self.index.get(variant, ()):
+                    if candidate not in candidates:
+                        candidates[candidate] = _edit_distance(word, candidate, self.distance)
+            ranked = sorted(
+                (distance, -self.frequencies[candidate], candidate)
+                for candidate, distance in candidates.items()
+                if distance <= self.distance and self._is_confident(word, candidate)
+            )
+            suggestions = [candidate for _, _, candidate in ranked[:5]]
+
+        with self._lock:
+            self._memo[word] = suggestions
+        return suggestions
+
+    def _is_confident(self, word, candidate):
+        """
+        Проверяет, что замену word на candidate можно сделать автоматически.
+
+        Слово с той же основой, что и у варианта, но с другим окончанием - другая форма
+        того же слова (основании - основание), а не опечатка. Если основа слова известна
+        по другому слову словаря (вступает - вступить), замена на слово с другой основой
+        (выступает) допускается, только если вариант намного частотнее всех слов с этой
+        основой; незнакомая основа (обязуеться) сравнивается только с порогом частоты.
+        """
+        stem = word_stem(word)
+        if stem == word_stem(candidate) and stem != word:
+            return False
+        word_frequency = max(self.frequencies.get(word, 0), self.stem_frequencies.get(stem, 0))
+        return self.frequencies[candidate] >= FREQUENCY_RATIO * max(word_frequency, 1)
+
+    def check_words(self, text):
+        """Возвращает исправления для одного текста в формате Яндекс.Спеллера."""
+        corrections = []
+        checked = unknown = 0
+        for match in WORD_PATTERN.finditer(text):
+            word = match.group()
+            # Аббревиатуры, короткие слова и слова с заглавной буквы не проверяем:
+            # имен собственных (Пушкин) в словаре нет, и они превратились бы в похожие слова (пушки)
+            if len(word) < MIN_WORD_LENGTH or word[0].isupper():
+                continue
+
+            suggestions = self.suggest(word.lower())
+            checked += 1
+            if not suggestions:
+                continue
+            if self.report_only:
+                unknown += 1
+                logging.debug(f"Незнакомое слово (без исправления): {word} -> {suggestions[0]}")
+                continue
+
+            corrections.append({
+                'code': 1,
+                'pos': match.start(),
+                'row': 0,
+                'col': match.start(),
+                'len': len(word),
+                'word': word,
+                's': suggestions
+            })
+
+        # Счетчики обновляются один раз на текст
+        with self._counter_lock:
+            self.checked_words += checked
+            self.corrected_words += len(corrections)
+            self.unknown_words += unknown
+        return corrections
+
+    def try_check_texts(self, texts):
+        """Проверяет орфографию списка текстов без обращения к сети."""
+        return [self.check_words(text) if text.strip() else [] for text in texts]
+
+    def stats(self):
+        """Возвращает счетчики проверенных, исправленных и незнакомых (в режиме отчета) слов."""
+        with self._counter_lock:
+            return {'requests': 0, 'checked_words': self.checked_words, 'corrected_words': self.corrected_words,
+                    'unknown_words': self.unknown_words}
@@ -1,206 +1,398 @@
-import re
+import io
 import os
-import requests
-import logging
+import sys
+import shutil
 from docx import Document
 from contextlib import contextmanager
-from config import SHORT_WORDS
-from Date_Spellcheck_Logic import process_paragraph_spellcheck
+from config import current_config
+from document_walker import count_paragraphs, iter_paragraphs, paragraph_runs
+from metrics import DocumentMetrics
+from typography import get_scanner
+from package_writer import save_document
+from run_coalescer import coalesce_document
+from stream_engine import process_package
+from transform import RunTextMap, find_preposition_spaces, fix_text, transform_texts
+from Date_Spellcheck_Logic import fix_dates_in_paragraph, process_paragraph_spellcheck
+from spell_pipeline import SpellcheckPipeline
+
+__all__ = [
+    'copy_document_bytes', 'open_input', 'copy_source', 'document_session', 'safe_document_handling',
+    'find_hanging_prepositions', 'process_paragraph',
+    'fix_hanging_prepositions_stream', 'fix_hanging_prepositions', 'fix_document_bytes',
+    # Реэкспорт для старых вызовов и для README: from logic import fix_text
+    'fix_text', 'fix_dates_in_paragraph', 'yandex_spellcheck',
+]
+
+
+def _clone_file(input_path, output_path):
+    """Копирует файл: на Linux сначала reflink (FICLONE), иначе обычным копированием."""
+    if sys.platform.startswith('linux'):
+        try:
+            import fcntl
+            with open(input_path, 'rb') as src, open(output_path, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), 0x40049409, src.fileno())  # FICLONE
+            return
+        except OSError:
+            # Файловая система не поддерживает reflink
+            pass
+
+    shutil.copyfile(input_path, output_path)
 
 
-def yandex_spellcheck(text: str):
+def copy_document_bytes(input_path, output_path):
     """
-    Проверка орфографии с помощью Яндекс.Спеллера
+    Копирует исходный файл без изменений.
+
+    На Linux сначала пробует reflink (FICLONE), при котором данные не копируются
+    физически; иначе используется обычное копирование файла.
+
+    Если результат - тот же файл (в том числе через символическую или жесткую ссылку),
+    ничего не делается. Копия пишется во временный файл рядом с результатом и
+    подменяет его через os.replace, поэтому существующий результат не обрезается.
     """
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        return
+
+    temp_path = os.fspath(output_path) + '.tmp'
     try:
-        response = requests.post(
-            'https://yandex.speller.yandex.net/v1/checkText',
-            data={
-                'text': text,
-                'format': 'plain',
-                'lang': 'ru',
-                'options': 511  # Максимальный уровень проверки
-            }
-        )
-        return response.json()
-    except Exception as e:
-        logging.error(f"Ошибка при проверке орфографии: {e}")
-        return []
+        _clone_file(input_path, temp_path)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _is_path(target):
+    """Путь к файлу, а не файловый объект."""
+    return isinstance(target, (str, os.PathLike))
 
 
 @contextmanager
-def safe_document_handling(input_path, output_path):
-    """Контекстный менеджер для безопасной работы с документом."""
-    # Проверка существования файла
-    if not os.path.exists(input_path):
-        raise FileNotFoundError(f"Файл {input_path} не найден.")
+def open_input(input_path):
+    """
+    Открывает исходный документ один раз на всю обработку.
+
+    Args:
+        input_path: Путь, файловый объект или bytes
+
+    Yields:
+        Файловый объект, открытый на чтение в двоичном режиме
+    """
+    if isinstance(input_path, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(input_path)
+        return
+    if not _is_path(input_path):
+        yield input_path
+        return
 
-    # Проверка, открыт ли файл
     try:
-        with open(input_path, 'rb') as _:
-            pass
+        source = open(input_path, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Файл {input_path} не найден.")
     except PermissionError:
         raise PermissionError(f"Файл {input_path} уже открыт в другой программе.")
+    with source:
+        yield source
 
-    try:
-        doc = Document(input_path)
-        yield doc
-        # Сохраняем файл только если все операции прошли успешно
-        doc.save(output_path)
-    except Exception as e:
-        # Перебрасываем исключение наверх для обработки в UI
-        raise e
 
+def copy_source(source, input_path, output_path):
+    """Записывает исходный документ в результат без изменений."""
+    if _is_path(input_path) and _is_path(output_path):
+        copy_document_bytes(input_path, output_path)
+        return
+    source.seek(0)
+    if _is_path(output_path):
+        with open(output_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+    else:
+        shutil.copyfileobj(source, output_path)
 
-def fix_dates_in_paragraph(paragraph):
-    """
-    Заменяет пробелы в датах на неразрывные пробелы.
-    Поддерживает форматы: 26.01.1990 и 26 января 1990
+
+@contextmanager
+def document_session(input_path, output_path, metrics=None, always_save=False):
     """
-    # Регулярные выражения для различных форматов даты
-    date_patterns = [
-        r'\d{1,2}\.\d{1,2}\.\d{4}',  # дд.мм.гггг
-        r'\d{1,2}\s+[а-яА-Я]+\s+\d{4}'  # дд месяц гггг
-    ]
+    Открывает документ на обработку и сохраняет результат при выходе без ошибок.
+
+    Возвращает документ и словарь результата. Обработчик увеличивает result['edits'];
+    если правок не было, документ не пересохраняется, а исходные байты копируются как есть.
+    Время загрузки и сохранения попадает в metrics, итоговые метрики - в result['metrics'].
+
+    Исходный документ (путь, файловый объект или bytes) открывается один раз: из того же
+    потока python-docx читает документ, а при сохранении копируются медиа. Результат
+    пишется в файл или в файловый объект.
 
-    for run in paragraph.runs:
-        text = run.text
-        for pattern in date_patterns:
-            # Находим все даты в тексте
-            dates = re.findall(pattern, text)
-            for date in dates:
-                # Заменяем пробелы на неразрывные пробелы
-                text = text.replace(date, date.replace(' ', '\u00A0'))
-        run.text = text
+    При always_save документ пересохраняется независимо от result['edits'].
+    """
+    if metrics is None:
+        metrics = DocumentMetrics()
+
+    with open_input(input_path) as source:
+        with metrics.stage('load'):
+            doc = Document(source)
+        result = {'edits': 0, 'status': None}
+        yield doc, result
+        # Сохраняем файл только если все операции прошли успешно
+        with metrics.stage('save'):
+            if result['edits'] or always_save:
+                # Пересобираются только текстовые части, медиа копируются без перепаковки
+                save_document(doc, source, output_path)
+                result['status'] = 'changed'
+            else:
+                copy_source(source, input_path, output_path)
+                result['status'] = 'unchanged'
+        result['metrics'] = metrics.as_dict()
 
 
-def find_hanging_prepositions(paragraph):
+@contextmanager
+def safe_document_handling(input_path, output_path):
     """
-    Улучшенная функция для нахождения висячих предлогов, с особым вниманием к коротким предлогам
+    Контекстный менеджер для безопасной работы с документом.
+
+    Возвращает только документ; вызывающий код не сообщает о правках, поэтому
+    документ сохраняется всегда. Словарь результата и метрики дает document_session.
     """
-    replacements = []
+    with document_session(input_path, output_path, always_save=True) as (doc, _):
+        yield doc
 
-    # Сначала анализируем каждый run отдельно
-    for i, run in enumerate(paragraph.runs):
-        text = run.text
 
-        # Используем более строгий паттерн для предлогов
-        # Добавляем проверку границ слов \b с обеих сторон для коротких предлогов
-        pattern = r'(?<!\w)(' + '|'.join(re.escape(word) for word in SHORT_WORDS) + r')(?=\s)'
+def yandex_spellcheck(text):
+    """Оставлено для совместимости со старыми вызовами: проверка текста общим спеллером."""
+    from speller import yandex_spellcheck as check
+    return check(text)
 
-        for match in re.finditer(pattern, text, re.IGNORECASE):
-            start, end = match.span()
-            # Проверяем, что после предлога идет пробел
-            if end < len(text) and text[end].isspace():
-                replacements.append((i, start, end + 1))  # +1 чтобы захватить пробел
 
-    # Ищем предлоги на границах runs с улучшенной логикой
-    for i in range(len(paragraph.runs) - 1):
-        run_text = paragraph.runs[i].text
-        next_run_text = paragraph.runs[i + 1].text
+def _paragraph_texts(paragraph):
+    """Возвращает runs параграфа и их тексты (proxy-объекты python-docx создаются один раз)."""
+    runs = paragraph_runs(paragraph)
+    return runs, [run.text for run in runs]
 
-        if not run_text or not next_run_text:
-            continue
 
-        # Проверяем, заканчивается ли run на предлог
-        last_word_match = re.search(r'(?<!\w)(' + '|'.join(re.escape(word) for word in SHORT_WORDS) + r')$', run_text,
-                                    re.IGNORECASE)
+def _write_back(runs, changed):
+    """Записывает тексты только в те runs, которые действительно изменились."""
+    for index, text in changed.items():
+        runs[index].text = text
 
-        if last_word_match:
-            # Если следующий run начинается с пробела или невидимого символа форматирования
-            if next_run_text and (next_run_text[0].isspace() or ord(next_run_text[0]) < 32):
-                replacements.append((i + 1, 0, 1, 'boundary'))
 
-    return replacements
+def find_hanging_prepositions(paragraph, matcher=None):
+    """
+    Находит висячие предлоги в параграфе, включая предлоги на границах runs
 
+    Обработка применяет то же правило через TypographyScanner (process_paragraph);
+    функция нужна, чтобы узнать позиции без изменения документа.
 
-def process_paragraph(paragraph, with_spellcheck=False):
+    Args:
+        paragraph: Параграф документа
+        matcher: Скомпилированный PrepositionMatcher (по умолчанию для short_words из текущих настроек)
+
+    Returns:
+        Список пар (индекс run, позиция в run) пробелов для замены на неразрывные
+    """
+    _, texts = _paragraph_texts(paragraph)
+    run_map = RunTextMap(texts)
+    positions = sorted(find_preposition_spaces(run_map.text, matcher))
+    return [run_map.locate(pos) for pos in positions]
+
+
+def process_paragraph(paragraph, with_spellcheck=False, scanner=None, metrics=None):
     """
     Обрабатывает параграф, сохраняя форматирование
 
+    Текст всех runs склеивается один раз, все правила типографики применяются
+    к склеенному тексту за один проход, а обратно записываются только измененные runs.
+
     Args:
         paragraph: Параграф документа
         with_spellcheck: Флаг для включения проверки орфографии
+        scanner: Скомпилированный TypographyScanner, общий для всего документа
+        metrics: DocumentMetrics для подсчета runs и срабатываний правил
+
+    Returns:
+        Количество внесенных правок
     """
-    if not paragraph.runs:
-        return
+    runs, texts = _paragraph_texts(paragraph)
+    if metrics is not None:
+        metrics.count('runs', len(runs))
+    if not runs:
+        return 0
 
-    # Сначала фиксируем даты
-    fix_dates_in_paragraph(paragraph)
-
-    # Затем работаем с предлогами
-    replacements = find_hanging_prepositions(paragraph)
-
-    # Применяем замены с конца, чтобы не сбивать индексы
-    replacements.sort(reverse=True, key=lambda x: (x[0], x[1]))
-
-    for rep in replacements:
-        if len(rep) == 4 and rep[3] == 'boundary':  # Замена на границе runs
-            i, start, end = rep[0], rep[1], rep[2]
-            if i < len(paragraph.runs) and paragraph.runs[i].text:
-                # Заменяем пробел на неразрывный в начале следующего run
-                run_text = paragraph.runs[i].text
-                if run_text[0].isspace():
-                    paragraph.runs[i].text = "\u00A0" + run_text[1:]
-                else:  # Обработка невидимых символов
-                    paragraph.runs[i].text = "\u00A0" + run_text
-        else:
-            i, start, end = rep[0], rep[1], rep[2]
-            if i < len(paragraph.runs):
-                run_text = paragraph.runs[i].text
-                # Заменяем пробел на неразрывный внутри run
-                paragraph.runs[i].text = run_text[:start] + run_text[start:end - 1] + "\u00A0" + run_text[end:]
+    changed, edits = transform_texts(texts, scanner, metrics.rules if metrics is not None else None)
+    _write_back(runs, changed)
 
     # Проверка орфографии должна быть последним шагом
     if with_spellcheck:
-        process_paragraph_spellcheck(paragraph)
+        edits += process_paragraph_spellcheck(paragraph)
+
+    return edits
+
+
+def _progress_reporter(progress_callback, paragraph_progress):
+    """
+    Объединяет обратные вызовы прогресса в одну функцию (доля, обработано параграфов).
+
+    progress_callback получает только долю 0..1, как до появления счетчика параграфов;
+    paragraph_progress - долю и количество обработанных параграфов.
+    """
+    if progress_callback is None and paragraph_progress is None:
+        return None
+
+    def report(fraction, paragraphs):
+        if progress_callback:
+            progress_callback(fraction)
+        if paragraph_progress:
+            paragraph_progress(fraction, paragraphs)
+    return report
+
+
+def fix_hanging_prepositions_stream(input_path, output_path, progress_callback=None, scanner=None,
+                                    paragraph_progress=None):
+    """
+    Обрабатывает документ потоковым движком (stream_engine) без загрузки в python-docx.
+
+    Обратные вызовы прогресса - как у fix_hanging_prepositions.
 
+    Результат сначала пишется во временный файл рядом с output_path (или в память,
+    если output_path - файловый объект); если правок не было, вместо него
+    копируются исходные байты.
+    """
+    if scanner is None:
+        scanner = get_scanner()
+
+    processed = [0]
+    metrics = DocumentMetrics()
+    progress = _progress_reporter(progress_callback, paragraph_progress)
+
+    def report(fraction, paragraphs):
+        processed[0] = paragraphs
+        if progress:
+            progress(fraction, paragraphs)
 
-def fix_hanging_prepositions(input_path, output_path, progress_callback=None, with_spellcheck=False):
+    temp_path = os.fspath(output_path) + '.tmp' if _is_path(output_path) else io.BytesIO()
+    try:
+        with open_input(input_path) as source:
+            with metrics.stage('stream'):
+                edits = process_package(source, temp_path, scanner, report, metrics.rules)
+            metrics.count('paragraphs', processed[0])
+            metrics.count('edits', edits)
+
+            with metrics.stage('save'):
+                if not edits:
+                    copy_source(source, input_path, output_path)
+                elif _is_path(output_path):
+                    os.replace(temp_path, output_path)
+                else:
+                    output_path.write(temp_path.getvalue())
+        return {'edits': edits, 'paragraphs': processed[0], 'status': 'changed' if edits else 'unchanged',
+                'metrics': metrics.as_dict()}
+    finally:
+        if _is_path(temp_path) and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def fix_hanging_prepositions(input_path, output_path, progress_callback=None, with_spellcheck=False,
+                             engine='docx', short_words=None, coalesce_runs=None, paragraph_progress=None):
     """
     Основная функция обработки документа.
 
     Args:
-        input_path: Путь к исходному файлу
-        output_path: Путь для сохранения обработанного файла
-        progress_callback: Функция обратного вызова для обновления прогресса
-        with_spellcheck: Флаг для включения проверки орфографии
+        input_path: Путь к исходному файлу (или файловый объект, или bytes)
+        output_path: Путь для сохранения обработанного файла (или файловый объект)
+        progress_callback: Функция (доля 0..1), вызывается после каждого параграфа
+        with_spellcheck: Флаг для включения проверки орфографии (счетчики запросов и кэша
+                         спеллера попадают в result['spellcheck'])
+        engine: 'docx' - обработка через python-docx,
+                'stream' - потоковая обработка XML для очень больших документов (без орфографии)
+        short_words: Набор предлогов и союзов (по умолчанию short_words из снимка настроек)
+        coalesce_runs: Перед правилами объединить соседние runs с одинаковым форматированием
+                       (только движок docx; по умолчанию настройка coalesce_runs).
+                       Само по себе объединение не считается правкой: документ без правок
+                       копируется как есть
+        paragraph_progress: Функция (доля 0..1, обработано параграфов), вызывается после
+                            каждого параграфа; из нее BatchExecutor считает скорость и оставшееся
+                            время, прореживать вызовы должен получатель (ProgressReporter)
+
+    Returns:
+        Словарь с количеством правок и параграфов, статусом 'changed' или 'unchanged',
+        метриками этапов (result['metrics']) и версией настроек (result['config_version'])
     """
-    with safe_document_handling(input_path, output_path) as doc:
-        total_elements = (
-                len(doc.paragraphs) +
-                sum(len(row.cells) for table in doc.tables for row in table.rows) +
-                sum(len(section.header.paragraphs) + len(section.footer.paragraphs) for section in doc.sections)
-        )
-
+    # Снимок настроек берется один раз на документ: правка app_config.json
+    # во время обработки не меняет правила посреди документа
+    config = current_config()
+    # Правила типографики компилируются в один паттерн, общий для всего документа
+    scanner = get_scanner(short_words, config=config)
+
+    if engine == 'stream':
+        if with_spellcheck:
+            raise ValueError("Потоковый движок не поддерживает проверку орфографии")
+        result = fix_hanging_prepositions_stream(input_path, output_path, progress_callback, scanner,
+                                                 paragraph_progress)
+        result['config_version'] = config.version
+        return result
+    if engine != 'docx':
+        raise ValueError(f"Неизвестный движок обработки: {engine}")
+
+    if coalesce_runs is None:
+        coalesce_runs = config.get('coalesce_runs')
+
+    speller = None
+    if with_spellcheck:
+        # Импорт здесь: speller загружает requests, без проверки орфографии он не нужен
+        from speller import get_speller
+        speller = get_speller()
+    before = speller.stats() if speller else None
+
+    metrics = DocumentMetrics()
+    progress = _progress_reporter(progress_callback, paragraph_progress)
+
+    with document_session(input_path, output_path, metrics) as (doc, result), \
+            SpellcheckPipeline(speller) as spell_pipeline:
+        if coalesce_runs:
+            with metrics.stage('coalesce'):
+                runs_before, runs_after = coalesce_document(doc)
+            metrics.count('runs_merged', runs_before - runs_after)
+
+        # Счетчик для прогресса считается в lxml, без обхода объектной модели
+        total_elements = count_paragraphs(doc) or 1
         processed = 0
 
-        # Обрабатываем обычные абзацы
-        for paragraph in doc.paragraphs:
-            process_paragraph(paragraph, with_spellcheck)
-            processed += 1
-            if progress_callback:
-                progress_callback(processed / total_elements)
-
-        # Обрабатываем текст в таблицах
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        process_paragraph(paragraph, with_spellcheck)
-                        processed += 1
-                        if progress_callback:
-                            progress_callback(processed / total_elements)
-
-        # Обрабатываем колонтитулы
-        for section in doc.sections:
-            for paragraph in section.header.paragraphs:
-                process_paragraph(paragraph, with_spellcheck)
+        # Один проход по всем параграфам: тело документа с вложенными таблицами
+        # и надписями, колонтитулы и сноски. Пакеты на проверку орфографии
+        # уходят в сеть по ходу локальной обработки
+        with metrics.stage('rules'):
+            for paragraph in iter_paragraphs(doc):
+                result['edits'] += process_paragraph(paragraph, scanner=scanner, metrics=metrics)
+                spell_pipeline.add(paragraph)
                 processed += 1
-                if progress_callback:
-                    progress_callback(processed / total_elements)
-            for paragraph in section.footer.paragraphs:
-                process_paragraph(paragraph, with_spellcheck)
-                processed += 1
-                if progress_callback:
-                    progress_callback(processed / total_elements)
\ No newline at end of file
+                if progress:
+                    progress(processed / total_elements, processed)
+
+        result['paragraphs'] = processed
+
+        # Исправления орфографии применяются после ответов сервиса
+        if speller:
+            with metrics.stage('spellcheck'):
+                result['edits'] += spell_pipeline.finish()
+            result['spellcheck'] = {key: value - before.get(key, 0) for key, value in speller.stats().items()}
+            metrics.count('http_requests', result['spellcheck'].get('requests', 0))
+
+        metrics.count('paragraphs', processed)
+        metrics.count('edits', result['edits'])
+
+    result['config_version'] = config.version
+    return result
+
+def fix_document_bytes(data, progress_callback=None, with_spellcheck=False, engine='docx',
+                       short_words=None, coalesce_runs=None, paragraph_progress=None):
+    """
+    Обрабатывает документ целиком в памяти, не обращаясь к диску.
+
+    Args:
+        data: Содержимое .docx (bytes) или файловый объект, открытый на чтение
+        Остальные аргументы - как у fix_hanging_prepositions
+
+    Returns:
+        Кортеж (байты обработанного документа, словарь результата)
+    """
+    output = io.BytesIO()
+    result = fix_hanging_prepositions(data, output, progress_callback, with_spellcheck,
+                                      engine, short_words, coalesce_runs, paragraph_progress)
+    return output.getvalue(), result
@@ -1,8 +1,11 @@
 from ui import run_ui
 from logger import setup_logging, log_separator  # Импортируем функции логирования
 import logging
+import multiprocessing
 
 if __name__ == "__main__":
+    # Нужно для процессов пакетной обработки в собранном PyInstaller exe
+    multiprocessing.freeze_support()
 
     setup_logging()
 
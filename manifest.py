@@ -0,0 +1,219 @@
+import os
+import json
+import hashlib
+import logging
+
+from config import VERSION, current_config
+
+# Имя файла манифеста в каталоге результатов
+MANIFEST_NAME = ".docx_manifest.json"
+
+# Версия формата манифеста; при несовпадении манифест считается пустым
+MANIFEST_FORMAT = 1
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """Считает SHA-256 содержимого файла, читая его блоками."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_state(path):
+    """Размер, время изменения и хэш файла; stat берется до чтения содержимого."""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+
+
+def settings_fingerprint(options, config=None):
+    """
+    Отпечаток настроек, от которых зависит результат обработки.
+
+    Args:
+        options: Параметры fix_hanging_prepositions (with_spellcheck, engine, short_words)
+        config: Снимок настроек (по умолчанию текущий)
+    """
+    if config is None:
+        config = current_config()
+    short_words = options.get('short_words')
+    if short_words is None:
+        short_words = config.short_words
+    coalesce_runs = options.get('coalesce_runs')
+    if coalesce_runs is None:
+        coalesce_runs = config.get('coalesce_runs')
+
+    settings = {
+        'version': VERSION,
+        'short_words': sorted(short_words),
+        'with_spellcheck': bool(options.get('with_spellcheck')),
+        'engine': options.get('engine', 'docx'),
+        'coalesce_runs': bool(coalesce_runs),
+        'typography_rules': json.loads(config.rules_key),
+    }
+    if settings['with_spellcheck']:
+        settings['spell_backend'] = config.get('spell_backend')
+
+    raw = json.dumps(settings, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """
+    Манифест каталога результатов: размер, время изменения и хэш каждого
+    обработанного исходного файла и отпечаток настроек, с которыми он обработан.
+
+    Повторный запуск пропускает файлы, которые не изменились и результат которых
+    на месте. Если размер и время изменения совпадают, файл даже не читается.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self.dirty = False
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == MANIFEST_FORMAT:
+                self.entries = data.get('files', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Манифест {self.path} не прочитан, файлы будут обработаны заново: {e}")
+
+    @staticmethod
+    def _key(input_path):
+        return os.path.abspath(input_path)
+
+    def is_current(self, input_path, output_path, fingerprint):
+        """Проверяет, что файл уже обработан с теми же настройками и с тех пор не менялся."""
+        entry = self.entries.get(self._key(input_path))
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return False
+        if entry.get('output') != os.path.abspath(output_path) or not os.path.exists(output_path):
+            return False
+
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        # Файл трогали (копирование, синхронизация), но содержимое могло не измениться
+        if file_hash(input_path) != entry['sha256']:
+            return False
+        entry['mtime_ns'] = stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def record(self, input_path, output_path, fingerprint, result, state):
+        """
+        Запоминает успешно обработанный файл.
+
+        Args:
+            state: Состояние исходного файла (file_state), снятое до обработки: если файл
+                   изменили во время обработки, следующий запуск увидит расхождение
+        """
+        self.entries[self._key(input_path)] = {
+            'output': os.path.abspath(output_path),
+            'size': state['size'],
+            'mtime_ns': state['mtime_ns'],
+            'sha256': state['sha256'],
+            'fingerprint': fingerprint,
+            'status': result.get('status'),
+            'edits': result.get('edits', 0),
+        }
+        self.dirty = True
+
+    def forget(self, input_path):
+        """Удаляет запись о файле, например после ошибки обработки."""
+        if self.entries.pop(self._key(input_path), None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """Атомарно записывает манифест, если в нем есть изменения."""
+        if not self.dirty:
+            return
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': MANIFEST_FORMAT, 'files': self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
+class ManifestSet:
+    """
+    Манифесты всех каталогов результатов одного пакета (по одному на каталог).
+
+    Отпечаток настроек пересчитывается при смене версии снимка настроек, поэтому
+    после правки app_config.json долгоживущий процесс обработает файлы заново.
+    Состояние исходного файла и отпечаток запоминаются в split, до обработки,
+    и в record записываются именно они.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self._fingerprint = (None, None)
+        self._manifests = {}
+        self._dispatched = {}  # путь -> (состояние файла или None, отпечаток настроек)
+
+    @property
+    def fingerprint(self):
+        config = current_config()
+        version, fingerprint = self._fingerprint
+        if version != config.version:
+            fingerprint = settings_fingerprint(self.options, config)
+            self._fingerprint = (config.version, fingerprint)
+        return fingerprint
+
+    def for_output(self, output_path):
+        """Возвращает манифест каталога, в который пишется output_path."""
+        directory = os.path.dirname(os.path.abspath(output_path))
+        manifest = self._manifests.get(directory)
+        if manifest is None:
+            manifest = self._manifests[directory] = Manifest(directory)
+        return manifest
+
+    def split(self, jobs):
+        """
+        Делит задания на требующие обработки и пропускаемые.
+
+        Returns:
+            Кортеж (список заданий для обработки, список пропущенных заданий)
+        """
+        pending, skipped = [], []
+        fingerprint = self.fingerprint
+        for input_path, output_path in jobs:
+            if self.for_output(output_path).is_current(input_path, output_path, fingerprint):
+                skipped.append((input_path, output_path))
+                continue
+            try:
+                state = file_state(input_path)
+            except OSError:
+                # Файл не читается: обработка завершится ошибкой, запоминать нечего
+                state = None
+            self._dispatched[os.path.abspath(input_path)] = (state, fingerprint)
+            pending.append((input_path, output_path))
+        return pending, skipped
+
+    def record(self, input_path, output_path, result, error):
+        """Обновляет манифест по результату обработки файла, отправленного через split."""
+        manifest = self.for_output(output_path)
+        state, fingerprint = self._dispatched.pop(os.path.abspath(input_path), (None, None))
+        if error is None and state is not None:
+            manifest.record(input_path, output_path, fingerprint, result, state)
+        else:
+            manifest.forget(input_path)
+
+    def save(self):
+        """Сохраняет все измененные манифесты."""
+        for manifest in self._manifests.values():
+            try:
+                manifest.save()
+            except OSError as e:
+                logging.warning(f"Не удалось сохранить манифест {manifest.path}: {e}")
@@ -0,0 +1,84 @@
+import re
+from functools import lru_cache
+
+from config import current_config
+
+
+def _trie_pattern(words):
+    """
+    Строит регулярное выражение из списка слов, факторизованное по общим префиксам.
+
+    Например, {"с", "со", "о", "об"} превращается в "об?|со?", поэтому движку
+    не приходится перебирать альтернативы и откатываться назад.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # Маркер конца слова
+
+    def build(node):
+        optional = '' in node
+        branches = []
+        for char in sorted(ch for ch in node if ch):
+            branches.append(re.escape(char) + build(node[char]))
+
+        if not branches:
+            return ''
+
+        # Одну ветку без развилки оставляем без группы: "между" вместо "(?:м(?:е...))"
+        if len(branches) == 1 and (not optional or len(branches[0]) == 1):
+            body = branches[0]
+        else:
+            body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if optional else body
+
+    return build(trie)
+
+
+class PrepositionMatcher:
+    """
+    Скомпилированный поиск коротких слов (предлогов и союзов).
+
+    Создается один раз на версию списка слов (get_matcher). Обработка документов
+    использует факторизованную альтернативу alternation: из нее typography.TypographyScanner
+    собирает правило висячих предлогов. find_inner нужен transform.find_preposition_spaces
+    (logic.find_hanging_prepositions, бенчмарки), ends_with_short_word - проверке
+    отдельных runs, например в benchmarks/bench_matcher.py.
+    """
+
+    def __init__(self, words):
+        self.words = frozenset(word.lower() for word in words if word)
+        # Факторизованная альтернатива слов, ее же использует typography.TypographyScanner
+        self.alternation = _trie_pattern(self.words) if self.words else r'(?!)'
+
+        # Предлог, за которым следует пробельный символ
+        self.inner_pattern = re.compile(r'(?<!\w)(' + self.alternation + r')(?=\s)', re.IGNORECASE)
+        # Предлог в самом конце текста
+        self.tail_pattern = re.compile(r'(?<!\w)(' + self.alternation + r')\Z', re.IGNORECASE)
+
+    def find_inner(self, text):
+        """Возвращает список позиций (start, end) предлогов, за которыми идет пробел."""
+        return [match.span() for match in self.inner_pattern.finditer(text)]
+
+    def ends_with_short_word(self, text):
+        """Проверяет, заканчивается ли текст коротким словом из списка."""
+        return self.tail_pattern.search(text) is not None
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(words):
+    return PrepositionMatcher(words)
+
+
+def get_matcher(words=None):
+    """
+    Возвращает matcher для текущего списка слов.
+
+    Скомпилированный паттерн кэшируется по содержимому списка, поэтому
+    изменение short_words в настройках автоматически дает новую версию.
+    """
+    if words is None:
+        words = current_config().short_words
+    return _cached_matcher(frozenset(words))
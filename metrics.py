@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import heapq
+import logging
+import datetime
+from contextlib import contextmanager
+
+# Порядок и подписи этапов в логе
+STAGE_LABELS = {
+    'load': 'загрузка',
+    'coalesce': 'объединение runs',
+    'rules': 'типографика',
+    'stream': 'потоковая обработка',
+    'spellcheck': 'орфография',
+    'save': 'сохранение',
+}
+
+COUNTER_LABELS = {
+    'paragraphs': 'абзацев',
+    'runs': 'runs',
+    'runs_merged': 'объединено runs',
+    'edits': 'правок',
+    'http_requests': 'HTTP-запросов',
+}
+
+
+class DocumentMetrics:
+    """
+    Время этапов и счетчики обработки одного документа.
+
+    Замеры дешевые: perf_counter вокруг этапа целиком, а не вокруг каждого параграфа.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        # Правки по правилам типографики: {правило: количество}
+        self.rules = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Засекает время этапа; повторные входы в этап суммируются."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        """Увеличивает счетчик."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        """Возвращает метрики в виде словаря для результата и JSON."""
+        return {
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+            'rules': dict(self.rules),
+        }
+
+
+def _ordered(values, labels):
+    """Пары (подпись, значение): сначала в порядке labels, затем остальные."""
+    names = [name for name in labels if name in values] + [name for name in values if name not in labels]
+    return [(labels.get(name, name), values[name]) for name in names]
+
+
+def format_metrics(metrics):
+    """Строка для лога: время этапов, счетчики и срабатывания правил документа."""
+    stages = ', '.join(f"{label} {seconds:.2f} с"
+                       for label, seconds in _ordered(metrics.get('stages', {}), STAGE_LABELS))
+    counters = ', '.join(f"{label} {value}"
+                         for label, value in _ordered(metrics.get('counters', {}), COUNTER_LABELS))
+    rules = ', '.join(f"{name} {value}" for name, value in metrics.get('rules', {}).items())
+    if rules:
+        rules = f"правила: {rules}"
+    return '; '.join(part for part in (stages, counters, rules) if part)
+
+
+class MetricsWriter:
+    """Дописывает метрики документов в файл JSON Lines: одна строка на документ."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, input_path, output_path, result):
+        """Записывает результат обработки документа вместе с его метриками."""
+        record = {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'input': input_path,
+            'output': output_path,
+            'status': result.get('status'),
+            'edits': result.get('edits', 0),
+            'seconds': result.get('seconds'),
+            'config_version': result.get('config_version'),
+            'metrics': result.get('metrics', {}),
+        }
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logging.warning(f"Не удалось записать метрики в {self.path}: {e}")
+
+
+class SlowestProfiles:
+    """
+    Хранит профили cProfile только для N самых медленных документов пакета.
+
+    Профиль пишется для каждого документа (заранее неизвестно, какой окажется медленным),
+    а лишние файлы удаляются по мере поступления результатов.
+    """
+
+    def __init__(self, directory, keep):
+        self.directory = directory
+        self.keep = keep
+        self._heap = []
+        os.makedirs(directory, exist_ok=True)
+
+    def profile_path(self, index, input_path):
+        """Путь файла профиля для задания."""
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        return os.path.join(self.directory, f"{index:05d}_{name}.pstats")
+
+    def add(self, seconds, path):
+        """Учитывает профиль документа; профиль самого быстрого из лишних удаляется."""
+        if not path or not os.path.exists(path):
+            return
+        heapq.heappush(self._heap, (seconds, path))
+        if len(self._heap) > self.keep:
+            _, fastest = heapq.heappop(self._heap)
+            try:
+                os.remove(fastest)
+            except OSError:
+                pass
+
+    def kept(self):
+        """Сохраненные профили, от самого медленного документа."""
+        return [path for _, path in sorted(self._heap, reverse=True)]
@@ -0,0 +1,214 @@
+import os
+import sys
+import shutil
+import struct
+import zipfile
+
+from lxml import etree
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+from document_walker import TEXT_PART_RELTYPES, text_parts
+
+# Элемент связи в файлах _rels/*.rels
+RELATIONSHIP_TAG = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+# Размер блока при копировании сжатых данных
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Бит флагов: CRC и размеры записаны в дескрипторе после данных
+_DATA_DESCRIPTOR_FLAG = 0x08
+# Идентификатор дополнительного поля ZIP64
+_ZIP64_EXTRA_ID = 0x0001
+
+# Перенос сжатых байтов пишет в архив через внутренние поля zipfile. Он включается
+# только на проверенных версиях Python и только если эти поля на месте; иначе
+# записи переупаковываются обычным путем через zin.open/zout.open
+RAW_COPY_PYTHON_VERSIONS = ((3, 8), (3, 13))
+_ZIPFILE_INTERNALS = ('fp', '_lock', '_writecheck', '_didModify', 'start_dir', 'filelist', 'NameToInfo')
+
+
+def _strip_zip64_extra(extra):
+    """Убирает поле ZIP64 из extra: при записи zipfile добавит его сам, если оно нужно."""
+    result = b''
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack('<HH', extra[pos:pos + 4])
+        if header_id != _ZIP64_EXTRA_ID:
+            result += extra[pos:pos + 4 + size]
+        pos += 4 + size
+    return result
+
+
+def _clone_info(info):
+    """Копирует ZipInfo со всеми служебными полями (CRC, размеры, метод сжатия)."""
+    clone = zipfile.ZipInfo(info.filename, info.date_time)
+    for attr in zipfile.ZipInfo.__slots__:
+        if hasattr(info, attr):
+            setattr(clone, attr, getattr(info, attr))
+    return clone
+
+
+def raw_copy_supported(zout):
+    """
+    Проверяет, можно ли переносить в zout сжатые байты без распаковки.
+
+    Нужны проверенная версия Python (RAW_COPY_PYTHON_VERSIONS), внутренние поля
+    zipfile, которыми пользуется copy_raw_member, и архив с произвольным доступом.
+    """
+    oldest, newest = RAW_COPY_PYTHON_VERSIONS
+    if not oldest <= sys.version_info[:2] <= newest:
+        return False
+    if not hasattr(zipfile, 'sizeFileHeader') or not hasattr(zipfile.ZipInfo, 'FileHeader'):
+        return False
+    return all(hasattr(zout, name) for name in _ZIPFILE_INTERNALS) and getattr(zout, '_seekable', False)
+
+
+def _recompress_member(zin, zout, info):
+    """Переносит запись через распаковку и повторное сжатие (запасной путь)."""
+    zinfo = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    zinfo.comment = info.comment
+    with zin.open(info) as source, \
+            zout.open(zinfo, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+
+
+def copy_raw_member(zin, zout, info):
+    """
+    Переносит запись архива без распаковки и повторного сжатия.
+
+    Сжатые байты копируются как есть, поэтому изображения и внедренные объекты
+    в результате побайтно совпадают с исходными. Если raw_copy_supported
+    не подтверждает нужные возможности zipfile, запись переупаковывается:
+    содержимое то же, но сжатые байты могут отличаться.
+    """
+    if not raw_copy_supported(zout):
+        _recompress_member(zin, zout, info)
+        return
+
+    zinfo = _clone_info(info)
+    zinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    zinfo.extra = _strip_zip64_extra(info.extra)
+
+    # Локальный заголовок: 30 байт, затем имя файла и extra, затем сжатые данные
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    zin.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    with zout._lock:
+        zout.fp.seek(zout.start_dir)
+        zinfo.header_offset = zout.fp.tell()
+        zout._writecheck(zinfo)
+        zout._didModify = True
+        zout.fp.write(zinfo.FileHeader())
+
+        remaining = info.compress_size
+        while remaining:
+            chunk = zin.fp.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Запись {info.filename} повреждена")
+            zout.fp.write(chunk)
+            remaining -= len(chunk)
+
+        zout.start_dir = zout.fp.tell()
+        zout.filelist.append(zinfo)
+        zout.NameToInfo[zinfo.filename] = zinfo
+
+
+def _relationships(zin, partname):
+    """
+    Читает связи части пакета прямо из архива.
+
+    Returns:
+        Список пар (тип связи, PackURI цели); внешние ссылки пропускаются
+    """
+    partname = PackURI(partname)
+    try:
+        data = zin.read(partname.rels_uri.membername)
+    except KeyError:
+        return []
+    return [
+        (rel.get('Type'), PackURI.from_rel_ref(partname.baseURI, rel.get('Target')))
+        for rel in etree.fromstring(data).iter(RELATIONSHIP_TAG)
+        if rel.get('TargetMode') != 'External'
+    ]
+
+
+def text_part_names(zin):
+    """
+    Имена записей архива с текстом: основной документ, колонтитулы и сноски.
+
+    Части находятся по связям пакета, как в document_walker.text_parts, а не по
+    имени файла: основной документ может называться, например, word/document2.xml.
+
+    Returns:
+        Список имен записей, основной документ первым
+    """
+    names = []
+    for reltype, main in _relationships(zin, '/'):
+        if reltype != RT.OFFICE_DOCUMENT:
+            continue
+        names.append(main.membername)
+        for reltype, target in _relationships(zin, main):
+            if reltype in TEXT_PART_RELTYPES and target.membername not in names:
+                names.append(target.membername)
+        break
+    return [name for name in names if name in zin.NameToInfo]
+
+
+def save_document(doc, input_path, output_path):
+    """
+    Сохраняет документ, пересобирая только текстовые части.
+
+    Основной документ, колонтитулы и сноски (document_walker.text_parts - ровно те
+    части, которые изменяет обработка) сериализуются заново, вместе с
+    [Content_Types].xml и файлами связей (они маленькие и могут измениться,
+    если python-docx добавил колонтитул). Все остальные записи, прежде всего
+    word/media/* и внедренные объекты, копируются из исходного архива сжатыми байтами.
+
+    input_path и output_path могут быть файловыми объектами: тогда архив читается
+    из потока и пишется прямо в него, без временного файла.
+    """
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    rewrite = {part.partname.membername for part in text_parts(doc)}
+
+    if not isinstance(output_path, (str, os.PathLike)):
+        _write_package(package, parts, rewrite, input_path, output_path)
+        return
+
+    temp_path = os.fspath(output_path) + '.tmp'
+    try:
+        _write_package(package, parts, rewrite, input_path, temp_path)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _write_package(package, parts, rewrite, input_path, output_path):
+    """Записывает архив документа: части из rewrite и новые части заново, остальное сжатыми байтами."""
+    if hasattr(input_path, 'seek'):
+        input_path.seek(0)
+    with zipfile.ZipFile(input_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        source = {info.filename: info for info in zin.infolist()}
+
+        zout.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        zout.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+
+        for part in parts:
+            name = part.partname.membername
+            info = source.get(name)
+            if info is None or name in rewrite:
+                zout.writestr(name, part.blob)
+            else:
+                copy_raw_member(zin, zout, info)
+
+            if len(part.rels):
+                zout.writestr(part.partname.rels_uri.membername, part.rels.xml)
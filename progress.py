@@ -0,0 +1,114 @@
+import time
+from collections import namedtuple
+
+# Событие прогресса, общее для графического интерфейса и консоли
+ProgressEvent = namedtuple('ProgressEvent', [
+    'fraction',  # Общий прогресс 0..1
+    'files_done',  # Количество завершенных файлов
+    'files_total',  # Всего файлов
+    'paragraphs',  # Обработано параграфов
+    'paragraphs_per_second',  # Средняя скорость с начала обработки
+    'bytes_done',  # Обработано байт исходных файлов (по доле прогресса каждого файла)
+    'bytes_total',  # Суммарный размер исходных файлов
+    'elapsed',  # Секунд с начала обработки
+    'eta',  # Оценка оставшегося времени в секундах, None пока оценивать не по чему
+    'finished',  # Все файлы обработаны
+])
+
+
+def format_duration(seconds):
+    """Форматирует длительность как м:сс или ч:мм:сс."""
+    if seconds is None:
+        return '--:--'
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """
+    Сводит частые обновления прогресса в редкие события.
+
+    Обработчики вызывают update() хоть после каждого параграфа, а слушатель
+    получает не больше max_rate событий в секунду и только если прогресс
+    сдвинулся хотя бы на min_delta (или завершился файл). Раз в секунду событие
+    отправляется и без сдвига, чтобы скорость и оценка времени не замирали.
+    Завершение всех файлов сообщается всегда.
+    """
+
+    def __init__(self, listener, files_total=1, bytes_total=0, max_rate=10, min_delta=0.01,
+                 clock=time.monotonic):
+        """
+        Args:
+            listener: Функция, принимающая ProgressEvent
+            files_total: Количество файлов в пакете
+            bytes_total: Суммарный размер исходных файлов
+            max_rate: Максимальное количество событий в секунду
+            min_delta: Минимальное изменение прогресса между событиями
+            clock: Источник времени (для тестов и бенчмарков)
+        """
+        self.listener = listener
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.min_interval = 1.0 / max_rate
+        self.min_delta = min_delta
+        self.clock = clock
+        self.started = clock()
+        self.emitted = 0
+
+        self._last_time = None
+        self._last_fraction = 0.0
+        self._last_files = 0
+
+    def update(self, fraction, files_done=0, paragraphs=0, bytes_done=None, force=False):
+        """
+        Сообщает текущее состояние; событие отправляется слушателю, если прошло
+        достаточно времени и прогресс заметно изменился.
+
+        Returns:
+            ProgressEvent, если событие было отправлено, иначе None
+        """
+        now = self.clock()
+        fraction = min(max(fraction, 0.0), 1.0)
+        finished = fraction >= 1.0 and files_done >= self.files_total
+        if not force and not finished and self._last_time is not None:
+            since_last = now - self._last_time
+            if since_last < self.min_interval:
+                return None
+            moved = fraction - self._last_fraction >= self.min_delta or files_done != self._last_files
+            if not moved and since_last < 1.0:
+                return None
+
+        elapsed = now - self.started
+        if bytes_done is None:
+            bytes_done = int(self.bytes_total * fraction)
+        event = ProgressEvent(
+            fraction=fraction,
+            files_done=files_done,
+            files_total=self.files_total,
+            paragraphs=paragraphs,
+            paragraphs_per_second=paragraphs / elapsed if elapsed > 0 else 0.0,
+            bytes_done=bytes_done,
+            bytes_total=self.bytes_total,
+            elapsed=elapsed,
+            # В первую секунду оценка слишком шумная
+            finished=finished,
+            eta=elapsed * (1.0 - fraction) / fraction if fraction > 0 and elapsed >= 1.0 else None,
+        )
+
+        self._last_time = now
+        self._last_fraction = fraction
+        self._last_files = files_done
+        self.emitted += 1
+        self.listener(event)
+        return event
+
+
+def describe_progress(event):
+    """Строка состояния для интерфейса и консоли."""
+    return (f"Обработано файлов {event.files_done} из {event.files_total} ({int(event.fraction * 100)}%), "
+            f"{event.paragraphs_per_second:.0f} абз/с, {event.bytes_done / 1048576:.1f} МБ, "
+            f"осталось {format_duration(event.eta)}")
@@ -0,0 +1,116 @@
+from copy import deepcopy
+
+from lxml import etree
+
+from docx.oxml.ns import nsmap, qn
+from document_walker import text_parts
+
+W_R = qn('w:r')
+W_RPR = qn('w:rPr')
+W_T = qn('w:t')
+W_PROOF_ERR = qn('w:proofErr')
+
+# Элементы, внутри которых runs идут подряд: параграф, гиперссылка, вставка при рецензировании
+RUN_CONTAINERS = (qn('w:p'), qn('w:hyperlink'), qn('w:ins'), qn('w:smartTag'))
+
+# Содержимое run, которое можно переносить в соседний run без потери смысла.
+# Runs с полями, рисунками, сносками и т.п. не объединяются
+MERGEABLE_CONTENT = frozenset(qn(tag) for tag in ('w:t', 'w:tab', 'w:br', 'w:cr', 'w:noBreakHyphen',
+                                                  'w:softHyphen'))
+
+# Атрибуты идентификаторов сеансов правки (w:rsidR, w:rsidRPr, ...) не влияют на вид текста
+RSID_PREFIX = '{%s}rsid' % nsmap['w']
+
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+_COUNT_RUNS = etree.XPath('count(.//w:r)', namespaces={'w': nsmap['w']})
+
+
+def _is_mergeable(run):
+    """Run содержит только форматирование и текст (табуляции, переносы)."""
+    return all(child.tag == W_RPR or child.tag in MERGEABLE_CONTENT for child in run)
+
+
+def _format_key(run):
+    """Ключ форматирования run: сериализованный w:rPr без атрибутов rsid."""
+    rpr = run.find(W_RPR)
+    if rpr is None:
+        return b''
+    if any(name.startswith(RSID_PREFIX) for element in rpr.iter() for name in element.attrib):
+        rpr = deepcopy(rpr)
+        for element in rpr.iter():
+            for name in [name for name in element.attrib if name.startswith(RSID_PREFIX)]:
+                del element.attrib[name]
+    return etree.tostring(rpr)
+
+
+def _append_content(target, source):
+    """Переносит содержимое source в конец target, склеивая соседние w:t."""
+    for child in list(source):
+        if child.tag == W_RPR:
+            continue
+        last = target[-1] if len(target) else None
+        if child.tag == W_T and last is not None and last.tag == W_T:
+            text = (last.text or '') + (child.text or '')
+            last.text = text
+            if text != text.strip():
+                last.set(XML_SPACE, 'preserve')
+        else:
+            target.append(child)
+
+
+def coalesce_container(container):
+    """
+    Объединяет подряд идущие runs с одинаковым форматированием внутри одного элемента.
+
+    Пометки проверки правописания (w:proofErr) между такими runs удаляются:
+    Word расставляет их заново. Любой другой элемент (закладка, поле, комментарий)
+    прерывает последовательность.
+
+    Returns:
+        Количество удаленных runs
+    """
+    removed = 0
+    previous = None
+    previous_key = None
+    markers = []
+
+    for child in list(container):
+        if child.tag == W_R and _is_mergeable(child):
+            key = _format_key(child)
+            if previous is not None and key == previous_key:
+                for marker in markers:
+                    container.remove(marker)
+                _append_content(previous, child)
+                container.remove(child)
+                removed += 1
+            else:
+                previous, previous_key = child, key
+            markers = []
+        elif child.tag == W_PROOF_ERR and previous is not None:
+            markers.append(child)
+        else:
+            previous = None
+            markers = []
+    return removed
+
+
+def coalesce_document(doc):
+    """
+    Объединяет runs с одинаковым форматированием во всех текстовых частях документа.
+
+    Выполняется до правил: предлоги и даты на границах runs становятся обычным
+    текстом одного run, а циклы по runs и размер XML уменьшаются.
+
+    Returns:
+        Кортеж (runs до объединения, runs после)
+    """
+    before = after = 0
+    for part in text_parts(doc):
+        element = part.element
+        count = int(_COUNT_RUNS(element))
+        before += count
+        # Список контейнеров фиксируется заранее: объединение меняет дерево
+        containers = list(element.iter(*RUN_CONTAINERS))
+        after += count - sum(coalesce_container(container) for container in containers)
+    return before, after
@@ -0,0 +1,443 @@
+"""
+Локальный сервис обработки документов: запускается один раз и держит воркеры прогретыми.
+
+Интерпретатор, python-docx/lxml, настройки и скомпилированные правила загружаются
+при старте, поэтому небольшой документ обрабатывается за десятки миллисекунд,
+а не за секунды запуска cli.py.
+
+API (HTTP на 127.0.0.1 или Unix-сокет):
+    POST /jobs      JSON {"input": путь, "output": путь (необязательно)} -> JSON результата
+    POST /process   тело - байты .docx -> байты обработанного документа,
+                    количество правок и статус в заголовках X-Edits и X-Status
+    GET  /status    глубина очереди, процентили задержки, пропускная способность
+
+Запуск из корня проекта:
+    python service.py --port 8770 -j 4
+    python service.py --socket /tmp/docx.sock --spellcheck
+    curl --data-binary @in.docx http://127.0.0.1:8770/process -o out.docx
+"""
+import os
+import sys
+import json
+import math
+import stat
+import time
+import signal
+import socket
+import logging
+import zipfile
+import argparse
+import ipaddress
+import threading
+import socketserver
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch import describe_error, resolve_workers
+from cli import output_path_for
+from config import current_config, get_setting
+from logic import fix_document_bytes, fix_hanging_prepositions
+from metrics import MetricsWriter, format_metrics
+from typography import get_scanner
+
+# Ограничение размера загружаемого документа
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+
+# Сколько последних задержек хранится для процентилей
+LATENCY_WINDOW = 1000
+
+# Окно расчета текущей пропускной способности, секунды
+THROUGHPUT_WINDOW = 60.0
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Параметры обработки внутри процесса-воркера (задаются в _init_worker)
+_options = None
+
+
+def _init_worker(options):
+    """Прогревает процесс-воркер: запоминает параметры и компилирует правила."""
+    global _options
+    _options = options
+    get_scanner(options.get('short_words'))
+
+
+def _process_path(input_path, output_path):
+    """Обрабатывает файл на диске в процессе-воркере."""
+    start = time.perf_counter()
+    result = fix_hanging_prepositions(input_path, output_path, **_options)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _process_upload(data):
+    """
+    Обрабатывает загруженный документ в процессе-воркере целиком в памяти.
+
+    Returns:
+        Кортеж (байты результата, словарь результата)
+    """
+    start = time.perf_counter()
+    output, result = fix_document_bytes(data, **_options)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return output, result
+
+
+def percentile(values, fraction):
+    """Процентиль по методу ближайшего ранга; для пустого списка None."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class ServiceStats:
+    """Счетчики сервиса: задания в работе, задержки и завершения для /status."""
+
+    def __init__(self, workers, clock=time.monotonic):
+        self.workers = workers
+        self.clock = clock
+        self.started = clock()
+        self.in_flight = 0
+        self.completed = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque()
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Отмечает принятое задание."""
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds, error=False):
+        """Отмечает завершенное задание и его задержку (от приема до ответа)."""
+        with self._lock:
+            self.in_flight -= 1
+            if error:
+                self.errors += 1
+            else:
+                self.completed += 1
+                self.latencies.append(seconds)
+                now = self.clock()
+                self.finished.append(now)
+                while self.finished and now - self.finished[0] > THROUGHPUT_WINDOW:
+                    self.finished.popleft()
+
+    def snapshot(self):
+        """Состояние сервиса для /status."""
+        with self._lock:
+            now = self.clock()
+            uptime = now - self.started
+            latencies = list(self.latencies)
+            recent = sum(1 for moment in self.finished if now - moment <= THROUGHPUT_WINDOW)
+            window = min(uptime, THROUGHPUT_WINDOW)
+
+            def ms(value):
+                return round(value * 1000, 1) if value is not None else None
+
+            return {
+                'workers': self.workers,
+                'queue_depth': max(0, self.in_flight - self.workers),
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'errors': self.errors,
+                'uptime': round(uptime, 1),
+                'config_version': current_config().version,
+                'latency_ms': {
+                    'p50': ms(percentile(latencies, 0.5)),
+                    'p90': ms(percentile(latencies, 0.9)),
+                    'p99': ms(percentile(latencies, 0.99)),
+                    'max': ms(max(latencies) if latencies else None),
+                },
+                'throughput': {
+                    'documents_per_second': round(recent / window, 2) if window > 0 else None,
+                    'documents_per_second_total': round(self.completed / uptime, 2) if uptime > 0 else None,
+                },
+            }
+
+
+class DocumentService:
+    """
+    Пул прогретых процессов-воркеров и учет заданий.
+
+    Задания ставятся во внутреннюю очередь ProcessPoolExecutor и выполняются
+    по мере освобождения воркеров; вызывающий поток ждет результат.
+    Если процесс-воркер аварийно завершился, пул пересоздается: задания, которые
+    выполнялись в нем, завершаются ошибкой, следующие идут в новый пул.
+    """
+
+    def __init__(self, workers=None, with_spellcheck=False, engine='docx', coalesce_runs=None,
+                 metrics_path=None):
+        self.workers = resolve_workers(workers)
+        self.options = {
+            'with_spellcheck': with_spellcheck,
+            'engine': engine,
+            # None - настройка coalesce_runs из снимка настроек каждого задания
+            'coalesce_runs': coalesce_runs,
+        }
+        metrics_path = metrics_path if metrics_path is not None else get_setting('metrics_file')
+        self.writer = MetricsWriter(metrics_path) if metrics_path else None
+        self.stats = ServiceStats(self.workers)
+        self._pool_lock = threading.Lock()
+        self.executor = self._start_pool()
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.options,))
+        # Процессы запускаются сразу, а не при первом задании
+        for future in [executor.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _restart_pool(self, broken):
+        """Заменяет сломанный пул новым (один раз, даже если об ошибке узнали несколько потоков)."""
+        with self._pool_lock:
+            if self.executor is broken:
+                logging.error("Процесс-воркер аварийно завершился, пул процессов пересоздается")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = self._start_pool()
+            return self.executor
+
+    def _submit(self, function, *args):
+        """Ставит задание в пул. Returns: (пул, future)."""
+        executor = self.executor
+        try:
+            return executor, executor.submit(function, *args)
+        except BrokenProcessPool:
+            # Пул сломался на предыдущем задании: это задание в нем не выполнялось
+            executor = self._restart_pool(executor)
+            return executor, executor.submit(function, *args)
+
+    def _run(self, label, output, function, *args):
+        start = time.monotonic()
+        self.stats.begin()
+        try:
+            executor, future = self._submit(function, *args)
+            try:
+                value = future.result()
+            except BrokenProcessPool:
+                self._restart_pool(executor)
+                raise
+        except Exception:
+            self.stats.end(time.monotonic() - start, error=True)
+            raise
+        self.stats.end(time.monotonic() - start)
+
+        result = value[1] if isinstance(value, tuple) else value
+        logging.info(f"{label}: {result['edits']} правок, {result['seconds']:.3f} с; "
+                     f"{format_metrics(result.get('metrics', {}))}")
+        if self.writer:
+            self.writer.write(label, output, result)
+        return value
+
+    def process_path(self, input_path, output_path=None):
+        """Обрабатывает файл на диске; по умолчанию результат пишется в output_files."""
+        if output_path is None:
+            output_path = output_path_for(input_path)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        result = self._run(input_path, output_path, _process_path, input_path, output_path)
+        result['output'] = output_path
+        return result
+
+    def process_bytes(self, data):
+        """Обрабатывает загруженный документ. Returns: (байты результата, результат)."""
+        return self._run('<upload>', None, _process_upload, data)
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Обработчик HTTP-запросов сервиса; сервис доступен как self.server.service."""
+
+    def _send(self, status, body, content_type='application/json; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+    def _send_error(self, error, path):
+        if isinstance(error, FileNotFoundError):
+            status = 404
+        elif isinstance(error, (ValueError, PermissionError, zipfile.BadZipFile)):
+            # Неверные параметры или загруженный файл не является архивом .docx
+            status = 400
+        else:
+            status = 500
+            logging.error(describe_error(path, error), exc_info=error)
+        self._send_json(status, {'error': describe_error(path, error)})
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {'error': f"Документ больше {MAX_UPLOAD_BYTES // 1048576} МБ"})
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/status':
+            self._send_json(200, self.server.service.stats.snapshot())
+        else:
+            self._send_json(404, {'error': "Неизвестный адрес"})
+
+    def do_POST(self):
+        path = self.path.rstrip('/')
+        if path not in ('/jobs', '/process'):
+            self._send_json(404, {'error': "Неизвестный адрес"})
+            return
+        body = self._read_body()
+        if body is None:
+            return
+
+        if path == '/jobs':
+            try:
+                job = json.loads(body or b'{}')
+                input_path = job['input']
+            except (ValueError, KeyError, TypeError):
+                self._send_json(400, {'error': 'Ожидается JSON {"input": путь, "output": путь}'})
+                return
+            try:
+                result = self.server.service.process_path(input_path, job.get('output'))
+            except Exception as e:
+                self._send_error(e, input_path)
+            else:
+                self._send_json(200, result)
+            return
+
+        if not body:
+            self._send_json(400, {'error': "Пустой документ"})
+            return
+        try:
+            data, result = self.server.service.process_bytes(body)
+        except Exception as e:
+            self._send_error(e, '<upload>')
+        else:
+            self._send(200, data, DOCX_CONTENT_TYPE,
+                       {'X-Edits': str(result['edits']), 'X-Status': result['status']})
+
+    def address_string(self):
+        # У Unix-сокета нет адреса клиента
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP поверх Unix-сокета: каждый запрос в своем потоке."""
+    daemon_threads = True
+
+
+def is_loopback(host):
+    """Проверяет, что все адреса хоста локальные (127.0.0.0/8, ::1)."""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_loopback
+                                   for address in addresses)
+
+
+def remove_stale_socket(socket_path):
+    """
+    Удаляет сокет, оставшийся от прошлого запуска.
+
+    Raises:
+        ValueError: По пути лежит не сокет (обычный файл, каталог) или на сокете уже работает сервер
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{socket_path} существует и не является сокетом, удалите его или укажите другой путь")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # Никто не слушает: сокет остался после аварийной остановки
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise ValueError(f"На сокете {socket_path} уже работает сервер")
+
+
+def create_server(service, host='127.0.0.1', port=8770, socket_path=None):
+    """
+    Создает HTTP-сервер на TCP-порту или Unix-сокете.
+
+    Слушать можно только локальный адрес: /jobs читает и пишет любые пути,
+    доступные процессу сервиса, поэтому открывать его в сеть нельзя.
+    """
+    if not socket_path and not is_loopback(host):
+        raise ValueError(f"Сервис слушает только локальный адрес, {host} не является локальным: "
+                         f"/jobs дает доступ к файлам сервера")
+    if socket_path:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix-сокеты не поддерживаются в этой системе")
+        remove_stale_socket(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help="Локальный адрес (127.0.0.1, ::1 или localhost)")
+    parser.add_argument('--port', type=int, default=8770)
+    parser.add_argument('--socket', help="Слушать Unix-сокет вместо TCP-порта")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="Количество процессов (по умолчанию из app_config.json или по числу ядер)")
+    parser.add_argument('--spellcheck', action='store_true', help="Включить проверку орфографии")
+    parser.add_argument('--engine', choices=('docx', 'stream'), default='docx')
+    parser.add_argument('--coalesce-runs', action='store_true', default=None)
+    parser.add_argument('-v', '--verbose', action='store_true', help="Лог каждого запроса")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | %(message)s',
+        datefmt='%H:%M:%S',
+        stream=sys.stderr
+    )
+
+    service = DocumentService(args.workers, args.spellcheck, args.engine, args.coalesce_runs)
+    try:
+        server = create_server(service, args.host, args.port, args.socket)
+    except (OSError, ValueError) as e:
+        service.close()
+        parser.error(str(e))
+    address = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    logging.info(f"Сервис запущен: {address}, процессов: {service.workers}")
+    # Остановка менеджером служб так же аккуратна, как Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+        logging.info("Сервис остановлен")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()
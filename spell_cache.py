@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+# Сколько записей добавить между проверками размера кэша
+EVICTION_CHECK_INTERVAL = 500
+
+
+def normalize_text(text):
+    """
+    Нормализует текст для ключа кэша.
+
+    Допустимы только замены символ-в-символ: позиции исправлений в кэше
+    должны совпадать с позициями в исходном тексте. Неразрывные пробелы,
+    которые расставляет программа, не должны менять ключ.
+    """
+    return text.replace('\u00A0', ' ')
+
+
+def make_key(text, lang, options):
+    """Строит ключ записи по нормализованному тексту, языку и маске опций спеллера."""
+    raw = f'{lang}\x00{options}\x00{normalize_text(text)}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class SpellCache:
+    """
+    Постоянный кэш ответов спеллера в SQLite с вытеснением давно не использованных записей.
+
+    База открывается в режиме WAL, поэтому несколько процессов пакетной обработки
+    могут читать и писать в нее одновременно.
+    """
+
+    def __init__(self, path, max_entries=100000, ttl=None):
+        """
+        Args:
+            path: Путь к файлу базы
+            max_entries: Максимальное количество записей, лишние вытесняются по времени доступа
+            ttl: Время жизни записи в секундах (None - без ограничения)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inserted = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS spell_cache ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS spell_cache_accessed ON spell_cache (accessed)')
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """Возвращает словарь {ключ: исправления} для найденных и не устаревших записей."""
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        with self._lock:
+            unique = list(set(keys))
+            # SQLite ограничивает количество параметров в одном запросе
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, value, created FROM spell_cache WHERE key IN ({placeholders})', chunk
+                ).fetchall()
+                for key, value, created in rows:
+                    if self.ttl is None or now - created <= self.ttl:
+                        found[key] = json.loads(value)
+
+            if found:
+                self._conn.executemany(
+                    'UPDATE spell_cache SET accessed = ? WHERE key = ?', [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def set_many(self, items):
+        """Сохраняет пары (ключ, исправления) и при необходимости вытесняет старые записи."""
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO spell_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)',
+                [(key, json.dumps(value, ensure_ascii=False), now, now) for key, value in items]
+            )
+            self._inserted += len(items)
+            if self._inserted >= EVICTION_CHECK_INTERVAL:
+                self._inserted = 0
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Удаляет устаревшие записи и самые давно использованные сверх лимита."""
+        if self.ttl is not None:
+            self._conn.execute('DELETE FROM spell_cache WHERE created < ?', (now - self.ttl,))
+
+        count = self._conn.execute('SELECT COUNT(*) FROM spell_cache').fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                'DELETE FROM spell_cache WHERE key IN '
+                '(SELECT key FROM spell_cache ORDER BY accessed LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachingSpeller:
+    """
+    Обертка над спеллером, которая отправляет в сервис только тексты, которых нет в кэше.
+
+    Повторяющиеся колонтитулы, типовые пункты договоров и подписи таблиц
+    после первого документа проверяются локально.
+    """
+
+    def __init__(self, speller, cache):
+        self.speller = speller
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        # check_texts вызывается из потоков SpellcheckPipeline
+        self._counter_lock = threading.Lock()
+
+    def check_texts(self, texts):
+        """Проверяет тексты, используя кэш; возвращает исправления в том же порядке."""
+        keys = [make_key(text, self.speller.lang, self.speller.options) for text in texts]
+        try:
+            cached = self.cache.get_many(keys)
+        except sqlite3.Error as e:
+            logging.warning(f"Кэш орфографии недоступен: {e}")
+            cached = {}
+
+        missing = [index for index, key in enumerate(keys) if key not in cached and texts[index].strip()]
+        with self._counter_lock:
+            self.hits += sum(1 for key in keys if key in cached)
+            self.misses += len(missing)
+
+        fetched = self.speller.try_check_texts([texts[index] for index in missing]) if missing else []
+
+        results = [cached.get(key, []) for key in keys]
+        new_items = []
+        for index, corrections in zip(missing, fetched):
+            # Ответы неудачных запросов не кэшируем, иначе ошибка сети запомнится как "ошибок нет"
+            if corrections is None:
+                continue
+            results[index] = corrections
+            new_items.append((keys[index], corrections))
+
+        try:
+            self.cache.set_many(new_items)
+        except sqlite3.Error as e:
+            logging.warning(f"Не удалось сохранить результаты в кэш орфографии: {e}")
+        return results
+
+    def check_text(self, text):
+        """Проверяет орфографию одного текста."""
+        return self.check_texts([text])[0]
+
+    def stats(self):
+        """Возвращает счетчики запросов и попаданий в кэш."""
+        stats = dict(self.speller.stats())
+        with self._counter_lock:
+            stats.update({'cache_hits': self.hits, 'cache_misses': self.misses})
+        return stats
+
+    def close(self):
+        """Закрывает спеллер и соединение с кэшем."""
+        self.speller.close()
+        self.cache.close()
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import get_setting
+from document_walker import paragraph_runs
+from Date_Spellcheck_Logic import apply_paragraph_corrections
+
+
+class SpellcheckPipeline:
+    """
+    Конвейер проверки орфографии, который совмещает сетевые запросы с локальной обработкой.
+
+    1. Локальные правила (даты, предлоги) обрабатывают параграфы по порядку и
+       передают их в add().
+    2. Как только набирается пакет до лимита сервиса, он отправляется в пул потоков,
+       не дожидаясь конца документа; одновременно выполняется не больше max_in_flight запросов.
+    3. finish() применяет исправления по мере прихода ответов. python-docx не
+       потокобезопасен, поэтому документ меняется только в вызывающем потоке.
+
+    Если speller не задан, конвейер ничего не делает.
+    """
+
+    def __init__(self, speller=None, max_in_flight=None, max_chars=None):
+        self.speller = speller
+        self.max_in_flight = max_in_flight or get_setting('spell_max_in_flight')
+        if max_chars is None and speller is not None:
+            # Импорт здесь: speller загружает requests, пустому конвейеру он не нужен
+            from speller import MAX_REQUEST_CHARS as max_chars
+        self.max_chars = max_chars
+        self._executor = None
+        self._futures = {}
+        self._paragraphs = []
+        self._texts = []
+        self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+        return False
+
+    def add(self, paragraph):
+        """Ставит параграф в очередь на проверку после локальных правил."""
+        if self.speller is None:
+            return
+
+        text = ''.join(run.text for run in paragraph_runs(paragraph))
+        if not text.strip():
+            return
+
+        if self._texts and self._size + len(text) > self.max_chars:
+            self._submit()
+        self._paragraphs.append(paragraph)
+        self._texts.append(text)
+        self._size += len(text)
+
+    def _submit(self):
+        """Отправляет накопленный пакет в пул потоков."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                                thread_name_prefix='spellcheck')
+        future = self._executor.submit(self.speller.check_texts, self._texts)
+        self._futures[future] = self._paragraphs
+        self._paragraphs = []
+        self._texts = []
+        self._size = 0
+
+    def finish(self):
+        """
+        Отправляет остаток очереди, дожидается ответов и применяет исправления.
+
+        Returns:
+            Количество исправлений во всех параграфах
+        """
+        if self.speller is None:
+            return 0
+        if self._texts:
+            self._submit()
+
+        edits = 0
+        for future in as_completed(self._futures):
+            paragraphs = self._futures[future]
+            for paragraph, corrections in zip(paragraphs, future.result()):
+                edits += apply_paragraph_corrections(paragraph, corrections)
+        self._futures = {}
+        return edits
+
+    def close(self, cancel=False):
+        """Останавливает пул потоков; при cancel=True неотправленные пакеты отменяются."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=cancel)
+            self._executor = None
@@ -0,0 +1,247 @@
+import os
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import current_config
+from spell_cache import CachingSpeller, SpellCache
+
+# Адрес JSON-интерфейса Яндекс.Спеллера
+DEFAULT_SPELLER_URL = 'https://speller.yandex.net/services/spellservice.json'
+
+# Ограничение сервиса на объем текста в одном запросе
+MAX_REQUEST_CHARS = 10000
+
+# Таймауты соединения и чтения, секунды
+DEFAULT_TIMEOUT = (3.05, 15)
+
+# Максимальный уровень проверки
+DEFAULT_OPTIONS = 511
+
+
+def pack_batches(texts, max_chars=MAX_REQUEST_CHARS):
+    """
+    Группирует тексты в пакеты, суммарный размер которых не превышает max_chars.
+
+    Пустые тексты в пакеты не попадают. Текст длиннее лимита отправляется отдельным пакетом.
+
+    Returns:
+        Список пакетов, каждый пакет - список индексов исходных текстов
+    """
+    batches = []
+    current = []
+    size = 0
+    for index, text in enumerate(texts):
+        if not text.strip():
+            continue
+        if current and size + len(text) > max_chars:
+            batches.append(current)
+            current = []
+            size = 0
+        current.append(index)
+        size += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+class SpellBackend(ABC):
+    """
+    Интерфейс проверки орфографии.
+
+    Реализации возвращают для каждого текста список исправлений в формате
+    Яндекс.Спеллера: словари с ключами 'pos', 'len', 'word' и 's' (варианты замены),
+    поэтому код применения исправлений не зависит от выбранного движка.
+    """
+
+    name = None
+    lang = 'ru'
+    options = None
+
+    @abstractmethod
+    def try_check_texts(self, texts):
+        """
+        Проверяет орфографию списка текстов.
+
+        Returns:
+            Список исправлений для каждого текста в том же порядке; для текстов,
+            которые проверить не удалось, вместо списка возвращается None
+        """
+
+    def check_texts(self, texts):
+        """
+        Проверяет орфографию списка текстов.
+
+        Returns:
+            Список исправлений для каждого текста в том же порядке; тексты,
+            которые проверить не удалось, получают пустой список
+        """
+        return [corrections or [] for corrections in self.try_check_texts(texts)]
+
+    def check_text(self, text):
+        """Проверяет орфографию одного текста."""
+        return self.check_texts([text])[0]
+
+    def stats(self):
+        """Возвращает счетчики работы движка."""
+        return {}
+
+    def close(self):
+        """Освобождает ресурсы движка."""
+
+
+class YandexSpeller(SpellBackend):
+    """
+    Клиент Яндекс.Спеллера с пулом соединений, повторами и таймаутами.
+
+    Тексты отправляются пакетами через checkTexts, поэтому документ из тысяч
+    параграфов проверяется десятками запросов по одному keep-alive соединению.
+    """
+
+    name = 'yandex'
+
+    def __init__(self, base_url=None, lang='ru', options=DEFAULT_OPTIONS, timeout=DEFAULT_TIMEOUT,
+                 retries=3, max_chars=MAX_REQUEST_CHARS, pool_size=10):
+        self.base_url = (base_url or DEFAULT_SPELLER_URL).rstrip('/')
+        self.lang = lang
+        self.options = options
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.requests_sent = 0
+        self._counter_lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET', 'POST'})
+        )
+        self.session = requests.Session()
+        # Сессию используют параллельные запросы конвейера, соединений должно хватать на всех
+        self.session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_size))
+        self.session.mount('https://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_size))
+
+    def _check_batch(self, texts):
+        """Отправляет один запрос checkTexts и возвращает исправления для каждого текста."""
+        data = [('text', text) for text in texts]
+        data += [('lang', self.lang), ('options', self.options), ('format', 'plain')]
+
+        with self._counter_lock:
+            self.requests_sent += 1
+        response = self.session.post(f'{self.base_url}/checkTexts', data=data, timeout=self.timeout)
+        response.raise_for_status()
+
+        results = response.json()
+        if len(results) != len(texts):
+            raise ValueError(f"Спеллер вернул {len(results)} результатов на {len(texts)} текстов")
+        return results
+
+    def try_check_texts(self, texts):
+        """
+        Проверяет орфографию списка текстов.
+
+        Returns:
+            Список исправлений для каждого текста в том же порядке; для текстов
+            из неудачного пакета вместо списка возвращается None
+        """
+        results = [[] for _ in texts]
+        for batch in pack_batches(texts, self.max_chars):
+            try:
+                for index, corrections in zip(batch, self._check_batch([texts[i] for i in batch])):
+                    results[index] = corrections
+            except Exception as e:
+                logging.error(f"Ошибка при проверке орфографии: {e}")
+                for index in batch:
+                    results[index] = None
+        return results
+
+    def stats(self):
+        """Возвращает счетчики обращений к сервису."""
+        return {'requests': self.requests_sent}
+
+    def close(self):
+        """Закрывает соединения пула."""
+        self.session.close()
+
+
+# Настройки, от которых зависит спеллер: при их изменении общий спеллер создается заново
+SPELLER_SETTINGS = ('spell_backend', 'speller_url', 'spell_max_in_flight', 'spell_cache', 'spell_cache_path',
+                    'spell_cache_max_entries', 'spell_cache_ttl_days', 'local_spell_dictionary',
+                    'local_spell_distance')
+
+_default_speller = None
+_default_speller_key = None
+_default_speller_lock = threading.Lock()
+
+
+def create_speller(config=None):
+    """
+    Создает спеллер по настройке spell_backend.
+
+    'yandex' - клиент Яндекс.Спеллера, при включенном кэше - с кэшем на диске;
+    'local' - офлайн-проверка по словарю pyspellchecker (кэш на диске ей не нужен).
+
+    Args:
+        config: Снимок настроек (по умолчанию текущий)
+    """
+    if config is None:
+        config = current_config()
+    backend = config.get('spell_backend')
+    if backend == 'local':
+        # Импорт здесь: словарь и индекс нужны только при выборе локального движка
+        from local_speller import LocalSpeller
+        return LocalSpeller(
+            dictionary_path=config.get('local_spell_dictionary'),
+            distance=config.get('local_spell_distance')
+        )
+    if backend != 'yandex':
+        raise ValueError(f"Неизвестный движок проверки орфографии: {backend}")
+
+    speller = YandexSpeller(
+        base_url=config.get('speller_url'),
+        pool_size=max(10, config.get('spell_max_in_flight'))
+    )
+    if not config.get('spell_cache'):
+        return speller
+
+    ttl_days = config.get('spell_cache_ttl_days')
+    cache = SpellCache(
+        config.get('spell_cache_path'),
+        max_entries=config.get('spell_cache_max_entries'),
+        ttl=ttl_days * 24 * 3600 if ttl_days else None
+    )
+    return CachingSpeller(speller, cache)
+
+
+def get_speller():
+    """
+    Возвращает общий для процесса спеллер (одна сессия и одно соединение с кэшем на процесс).
+
+    Спеллер создается заново, если изменились его настройки (SPELLER_SETTINGS) в
+    app_config.json: сервис и наблюдение за папками подхватывают смену движка, адреса
+    и кэша без перезапуска. Прежний спеллер этого процесса при замене закрывается.
+    """
+    global _default_speller, _default_speller_key
+    config = current_config()
+    key = (os.getpid(), tuple(config.get(name) for name in SPELLER_SETTINGS))
+    with _default_speller_lock:
+        if _default_speller is None or _default_speller_key != key:
+            previous, previous_key = _default_speller, _default_speller_key
+            _default_speller = create_speller(config)
+            _default_speller_key = key
+            # После fork соединения родителя не трогаем: они принадлежат родительскому процессу
+            if previous is not None and previous_key[0] == key[0]:
+                logging.info("Настройки проверки орфографии изменились, спеллер создан заново")
+                previous.close()
+        return _default_speller
+
+
+def yandex_spellcheck(text: str):
+    """
+    Проверка орфографии с помощью Яндекс.Спеллера
+    """
+    return get_speller().check_text(text)
@@ -0,0 +1,243 @@
+import zipfile
+
+from lxml import etree
+
+from package_writer import copy_raw_member, text_part_names
+from transform import transform_texts
+
+# Пространство имен WordprocessingML
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_BODY = f'{{{W_NS}}}body'
+W_P = f'{{{W_NS}}}p'
+W_T = f'{{{W_NS}}}t'
+
+# Элементы, которые python-docx отдает в run.text как \t и \n: в склеенном тексте
+# они разделяют соседние w:t, но обратно не записываются
+W_SEPARATORS = {
+    f'{{{W_NS}}}tab': '\t',
+    f'{{{W_NS}}}br': '\n',
+    f'{{{W_NS}}}cr': '\n',
+}
+
+
+class _CountingReader:
+    """Обертка над потоком части пакета, которая считает прочитанные байты для прогресса."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.count += len(data)
+        return data
+
+
+def _qualified_name(elem):
+    """Возвращает имя элемента с префиксом, как оно записано в XML."""
+    local = etree.QName(elem).localname
+    return f'{elem.prefix}:{local}' if elem.prefix else local
+
+
+def _namespace_declarations(root):
+    """
+    Строит объявления пространств имен корня в том виде, в каком их сериализует lxml.
+
+    Returns:
+        Кортеж (весь блок объявлений, который lxml дописывает дочерним элементам,
+        список отдельных объявлений для элементов с собственными пространствами имен)
+    """
+    declarations = []
+    for prefix, uri in root.nsmap.items():
+        name = f'xmlns:{prefix}' if prefix else 'xmlns'
+        declarations.append(f' {name}="{uri}"'.encode('utf-8'))
+
+    shell = etree.Element(root.tag, nsmap=root.nsmap)
+    probe = etree.tostring(etree.SubElement(shell, W_P), encoding='UTF-8', xml_declaration=False)
+    block = probe[probe.index(b' '):-2]  # '<w:p BLOCK/>'
+    return block, declarations
+
+
+def _strip_declarations(data, namespaces):
+    """Убирает из открывающего тега объявления, уже сделанные на корневом элементе."""
+    if not namespaces:
+        return data
+    block, declarations = namespaces
+
+    end = data.index(b'>')
+    pos = data.find(block, 0, end)
+    if pos != -1:
+        return data[:pos] + data[pos + len(block):]
+
+    # Элемент объявляет собственные пространства имен, порядок другой
+    head = data[:end]
+    for declaration in declarations:
+        head = head.replace(declaration, b'', 1)
+    return head + data[end:]
+
+
+def _start_tag(elem, namespaces):
+    """Сериализует только открывающий тег контейнера (корень части или w:body)."""
+    shell = etree.Element(elem.tag, attrib=dict(elem.attrib), nsmap=elem.nsmap)
+    data = etree.tostring(shell, encoding='UTF-8', xml_declaration=False)
+    data = _strip_declarations(data, namespaces)
+    return data[:-2] + b'>'  # '<tag .../>' -> '<tag ...>'
+
+
+def _transform_paragraph(items, scanner, hits=None):
+    """
+    Применяет правила к одному параграфу.
+
+    Args:
+        items: Список пар (элемент w:t или None для разделителя, текст)
+        hits: Словарь срабатываний правил
+
+    Returns:
+        Количество правок
+    """
+    changed, edits = transform_texts([text for _, text in items], scanner, hits)
+    for index, text in changed.items():
+        items[index][0].text = text
+    return edits
+
+
+def transform_part(source, target, scanner, progress=None, hits=None):
+    """
+    Потоково обрабатывает одну XML-часть пакета (document, header или footer).
+
+    Дерево никогда не строится целиком: каждый элемент верхнего уровня
+    (w:p, w:tbl, w:sectPr) записывается в target сразу после разбора и очищается,
+    поэтому расход памяти не зависит от количества параграфов.
+
+    Args:
+        source: Файловый объект с исходным XML
+        target: Файловый объект для записи результата
+        scanner: Скомпилированный TypographyScanner
+        progress: Функция без аргументов, вызываемая после каждого параграфа
+        hits: Словарь {правило: количество правок} для подсчета срабатываний
+
+    Returns:
+        Количество правок
+    """
+    edits = 0
+    depth = 0
+    paragraphs = []  # Стек параграфов: вложенные w:p в надписях обрабатываются отдельно
+    containers = []  # Открытые контейнеры: корень части и w:body
+    namespaces = None
+
+    target.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n')
+
+    for event, elem in etree.iterparse(source, events=('start', 'end'), huge_tree=True):
+        if event == 'start':
+            depth += 1
+            if depth == 1 or (depth == 2 and elem.tag == W_BODY):
+                target.write(_start_tag(elem, namespaces))
+                if depth == 1:
+                    namespaces = _namespace_declarations(elem)
+                containers.append(elem)
+            elif elem.tag == W_P:
+                paragraphs.append([])
+            continue
+
+        if elem.tag == W_T and paragraphs:
+            paragraphs[-1].append((elem, elem.text or ''))
+        elif elem.tag in W_SEPARATORS and paragraphs:
+            paragraphs[-1].append((None, W_SEPARATORS[elem.tag]))
+        elif elem.tag == W_P:
+            edits += _transform_paragraph(paragraphs.pop(), scanner, hits)
+            if progress:
+                progress()
+
+        if containers and elem is containers[-1]:
+            containers.pop()
+            target.write(f'</{_qualified_name(elem)}>'.encode('utf-8'))
+        elif containers and elem.getparent() is containers[-1]:
+            # Элемент верхнего уровня полностью разобран: пишем его и освобождаем память
+            data = etree.tostring(elem, encoding='UTF-8', xml_declaration=False, with_tail=False)
+            target.write(_strip_declarations(data, namespaces))
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        depth -= 1
+
+    return edits
+
+
+def iter_part_paragraphs(source):
+    """
+    Потоково перебирает параграфы XML-части только для чтения.
+
+    Параграфы разбиваются на тексты так же, как в transform_part, поэтому
+    правила находят в них те же правки. Разобранные параграфы сразу очищаются.
+
+    Yields:
+        Список текстов параграфа (w:t и разделители)
+    """
+    paragraphs = []
+    for event, elem in etree.iterparse(source, events=('start', 'end'), huge_tree=True):
+        if event == 'start':
+            if elem.tag == W_P:
+                paragraphs.append([])
+            continue
+
+        if elem.tag == W_T and paragraphs:
+            paragraphs[-1].append(elem.text or '')
+        elif elem.tag in W_SEPARATORS and paragraphs:
+            paragraphs[-1].append(W_SEPARATORS[elem.tag])
+        elif elem.tag == W_P:
+            yield paragraphs.pop()
+            if not paragraphs:
+                # Параграф верхнего уровня прочитан целиком: освобождаем память
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+
+def process_package(input_path, output_path, scanner, progress_callback=None, hits=None):
+    """
+    Обрабатывает .docx без объектной модели python-docx.
+
+    Текстовые части пакета обрабатываются потоково, остальные записи архива
+    переносятся сжатыми байтами без перепаковки.
+
+    Args:
+        progress_callback: Функция (доля обработанного текста 0..1, обработано параграфов)
+        hits: Словарь {правило: количество правок} для подсчета срабатываний
+
+    Returns:
+        Количество правок во всем документе
+    """
+    edits = 0
+
+    with zipfile.ZipFile(input_path) as zin, \
+            zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zout:
+        # Части с текстом находятся по связям пакета, как в движке docx
+        text_parts = {zin.getinfo(name) for name in text_part_names(zin)}
+        total_bytes = sum(info.file_size for info in text_parts) or 1
+        done_bytes = 0
+        paragraphs = 0
+
+        for info in zin.infolist():
+            if info not in text_parts:
+                copy_raw_member(zin, zout, info)
+                continue
+
+            # Сохраняем имя и дату записи, сжатие как у python-docx
+            target_info = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            target_info.compress_type = zipfile.ZIP_DEFLATED
+
+            with zin.open(info) as source, zout.open(target_info, 'w') as target:
+                reader = _CountingReader(source)
+
+                def report(reader=reader, done=done_bytes):
+                    nonlocal paragraphs
+                    paragraphs += 1
+                    if progress_callback:
+                        progress_callback(min((done + reader.count) / total_bytes, 1.0), paragraphs)
+
+                edits += transform_part(reader, target, scanner, report, hits)
+
+            done_bytes += info.file_size
+
+    return edits
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# Модули проекта лежат в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+from docx.oxml import OxmlElement  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+
+
+def add_wrapped_run(paragraph, tag, text):
+    """Добавляет в параграф run внутри обертки (w:hyperlink, w:ins, w:smartTag)."""
+    wrapper = OxmlElement(tag)
+    if tag == 'w:ins':
+        wrapper.set(qn('w:id'), '1')
+        wrapper.set(qn('w:author'), 'test')
+    run = OxmlElement('w:r')
+    t = OxmlElement('w:t')
+    t.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+    t.text = text
+    run.append(t)
+    wrapper.append(run)
+    paragraph._p.append(wrapper)
+
+
+def make_wrapped_docx(path):
+    document = Document()
+    link = document.add_paragraph('Подробнее ')
+    add_wrapped_run(link, 'w:hyperlink', 'в разделе 5 и в приложении')
+    tracked = document.add_paragraph('Изменение ')
+    add_wrapped_run(tracked, 'w:ins', 'внесено в договор')
+    document.add_paragraph('Без оберток в тексте')
+    document.save(path)
+
+
+@pytest.fixture
+def wrapped_docx(tmp_path):
+    """Документ с текстом внутри гиперссылки и вставки при рецензировании."""
+    path = tmp_path / 'wrapped.docx'
+    make_wrapped_docx(path)
+    return path
@@ -0,0 +1,14 @@
+import pytest
+
+from analyze import analyze_document
+from logic import fix_hanging_prepositions
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_analysis_matches_processing(tmp_path, wrapped_docx, engine):
+    report = analyze_document(wrapped_docx, details=True)
+    result = fix_hanging_prepositions(wrapped_docx, tmp_path / 'out.docx', engine=engine)
+
+    assert report['edits'] == result['edits'] == 6
+    assert report['rules'] == result['metrics']['rules']
+    assert {item['paragraph'] for item in report['items']} == {1, 2, 3}
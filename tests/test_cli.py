@@ -0,0 +1,48 @@
+import os
+
+import pytest
+from docx import Document
+
+from cli import main, plan_jobs
+
+
+def make_tree(root):
+    for folder in ('a', 'b', os.path.join('b', 'c')):
+        os.makedirs(root / folder, exist_ok=True)
+        document = Document()
+        document.add_paragraph(f'Папка {folder} в архиве')
+        document.save(root / folder / 'contract.docx')
+
+
+def test_same_names_keep_their_subdirectories(tmp_path):
+    make_tree(tmp_path / 'in')
+    out = tmp_path / 'out'
+
+    code = main([str(tmp_path / 'in'), '-r', '-o', str(out)])
+
+    assert code == 0
+    for folder in ('a', 'b', os.path.join('b', 'c')):
+        text = Document(out / folder / 'contract.docx').paragraphs[0].text
+        assert text.startswith(f'Папка {folder}')
+
+
+def test_files_from_one_folder_go_flat(tmp_path):
+    files = [str(tmp_path / 'x.docx'), str(tmp_path / 'y.docx')]
+
+    jobs = plan_jobs(files, str(tmp_path / 'out'))
+
+    assert [output for _, output in jobs] == [str(tmp_path / 'out' / 'x.docx'), str(tmp_path / 'out' / 'y.docx')]
+
+
+def test_default_and_suffix_targets_are_unchanged(tmp_path):
+    path = str(tmp_path / 'a' / 'x.docx')
+
+    assert plan_jobs([path]) == [(path, str(tmp_path / 'a' / 'output_files' / 'x.docx'))]
+    assert plan_jobs([path], suffix='_fixed') == [(path, str(tmp_path / 'a' / 'x_fixed.docx'))]
+
+
+def test_duplicate_targets_are_rejected(tmp_path):
+    path = str(tmp_path / 'x.docx')
+
+    with pytest.raises(ValueError, match='один результат'):
+        plan_jobs([path, str(tmp_path / '.' / 'x.docx')], str(tmp_path / 'out'))
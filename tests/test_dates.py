@@ -0,0 +1,56 @@
+import pytest
+
+from dates import DATE_PATTERN, NBSP, find_date_spaces, normalize_dates
+
+
+def dates_in(text):
+    return [match.group() for match in DATE_PATTERN.finditer(text)]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Договор от 26 января 1990 г. подписан', ['26 января 1990 г.']),
+    ('Срок до 5 мая', ['5 мая']),
+    ('Поставка 1 мая 2024 года', ['1 мая 2024 года']),
+    ('Дата 26.01.1990 и 1990-01-26', ['26.01.1990', '1990-01-26']),
+    ('С 01.02.2023 – 15.03.2023 гг.', ['01.02.2023 – 15.03.2023 гг.']),
+    ('В 2024 г. и в 2023–2024 гг.', ['2024 г.', '2023–2024 гг.']),
+    ('Отчет за 2023 год', ['2023 год']),
+    ('Каникулы 1–5 мая', ['1–5 мая']),
+    ('С 1 мая – 5 июня 2024 года', ['1 мая – 5 июня 2024 года']),
+    ('Стиль XX века, XIX–XX вв.', ['XX века', 'XIX–XX вв.']),
+])
+def test_date_formats(text, expected):
+    assert dates_in(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    '5 домов',
+    '12 марок',
+    '3 майских дня',
+    '2024 годовой отчет',
+    'версия 2024',
+    '32 мая',
+    '1990-13-01',
+    'Ii век',
+    'XX-й век',
+    'в 2024 гг.ии',
+])
+def test_not_dates(text):
+    assert dates_in(text) == []
+
+
+def test_date_after_word_with_dot_is_ignored():
+    # Номер вида "п.26.01.1990" не дата: перед датой не должно быть буквы или точки
+    assert dates_in('п.26.01.1990') == []
+
+
+def test_spaces_inside_dates():
+    text = 'С 1 мая – 5 июня 2024 года, 26 января'
+    protected = ''.join(NBSP if index in find_date_spaces(text) else char for index, char in enumerate(text))
+
+    assert protected == f'С 1{NBSP}мая{NBSP}–{NBSP}5{NBSP}июня{NBSP}2024{NBSP}года, 26{NBSP}января'
+    assert normalize_dates('Срок 5 мая 2024 г.') == f'Срок 5{NBSP}мая{NBSP}2024{NBSP}г.'
+
+
+def test_tab_inside_date_is_kept():
+    assert normalize_dates('5\tмая') == '5\tмая'
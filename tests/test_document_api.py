@@ -0,0 +1,107 @@
+import io
+import pathlib
+
+import pytest
+from docx import Document
+
+from logic import fix_document_bytes, fix_hanging_prepositions, safe_document_handling
+
+NBSP = '\u00A0'
+
+
+def make_docx(path, text):
+    document = Document()
+    document.add_paragraph(text)
+    document.save(path)
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_pathlib_paths(tmp_path, engine):
+    source = tmp_path / 'in.docx'
+    target = tmp_path / 'out.docx'
+    make_docx(source, 'Пошел в магазин')
+
+    result = fix_hanging_prepositions(source, target, engine=engine)
+
+    assert result['status'] == 'changed'
+    assert Document(target).paragraphs[0].text == f'Пошел в{NBSP}магазин'
+    assert not pathlib.Path(str(target) + '.tmp').exists()
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_bytes_in_bytes_out(tmp_path, engine):
+    make_docx(tmp_path / 'in.docx', 'Пошел в магазин')
+    data = (tmp_path / 'in.docx').read_bytes()
+
+    output, result = fix_document_bytes(data, engine=engine)
+
+    assert result['edits'] == 1
+    assert Document(io.BytesIO(output)).paragraphs[0].text == f'Пошел в{NBSP}магазин'
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_unchanged_document_is_returned_as_is(tmp_path, engine):
+    make_docx(tmp_path / 'in.docx', 'Hello world')
+    data = (tmp_path / 'in.docx').read_bytes()
+
+    output, result = fix_document_bytes(io.BytesIO(data), engine=engine)
+
+    assert result['status'] == 'unchanged'
+    assert output == data
+
+
+@pytest.mark.parametrize('link', ['symlink', 'hardlink'])
+def test_unchanged_copy_onto_a_link_to_the_input_keeps_it(tmp_path, link):
+    source = tmp_path / 'in.docx'
+    make_docx(source, 'Hello world')
+    data = source.read_bytes()
+    target = tmp_path / 'out.docx'
+    if link == 'symlink':
+        target.symlink_to(source)
+    else:
+        target.hardlink_to(source)
+
+    result = fix_hanging_prepositions(source, target)
+
+    assert result['status'] == 'unchanged'
+    assert source.read_bytes() == data
+
+
+def test_unchanged_copy_replaces_existing_output(tmp_path):
+    source = tmp_path / 'in.docx'
+    make_docx(source, 'Hello world')
+    target = tmp_path / 'out.docx'
+    target.write_bytes(b'old result')
+
+    fix_hanging_prepositions(source, target)
+
+    assert target.read_bytes() == source.read_bytes()
+    assert not pathlib.Path(str(target) + '.tmp').exists()
+
+
+def test_safe_document_handling_yields_the_document(tmp_path):
+    source = tmp_path / 'in.docx'
+    target = tmp_path / 'out.docx'
+    make_docx(source, 'Hello world')
+
+    with safe_document_handling(source, target) as doc:
+        doc.paragraphs[0].text = 'Changed'
+
+    assert Document(target).paragraphs[0].text == 'Changed'
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_progress_callbacks(tmp_path, engine):
+    source = tmp_path / 'in.docx'
+    document = Document()
+    for number in range(3):
+        document.add_paragraph(f'Пункт {number} в договоре')
+    document.save(source)
+    fractions, paragraphs = [], []
+
+    result = fix_hanging_prepositions(source, tmp_path / 'out.docx', fractions.append, engine=engine,
+                                      paragraph_progress=lambda fraction, count: paragraphs.append(count))
+
+    assert result['paragraphs'] == 3
+    assert fractions[-1] == pytest.approx(1.0)
+    assert paragraphs == [1, 2, 3]
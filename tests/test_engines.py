@@ -0,0 +1,35 @@
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+
+from logic import fix_hanging_prepositions
+
+NBSP = '\u00A0'
+
+W_T = qn('w:t')
+
+
+def part_texts(path):
+    """Тексты всех w:t основного документа по порядку."""
+    return [t.text for t in Document(path).element.iter(W_T)]
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_runs_inside_wrappers_are_processed(tmp_path, wrapped_docx, engine):
+    target = tmp_path / f'{engine}.docx'
+
+    result = fix_hanging_prepositions(wrapped_docx, target, engine=engine)
+
+    assert result['edits'] == 6
+    texts = part_texts(target)
+    assert f'в{NBSP}разделе 5 и{NBSP}в{NBSP}приложении' in texts
+    assert f'внесено в{NBSP}договор' in texts
+
+
+def test_engines_give_identical_output(tmp_path, wrapped_docx):
+    results = {}
+    for engine in ('docx', 'stream'):
+        results[engine] = fix_hanging_prepositions(wrapped_docx, tmp_path / f'{engine}.docx', engine=engine)
+
+    assert results['docx']['edits'] == results['stream']['edits']
+    assert part_texts(tmp_path / 'docx.docx') == part_texts(tmp_path / 'stream.docx')
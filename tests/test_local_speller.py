@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from speller import SpellBackend
+
+local_speller = pytest.importorskip('local_speller')
+
+
+@pytest.fixture(scope='module')
+def speller(tmp_path_factory):
+    dictionary = tmp_path_factory.mktemp('dictionary') / 'words.txt'
+    dictionary.write_text('договор поставки заказчик ' * 200, encoding='utf-8')
+    return local_speller.LocalSpeller(dictionary_path=str(dictionary))
+
+
+def test_typo_is_corrected(speller):
+    corrections = speller.check_text('Подписан догавор поставки')
+
+    assert [(item['word'], item['s'][0]) for item in corrections] == [('догавор', 'договор')]
+
+
+def test_counters_add_up_across_threads(speller):
+    before = speller.stats()
+    texts = ['заказчек подписал догавор поставки'] * 400
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(speller.check_text, texts))
+
+    after = speller.stats()
+    assert after['checked_words'] - before['checked_words'] == 4 * len(texts)
+    assert after['corrected_words'] - before['corrected_words'] == 2 * len(texts)
+
+
+def test_backend_requires_try_check_texts():
+    class Incomplete(SpellBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        SpellBackend()
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,46 @@
+from docx import Document
+
+from logic import find_hanging_prepositions
+from matcher import PrepositionMatcher, get_matcher
+from transform import RunTextMap
+from typography import TypographyScanner
+
+WORDS = {'с', 'со', 'о', 'об', 'в', 'и'}
+
+
+def test_find_inner_prefers_longest_word():
+    matcher = PrepositionMatcher(WORDS)
+
+    assert matcher.find_inner('Со стороны об этом') == [(0, 2), (11, 13)]
+    assert matcher.find_inner('всё о нём') == [(4, 5)]
+
+
+def test_ends_with_short_word():
+    matcher = PrepositionMatcher(WORDS)
+
+    assert matcher.ends_with_short_word('Договор заключен в')
+    assert matcher.ends_with_short_word('разговор СО')
+    assert not matcher.ends_with_short_word('Договор заключен в ')
+    assert not matcher.ends_with_short_word('весь')
+
+
+def test_get_matcher_is_cached_per_word_list():
+    assert get_matcher(WORDS) is get_matcher(frozenset(WORDS))
+    assert get_matcher(WORDS) is not get_matcher(WORDS | {'к'})
+
+
+def test_find_hanging_prepositions_matches_the_scanner(tmp_path):
+    document = Document()
+    paragraph = document.add_paragraph('Жить в')
+    paragraph.add_run(' доме')
+    paragraph.add_run(' и саду с ')
+    paragraph.add_run('')
+    paragraph.add_run(' садом')
+    texts = [run.text for run in paragraph.runs]
+
+    located = find_hanging_prepositions(paragraph, get_matcher(WORDS))
+
+    scanner = TypographyScanner(WORDS, [{'name': 'prepositions', 'enabled': True}])
+    run_map = RunTextMap(texts)
+    assert located == [run_map.locate(pos) for pos in scanner.find(run_map.text)]
+    assert located == [(1, 0), (2, 2), (2, 9)]
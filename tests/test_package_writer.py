@@ -0,0 +1,71 @@
+import struct
+import zipfile
+import zlib
+
+import pytest
+from docx import Document
+
+import package_writer
+from logic import fix_hanging_prepositions
+
+MEDIA = 'word/media/image1.png'
+
+
+def png_bytes(width=64, height=64):
+    """Несжимаемая картинка PNG без сторонних библиотек."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    rows = b''.join(b'\x00' + bytes((x * 7 + y * 13) % 256 for x in range(width * 3)) for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+
+@pytest.fixture
+def picture_docx(tmp_path):
+    image = tmp_path / 'image.png'
+    image.write_bytes(png_bytes())
+    document = Document()
+    document.add_paragraph('Рисунок в приложении')
+    document.add_picture(str(image))
+    path = tmp_path / 'picture.docx'
+    document.save(path)
+    return path
+
+
+def check_output(source, target):
+    with zipfile.ZipFile(source) as original, zipfile.ZipFile(target) as result:
+        assert result.testzip() is None
+        assert result.read(MEDIA) == original.read(MEDIA)
+        return original.getinfo(MEDIA), result.getinfo(MEDIA)
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_media_is_copied_as_compressed_bytes(tmp_path, picture_docx, engine):
+    with zipfile.ZipFile(tmp_path / 'probe.zip', 'w') as probe:
+        supported = package_writer.raw_copy_supported(probe)
+    if not supported:
+        pytest.skip('перенос сжатых байтов не поддерживается этой версией Python')
+    target = tmp_path / 'out.docx'
+
+    assert fix_hanging_prepositions(picture_docx, target, engine=engine)['edits'] == 1
+
+    original, result = check_output(picture_docx, target)
+    assert (result.compress_size, result.CRC) == (original.compress_size, original.CRC)
+
+
+@pytest.mark.parametrize('engine', ['docx', 'stream'])
+def test_unsupported_python_falls_back_to_recompression(tmp_path, picture_docx, engine, monkeypatch):
+    monkeypatch.setattr(package_writer, 'RAW_COPY_PYTHON_VERSIONS', ((0, 0), (0, 0)))
+    target = tmp_path / 'out.docx'
+
+    assert fix_hanging_prepositions(picture_docx, target, engine=engine)['edits'] == 1
+
+    check_output(picture_docx, target)
+    assert Document(target).inline_shapes[0].width > 0
+
+
+def test_missing_zipfile_internals_disable_raw_copy(tmp_path, monkeypatch):
+    monkeypatch.delattr(zipfile.ZipFile, '_writecheck')
+
+    with zipfile.ZipFile(tmp_path / 'out.zip', 'w') as zout:
+        assert not package_writer.raw_copy_supported(zout)
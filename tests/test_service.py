@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from docx import Document
+
+from service import DocumentService, create_server, is_loopback, remove_stale_socket
+
+
+@pytest.fixture(scope='module')
+def server():
+    service = DocumentService(workers=1, metrics_path='')
+    server = create_server(service, '127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def post(server, path, body):
+    url = f'http://127.0.0.1:{server.server_address[1]}{path}'
+    request = urllib.request.Request(url, data=body, method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as error:
+        return error.code, error.read(), error.headers
+
+
+def docx_bytes(text):
+    buffer = io.BytesIO()
+    document = Document()
+    document.add_paragraph(text)
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_upload(server):
+    status, body, headers = post(server, '/process', docx_bytes('Пошел в магазин'))
+
+    assert status == 200
+    assert headers['X-Edits'] == '1'
+    assert Document(io.BytesIO(body)).paragraphs[0].text == 'Пошел в\u00A0магазин'
+
+
+def test_malformed_upload_is_a_client_error(server):
+    status, body, _ = post(server, '/process', b'not a docx')
+
+    assert status == 400
+    assert 'error' in json.loads(body)
+
+
+def test_pool_is_recreated_after_worker_crash(server):
+    service = server.service
+    crashed = service.executor.submit(os._exit, 1)
+    with pytest.raises(Exception):
+        crashed.result()
+
+    status, _, headers = post(server, '/process', docx_bytes('Пошел в магазин'))
+
+    assert status == 200
+    assert headers['X-Edits'] == '1'
+
+
+def test_only_loopback_hosts_are_allowed():
+    assert is_loopback('127.0.0.1')
+    assert is_loopback('localhost')
+    assert not is_loopback('0.0.0.0')
+    with pytest.raises(ValueError):
+        create_server(None, '0.0.0.0', 0)
+
+
+def test_existing_regular_file_is_not_removed(tmp_path):
+    path = tmp_path / 'service.sock'
+    path.write_text('data')
+
+    with pytest.raises(ValueError, match='не является сокетом'):
+        remove_stale_socket(str(path))
+    assert path.read_text() == 'data'
+
+
+def test_stale_socket_is_removed_and_live_one_kept(tmp_path):
+    path = str(tmp_path / 'service.sock')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    try:
+        with pytest.raises(ValueError, match='уже работает'):
+            remove_stale_socket(path)
+        assert os.path.exists(path)
+    finally:
+        listener.close()
+
+    remove_stale_socket(path)
+    assert not os.path.exists(path)
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from spell_cache import CachingSpeller, SpellCache
+
+
+class EchoSpeller:
+    """Спеллер без сети: в каждом тексте одна ошибка на всю длину."""
+
+    lang = 'ru'
+    options = 0
+
+    def try_check_texts(self, texts):
+        return [[{'pos': 0, 'len': len(text), 'word': text, 's': [text.upper()]}] for text in texts]
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def test_counters_add_up_across_threads(tmp_path):
+    speller = CachingSpeller(EchoSpeller(), SpellCache(str(tmp_path / 'cache.sqlite')))
+    batches = [[f'текст {number % 10}', f'пункт {number}'] for number in range(200)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(speller.check_texts, batches))
+
+    stats = speller.stats()
+    assert stats['cache_hits'] + stats['cache_misses'] == 2 * len(batches)
+    assert stats['cache_misses'] >= 210
+    assert results[3][1][0]['s'] == ['ПУНКТ 3']
+    speller.close()
+
+
+def test_repeated_texts_are_served_from_cache(tmp_path):
+    speller = CachingSpeller(EchoSpeller(), SpellCache(str(tmp_path / 'cache.sqlite')))
+
+    speller.check_texts(['догавор', '', 'плотеж'])
+    results = speller.check_texts(['плотеж', 'догавор'])
+
+    assert [corrections[0]['s'] for corrections in results] == [['ПЛОТЕЖ'], ['ДОГАВОР']]
+    assert speller.stats() == {'cache_hits': 2, 'cache_misses': 2}
+    speller.close()
@@ -0,0 +1,116 @@
+import pytest
+
+import speller
+from benchmarks.stand_in_speller import start_server
+from speller import MAX_REQUEST_CHARS, YandexSpeller, pack_batches
+
+
+@pytest.fixture
+def stand_in():
+    server, url = start_server()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def test_pack_batches_fills_up_to_the_limit():
+    texts = ['а' * 4000, 'б' * 4000, 'в' * 2000, 'г']
+
+    assert pack_batches(texts) == [[0, 1, 2], [3]]
+    assert sum(len(texts[i]) for i in pack_batches(texts)[0]) == MAX_REQUEST_CHARS
+
+
+def test_pack_batches_skips_empty_texts():
+    assert pack_batches(['', 'текст', '  \n', 'еще']) == [[1, 3]]
+    assert pack_batches(['', ' ']) == []
+
+
+def test_text_longer_than_the_limit_goes_alone():
+    texts = ['начало', 'д' * (MAX_REQUEST_CHARS + 1), 'конец']
+
+    assert pack_batches(texts) == [[0], [1], [2]]
+
+
+def test_text_exactly_at_the_limit_fits_one_batch():
+    assert pack_batches(['е' * MAX_REQUEST_CHARS, 'ж']) == [[0], [1]]
+
+
+def test_responses_map_back_to_their_texts(stand_in):
+    server, url = stand_in
+    texts = [
+        'Подписан догавор поставки',
+        '',
+        'Заказчек оплатил',
+        'Текст без ошибок',
+        'Исполнитиль обязуеться',
+    ]
+    speller = YandexSpeller(base_url=url, max_chars=45)
+
+    results = speller.check_texts(texts)
+
+    # Не больше 45 символов в пакете: тексты 0 и 2, 3 и 4 уходят вместе, пустой текст не отправляется
+    assert pack_batches(texts, 45) == [[0, 2], [3, 4]]
+    assert server.requests == 2
+    assert [[item['word'] for item in corrections] for corrections in results] == [
+        ['догавор'], [], ['Заказчек'], [], ['Исполнитиль', 'обязуеться'],
+    ]
+    assert results[0][0]['pos'] == texts[0].index('догавор')
+    assert results[4][1]['s'] == ['обязуется']
+    assert speller.stats() == {'requests': 2}
+
+
+def test_batched_texts_share_one_request(stand_in):
+    server, url = stand_in
+    texts = ['догавор', 'плотеж', 'заказчек']
+    speller = YandexSpeller(base_url=url)
+
+    results = speller.check_texts(texts)
+
+    assert server.requests == 1
+    assert [corrections[0]['s'] for corrections in results] == [['договор'], ['платеж'], ['заказчик']]
+
+
+def test_failed_batch_returns_none_for_its_texts():
+    # Порт 1 закрыт: запросы завершаются ошибкой соединения без повторов
+    speller = YandexSpeller(base_url='http://127.0.0.1:1', retries=0, timeout=(0.5, 0.5))
+
+    assert speller.try_check_texts(['догавор', '', 'плотеж']) == [None, [], None]
+    assert speller.check_texts(['догавор']) == [[]]
+
+
+class FakeConfig:
+    def __init__(self, **settings):
+        self.settings = settings
+
+    def get(self, name):
+        return self.settings.get(name)
+
+
+class FakeBackend:
+    def __init__(self, config):
+        self.url = config.get('speller_url')
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_shared_speller_follows_config_changes(monkeypatch):
+    config = FakeConfig(spell_backend='yandex', speller_url='http://127.0.0.1:1')
+    monkeypatch.setattr(speller, 'current_config', lambda: config)
+    monkeypatch.setattr(speller, 'create_speller', FakeBackend)
+    monkeypatch.setattr(speller, '_default_speller', None)
+    monkeypatch.setattr(speller, '_default_speller_key', None)
+
+    first = speller.get_speller()
+    assert speller.get_speller() is first
+
+    # Настройки, не относящиеся к спеллеру, его не пересоздают
+    config = FakeConfig(spell_backend='yandex', speller_url='http://127.0.0.1:1', coalesce_runs=True)
+    assert speller.get_speller() is first
+
+    config = FakeConfig(spell_backend='yandex', speller_url='http://127.0.0.1:2')
+    second = speller.get_speller()
+    assert second is not first
+    assert second.url == 'http://127.0.0.1:2'
+    assert first.closed and not second.closed
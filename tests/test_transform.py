@@ -0,0 +1,108 @@
+from dates import NBSP
+from transform import RunTextMap, apply_corrections, apply_edits, transform_texts
+from typography import TypographyScanner
+
+SCANNER = TypographyScanner({'в', 'и'}, [{'name': 'prepositions', 'enabled': True}])
+
+
+def correction(text, word, suggestion):
+    return {'pos': text.index(word), 'len': len(word), 'word': word, 's': [suggestion]}
+
+
+def test_locate_skips_empty_runs():
+    run_map = RunTextMap(['в', '', ' ', 'доме'])
+
+    assert run_map.text == 'в доме'
+    assert run_map.locate(0) == (0, 0)
+    assert run_map.locate(1) == (2, 0)
+    assert run_map.locate(2) == (3, 0)
+    assert run_map.locate(5) == (3, 3)
+
+
+def test_correction_inside_one_run():
+    run_map = RunTextMap(['Подписан ', 'догавор', ' поставки'])
+
+    changed, applied = apply_corrections(run_map, [correction(run_map.text, 'догавор', 'договор')])
+
+    assert applied == 1
+    assert changed == {1: 'договор'}
+
+
+def test_correction_spanning_runs_goes_to_the_first_run():
+    # Слово разбито на три runs, например из-за правки с отслеживанием изменений
+    run_map = RunTextMap(['Подписан дог', 'а', 'вор поставки'])
+
+    changed, applied = apply_corrections(run_map, [correction(run_map.text, 'догавор', 'договор')])
+
+    assert applied == 1
+    assert changed == {0: 'Подписан договор', 1: '', 2: ' поставки'}
+
+
+def test_several_corrections_in_one_run_keep_offsets():
+    run_map = RunTextMap(['догавор и плотеж'])
+    text = run_map.text
+
+    changed, applied = apply_corrections(run_map, [
+        correction(text, 'плотеж', 'платеж'),
+        correction(text, 'догавор', 'договорчик'),
+    ])
+
+    assert applied == 2
+    assert changed == {0: 'договорчик и платеж'}
+
+
+def test_overlapping_correction_is_skipped():
+    run_map = RunTextMap(['догавор поставки'])
+    first = {'pos': 0, 'len': 7, 'word': 'догавор', 's': ['договор']}
+    overlapping = {'pos': 3, 'len': 8, 'word': 'авор пос', 's': ['x']}
+
+    changed, applied = apply_corrections(run_map, [overlapping, first])
+
+    assert applied == 1
+    assert changed == {0: 'договор поставки'}
+
+
+def test_out_of_range_and_mismatched_corrections_are_skipped():
+    run_map = RunTextMap(['догавор'])
+
+    changed, applied = apply_corrections(run_map, [
+        {'pos': 5, 'len': 10, 's': ['x']},
+        {'pos': 20, 'len': 2, 's': ['x']},
+        {'pos': 0, 'len': 0, 's': ['x']},
+        {'pos': 0, 'len': 7, 's': []},
+        {'pos': 0, 'len': 7, 'word': 'договор', 's': ['x']},
+    ])
+
+    assert applied == 0
+    assert changed == {}
+
+
+def test_correction_after_tab_and_break_separators():
+    # В потоковом движке w:tab и w:br приходят отдельными текстами
+    run_map = RunTextMap(['Пункт', '\t', 'догавор', '\n', 'плотеж'])
+    text = run_map.text
+
+    changed, applied = apply_corrections(run_map, [
+        correction(text, 'догавор', 'договор'),
+        correction(text, 'плотеж', 'платеж'),
+    ])
+
+    assert applied == 2
+    assert changed == {2: 'договор', 4: 'платеж'}
+
+
+def test_separators_are_not_replaced_with_nbsp():
+    changed, edits = transform_texts(['в', '\t', 'доме и', '\n', 'саду'], SCANNER)
+
+    assert edits == 0
+    assert changed == {}
+
+
+def test_edits_are_mapped_to_runs():
+    run_map = RunTextMap(['Жить в', ' доме', ' и саду'])
+    positions = SCANNER.find(run_map.text)
+
+    assert positions == [6, 13]
+    changed = apply_edits(run_map, positions)
+
+    assert changed == {1: NBSP + 'доме', 2: ' и' + NBSP + 'саду'}
@@ -0,0 +1,51 @@
+import logging
+
+from typography import TypographyScanner
+
+NBSP_RULES = [{'name': 'prepositions', 'enabled': True}]
+
+
+def scanner_with(*rules):
+    return TypographyScanner({'в'}, NBSP_RULES + list(rules))
+
+
+def test_leading_global_flags_become_scoped():
+    scanner = scanner_with({'name': 'units', 'pattern': r'(?i)\d+\sкг'})
+
+    assert scanner.rules == ['prepositions', 'units']
+    hits = {}
+    assert scanner.find('в доме 5 КГ', hits) == [1, 8]
+    assert hits == {'prepositions': 1, 'units': 1}
+
+
+def test_global_flags_in_the_middle_skip_only_that_rule(caplog):
+    with caplog.at_level(logging.WARNING):
+        scanner = scanner_with({'name': 'broken', 'pattern': r'\d+(?i)\sкг'})
+
+    assert scanner.rules == ['prepositions']
+    assert 'broken' in caplog.text
+    assert scanner.find('в доме') == [1]
+
+
+def test_invalid_pattern_is_skipped(caplog):
+    with caplog.at_level(logging.WARNING):
+        scanner = scanner_with({'name': 'broken', 'pattern': r'(\d+'}, {'name': 'numero', 'pattern': r'№\s(?=\d)'})
+
+    assert scanner.rules == ['prepositions', 'numero']
+    assert scanner.find('№ 5 в доме') == [1, 5]
+
+
+def test_duplicate_group_names_across_rules_are_skipped(caplog):
+    with caplog.at_level(logging.WARNING):
+        scanner = scanner_with({'name': 'first', 'pattern': r'(?P<n>\d+)\sкг'},
+                               {'name': 'second', 'pattern': r'(?P<n>\d+)\sгг'})
+
+    assert scanner.rules == ['prepositions', 'first']
+    assert 'second' in caplog.text
+
+
+def test_disabled_rules_are_not_compiled():
+    scanner = scanner_with({'name': 'units', 'enabled': False, 'pattern': r'\d+\sкг'})
+
+    assert scanner.rules == ['prepositions']
+    assert scanner.find('5 кг') == []
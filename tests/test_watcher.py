@@ -0,0 +1,87 @@
+import os
+import shutil
+import threading
+import time
+
+from docx import Document
+
+from watcher import FolderWatcher
+
+
+class RecordingService:
+    """Сервис для FolderWatcher: копирует документ и при первом вызове подменяет исходный файл."""
+
+    workers = 1
+    options = {'engine': 'docx'}
+
+    def __init__(self, change_during_processing=None):
+        self.calls = []
+        self.change_during_processing = change_during_processing
+        self._lock = threading.Lock()
+
+    def process_path(self, input_path, output_path):
+        with self._lock:
+            self.calls.append(input_path)
+            first = len(self.calls) == 1
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        shutil.copyfile(input_path, output_path + '.source')
+        if first and self.change_during_processing:
+            self.change_during_processing(input_path)
+        os.replace(output_path + '.source', output_path)
+        return {'edits': 0, 'status': 'unchanged'}
+
+
+def make_docx(path, text):
+    document = Document()
+    document.add_paragraph(text)
+    document.save(path)
+
+
+def settle(watcher, path, timeout=10.0):
+    """Ставит файл в ожидание и дожидается, пока watcher отправит и обработает его."""
+    watcher._notice(path)
+    watcher._check_waiting()  # первое наблюдение размера и времени изменения
+    watcher._check_waiting()
+    deadline = time.monotonic() + timeout
+    while watcher.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not watcher.active
+
+
+def test_file_modified_during_processing_is_processed_again(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    path = str(inbox / 'contract.docx')
+    make_docx(path, 'Первая версия')
+
+    service = RecordingService(lambda input_path: make_docx(input_path, 'Вторая версия, подлиннее первой'))
+    watcher = FolderWatcher([str(inbox)], service, settle=0, polling=True, interval=0.1)
+    try:
+        settle(watcher, path)
+        assert len(service.calls) == 1
+
+        # Изменение во время обработки: файл должен уйти в обработку еще раз
+        settle(watcher, path)
+        assert len(service.calls) == 2
+
+        # Теперь результат соответствует файлу: повторно он не обрабатывается
+        settle(watcher, path)
+        assert len(service.calls) == 2
+    finally:
+        watcher.close()
+
+
+def test_unchanged_file_is_not_processed_again(tmp_path):
+    inbox = tmp_path / 'inbox'
+    inbox.mkdir()
+    path = str(inbox / 'letter.docx')
+    make_docx(path, 'Текст письма')
+
+    service = RecordingService()
+    watcher = FolderWatcher([str(inbox)], service, settle=0, polling=True, interval=0.1)
+    try:
+        settle(watcher, path)
+        settle(watcher, path)
+        assert len(service.calls) == 1
+    finally:
+        watcher.close()
@@ -0,0 +1,152 @@
+from bisect import bisect_right
+
+from dates import BREAKABLE_SPACE, NBSP
+from matcher import get_matcher
+from typography import get_scanner
+
+
+class RunTextMap:
+    """
+    Склеенный текст параграфа с таблицей смещений обратно в runs.
+
+    Пустые runs (например, служебные runs форматирования) не занимают места
+    в склеенном тексте и поэтому больше не прячут предлог от следующего пробела.
+    """
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.starts = []
+        offset = 0
+        for text in self.texts:
+            self.starts.append(offset)
+            offset += len(text)
+        self.text = ''.join(self.texts)
+
+    def locate(self, pos):
+        """Возвращает (индекс run, позиция внутри run) для позиции в склеенном тексте."""
+        index = bisect_right(self.starts, pos) - 1
+        return index, pos - self.starts[index]
+
+
+def find_preposition_spaces(text, matcher=None):
+    """Возвращает позиции пробелов сразу после коротких слов."""
+    if matcher is None:
+        matcher = get_matcher()
+    return {end for _, end in matcher.find_inner(text) if BREAKABLE_SPACE.match(text, end)}
+
+
+def find_edits(text, scanner=None, hits=None):
+    """
+    Находит все правки в склеенном тексте параграфа за один проход по нему.
+
+    Args:
+        scanner: TypographyScanner со всеми включенными правилами (по умолчанию из настроек)
+        hits: Словарь {правило: количество правок} для подсчета срабатываний
+
+    Returns:
+        Отсортированный список позиций, где пробел заменяется на неразрывный
+    """
+    if scanner is None:
+        scanner = get_scanner()
+    return scanner.find(text, hits)
+
+
+def fix_text(text, scanner=None, hits=None):
+    """
+    Применяет правила типографики к строке без документа.
+
+    Returns:
+        Текст, в котором найденные пробелы заменены на неразрывные
+    """
+    positions = find_edits(text, scanner, hits)
+    if not positions:
+        return text
+    chars = list(text)
+    for position in positions:
+        chars[position] = NBSP
+    return ''.join(chars)
+
+
+def apply_edits(run_map, positions):
+    """
+    Применяет правки к текстам runs.
+
+    Returns:
+        Словарь {индекс run: новый текст} только для runs, текст которых изменился
+    """
+    chars_by_run = {}
+    for pos in positions:
+        index, local = run_map.locate(pos)
+        chars = chars_by_run.get(index)
+        if chars is None:
+            chars = chars_by_run[index] = list(run_map.texts[index])
+        chars[local] = NBSP
+
+    return {index: ''.join(chars) for index, chars in chars_by_run.items()}
+
+
+def apply_corrections(run_map, corrections):
+    """
+    Применяет исправления спеллера, заданные смещениями в склеенном тексте параграфа.
+
+    Каждое исправление раскладывается по runs через таблицу смещений: замена
+    попадает в run, где начинается слово, а остаток слова удаляется из следующих runs.
+    Затем каждый затронутый run собирается один раз, правки идут справа налево,
+    поэтому смещения еще не примененных правок не сдвигаются.
+
+    Пропускаются исправления без вариантов, выходящие за пределы текста,
+    пересекающиеся с предыдущими и не совпадающие с текстом (поле 'word').
+
+    Returns:
+        Кортеж (словарь {индекс run: новый текст} для измененных runs, количество примененных исправлений)
+    """
+    text = run_map.text
+    edits_by_run = {}
+    applied = 0
+    last_end = 0
+    for error in sorted(corrections, key=lambda error: error.get('pos', 0)):
+        start = error.get('pos', 0)
+        end = start + error.get('len', 0)
+        suggestions = error.get('s')
+        if not suggestions or start < last_end or end <= start or end > len(text):
+            continue
+        if 'word' in error and text[start:end] != error['word']:
+            continue
+
+        first, local_start = run_map.locate(start)
+        last, local_end = run_map.locate(end - 1)
+        replacement = suggestions[0]
+        for index in range(first, last + 1):
+            run_start = local_start if index == first else 0
+            run_end = local_end + 1 if index == last else len(run_map.texts[index])
+            if run_start < run_end:
+                edits_by_run.setdefault(index, []).append((run_start, run_end, replacement))
+                replacement = ''
+        applied += 1
+        last_end = end
+
+    changed = {}
+    for index, edits in edits_by_run.items():
+        run_text = run_map.texts[index]
+        pieces = []
+        tail = len(run_text)
+        for run_start, run_end, replacement in reversed(edits):
+            pieces.append(run_text[run_end:tail])
+            pieces.append(replacement)
+            tail = run_start
+        pieces.append(run_text[:tail])
+        changed[index] = ''.join(reversed(pieces))
+    return changed, applied
+
+
+def transform_texts(texts, scanner=None, hits=None):
+    """
+    Обрабатывает тексты runs одного параграфа правилами типографики:
+    висячие предлоги, даты, инициалы, сокращения и т.д.
+
+    Returns:
+        Кортеж (словарь измененных runs, количество правок)
+    """
+    run_map = RunTextMap(texts)
+    positions = find_edits(run_map.text, scanner, hits)
+    return apply_edits(run_map, positions), len(positions)
@@ -0,0 +1,137 @@
+import re
+import json
+import logging
+from functools import lru_cache
+
+from config import current_config
+from dates import BREAKABLE_SPACE, DATE_PATTERN
+from matcher import get_matcher
+
+# Правила, шаблон которых строится в коде: список предлогов меняется в настройках,
+# а даты описаны в модуле dates
+BUILTIN_RULES = ('prepositions', 'dates')
+
+# Глобальные флаги в начале шаблона правила: внутри общего выражения они запрещены
+GLOBAL_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+
+
+def _builtin_pattern(name, words):
+    """Шаблон встроенного правила."""
+    if name == 'prepositions':
+        # Предлог вместе с одним пробелом после него
+        return rf'(?<!\w)(?i:{get_matcher(words).alternation})[^\S\t\n\r\v\f\u00A0]'
+    return rf'(?i:{DATE_PATTERN.pattern})'
+
+
+class TypographyScanner:
+    """
+    Все включенные правила неразрывных пробелов, собранные в одно регулярное выражение.
+
+    Правило задается шаблоном: все обычные пробелы внутри совпадения заменяются
+    на неразрывные. В каждой позиции текста правила пробуются в порядке реестра,
+    совпадения не пересекаются, поэтому параграф просматривается один раз.
+    Нумерованные обратные ссылки (\\1) в шаблонах правил не поддерживаются:
+    после объединения номера групп сдвигаются. Глобальные флаги в начале шаблона
+    ("(?i)...") превращаются в флаги группы ("(?i:...)"); правило, которое не
+    компилируется в составе общего выражения, пропускается с предупреждением.
+    """
+
+    def __init__(self, words, rules):
+        self.rules = []
+        self._names = {}
+        branches = []
+        for rule in rules:
+            name = rule.get('name')
+            if not name or not rule.get('enabled', True):
+                continue
+            pattern = rule.get('pattern')
+            if pattern is None:
+                if name not in BUILTIN_RULES:
+                    logging.warning(f"Правило типографики {name} без шаблона пропущено")
+                    continue
+                pattern = _builtin_pattern(name, words)
+            else:
+                flags = GLOBAL_FLAGS.match(pattern)
+                if flags:
+                    pattern = f'(?{flags.group(1)}:{pattern[flags.end():]})'
+                if rule.get('ignore_case'):
+                    pattern = f'(?i:{pattern})'
+
+            group = f'_rule{len(self.rules)}'
+            branch = f'(?P<{group}>{pattern})'
+            try:
+                # Проверяем правило в составе общего выражения: так же обнаруживаются
+                # совпадающие имена групп в разных правилах
+                re.compile('|'.join(branches + [branch]))
+            except re.error as e:
+                logging.warning(f"Правило типографики {name} пропущено, ошибка в шаблоне: {e}")
+                continue
+
+            self._names[group] = name
+            self.rules.append(name)
+            branches.append(branch)
+
+        self.pattern = re.compile('|'.join(branches)) if branches else None
+
+    def find(self, text, hits=None):
+        """
+        Находит пробелы для замены на неразрывные за один проход по тексту.
+
+        Args:
+            hits: Словарь {правило: количество пробелов}, в который добавляются результаты
+
+        Returns:
+            Отсортированный список позиций
+        """
+        positions = []
+        if self.pattern is None:
+            return positions
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            found = [space.start() for space in BREAKABLE_SPACE.finditer(text, start, end)]
+            if found:
+                positions.extend(found)
+                if hits is not None:
+                    name = self._names[match.lastgroup]
+                    hits[name] = hits.get(name, 0) + len(found)
+        return positions
+
+    def matches(self, text):
+        """
+        Перебирает совпадения правил с указанием правила (для анализа без правок).
+
+        Yields:
+            Пары (имя правила, список позиций пробелов для замены)
+        """
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            found = [space.start() for space in BREAKABLE_SPACE.finditer(text, start, end)]
+            if found:
+                yield self._names[match.lastgroup], found
+
+
+@lru_cache(maxsize=8)
+def _cached_scanner(words, rules):
+    return TypographyScanner(words, json.loads(rules))
+
+
+def get_scanner(words=None, rules=None, config=None):
+    """
+    Возвращает скомпилированный сканер для списка предлогов и реестра правил.
+
+    Сканер кэшируется по содержимому слов и правил: пока настройки не изменились,
+    повторный вызов не компилирует ничего заново.
+
+    Args:
+        words: Предлоги и союзы (по умолчанию short_words из снимка настроек)
+        rules: Список правил (по умолчанию настройка typography_rules)
+        config: Снимок настроек config.ConfigSnapshot (по умолчанию текущий)
+    """
+    if config is None:
+        config = current_config()
+    if words is None:
+        words = config.short_words
+    rules_key = config.rules_key if rules is None else json.dumps(rules, ensure_ascii=False, sort_keys=True)
+    return _cached_scanner(frozenset(words), rules_key)
@@ -1,10 +1,12 @@
 import os
 import threading
 import ttkbootstrap as ttk
-from tkinter import filedialog, messagebox, StringVar, BooleanVar
+from tkinter import filedialog, messagebox, StringVar, BooleanVar, TclError
 from ttkbootstrap.constants import *
-from config import SHORT_WORDS, save_short_words
+from config import current_config, load_short_words, save_short_words
 from logic import fix_hanging_prepositions
+from batch import BatchExecutor, resolve_workers
+from progress import describe_progress
 import logging
 
 
@@ -12,7 +14,7 @@ def fix_hanging_prepositions_and_dates(input_path, output_path, progress_callbac
     """
     Обертка для совместимости с ui.py
     """
-    fix_hanging_prepositions(input_path, output_path, progress_callback)
+    return fix_hanging_prepositions(input_path, output_path, progress_callback)
 
 class Application:
     def __init__(self, root):
@@ -28,6 +30,12 @@ class Application:
         self.total_files = 0
 
         self.spellcheck_var = BooleanVar(value=False)
+        self.incremental_var = BooleanVar(value=False)
+        self.workers_var = ttk.IntVar(value=resolve_workers())
+
+        # Редактируемый список слов вкладки "Настройки"; меняется только в потоке интерфейса,
+        # обработка получает неизменяемую копию
+        self.short_words = load_short_words()
 
         # Создаем интерфейс
         self.create_ui()
@@ -111,6 +119,32 @@ class Application:
         )
         spellcheck_checkbox.pack(anchor=W)
 
+        # Повторная обработка папки: пропуск файлов, не изменившихся с прошлого запуска
+        incremental_checkbox = ttk.Checkbutton(
+            spellcheck_frame,
+            text="Пропускать уже обработанные и не измененные файлы",
+            variable=self.incremental_var,
+            bootstyle="success-round-toggle"
+        )
+        incremental_checkbox.pack(anchor=W, pady=(5, 0))
+
+        # Количество процессов для пакетной обработки папки
+        workers_frame = ttk.Frame(parent)
+        workers_frame.pack(fill=X, padx=20, pady=5)
+
+        ttk.Label(
+            workers_frame,
+            text="Процессов для обработки папки:"
+        ).pack(side=LEFT)
+
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.workers_var,
+            width=5
+        ).pack(side=LEFT, padx=5)
+
         # Существующий информационный текст
         info_frame = ttk.LabelFrame(parent, text="Информация")
         info_frame.pack(fill=BOTH, expand=YES, padx=20, pady=10)
@@ -164,7 +198,7 @@ class Application:
         self.words_listbox.configure(yscrollcommand=scrollbar.set)
 
         # Загружаем данные в список
-        for word in sorted(SHORT_WORDS):
+        for word in sorted(self.short_words):
             self.words_listbox.insert("", END, values=(word,))
 
         # Правая часть - кнопки управления
@@ -226,7 +260,7 @@ class Application:
 
         # Добавляем в визуальный список и в набор
         self.words_listbox.insert("", END, values=(word,))
-        SHORT_WORDS.add(word)
+        self.short_words.add(word)
         self.new_word_var.set("")  # Очищаем поле ввода
 
     def delete_word(self):
@@ -238,11 +272,11 @@ class Application:
 
         word = self.words_listbox.item(selected[0])["values"][0]
         self.words_listbox.delete(selected[0])
-        SHORT_WORDS.discard(word)
+        self.short_words.discard(word)
 
     def save_changes(self):
         """Сохраняет изменения в списке слов."""
-        if save_short_words(SHORT_WORDS):
+        if save_short_words(self.short_words):
             messagebox.showinfo("Успех", "Изменения сохранены")
         else:
             messagebox.showerror("Ошибка", "Не удалось сохранить изменения")
@@ -284,46 +318,31 @@ class Application:
         # Обновляем UI
         self.root.update_idletasks()
 
-    def process_worker(self, files, output_dir):
-        """Рабочая функция для обработки файлов в отдельном потоке."""
-        errors = []
-        successful_files = 0
-
-        for i, file_path in enumerate(files):
-            output_path = os.path.join(output_dir, os.path.basename(file_path))
-
-            try:
-                logging.info(f"Начало обработки файла: {file_path}")
-
-                self.root.after(0, lambda i=i: self.status_var.set(f"Обработка файла {i + 1} из {len(files)}"))
-
-                # Вызываем функцию с параметром спеллчекера
-                fix_hanging_prepositions(
-                    file_path,
-                    output_path,
-                    lambda p, i=i: self.root.after(0, lambda: self.update_progress(i, p, len(files))),
-                    with_spellcheck=self.spellcheck_var.get()
-                )
-
-                successful_files += 1
-                logging.info(f"Файл успешно обработан: {output_path}")
+    def process_worker(self, files, output_dir, short_words, options):
+        """
+        Рабочая функция для обработки файлов в отдельном потоке.
 
-            except FileNotFoundError as e:
-                error_message = f"Файл не найден: {file_path}"
-                errors.append(error_message)
-                logging.error(error_message)
-
-            except PermissionError as e:
-                error_message = f"Нет доступа к файлу или файл открыт: {file_path}"
-                errors.append(error_message)
-                logging.error(error_message)
+        Переменные Tk здесь не читаются: настройки (options) собраны в process_files.
+        processing_complete вызывается всегда, даже если пакет прервался ошибкой.
+        """
+        summary = {'successful': 0, 'errors': [], 'unchanged': 0, 'skipped': 0}
+        try:
+            jobs = [(file_path, os.path.join(output_dir, os.path.basename(file_path))) for file_path in files]
 
-            except Exception as e:
-                error_message = f"Ошибка обработки файла {file_path}: {str(e)}"
-                errors.append(error_message)
-                logging.error(error_message, exc_info=True)
+            executor = BatchExecutor(short_words=short_words, **options)
+            summary = executor.run(
+                jobs,
+                on_progress=lambda event: self.root.after(0, lambda: self.update_batch_progress(event))
+            )
 
-        self.root.after(0, lambda: self.processing_complete(successful_files, errors))
+            if summary['spellcheck']:
+                logging.info(f"Счетчики спеллера за пакет: {summary['spellcheck']}")
+        except Exception as e:
+            logging.error(f"Ошибка пакетной обработки: {e}", exc_info=True)
+            summary['errors'] = summary['errors'] + [f"Обработка прервана: {e}"]
+        finally:
+            self.root.after(0, self.processing_complete, summary['successful'], summary['errors'],
+                            summary['unchanged'], summary['skipped'])
 
     def update_progress(self, file_index, file_progress, total_files):
         """Обновляет прогресс обработки файлов."""
@@ -338,13 +357,26 @@ class Application:
         # Обновляем UI
         self.root.update_idletasks()
 
-    def processing_complete(self, successful_files, errors):
+    def update_batch_progress(self, event):
+        """Обновляет прогресс пакетной обработки по событию ProgressEvent."""
+        self.progress_var.set(event.fraction * 100)
+        self.status_var.set(describe_progress(event))
+
+        # Обновляем UI
+        self.root.update_idletasks()
+
+    def processing_complete(self, successful_files, errors, unchanged_files=0, skipped_files=0):
         """Вызывается после завершения обработки всех файлов."""
+        # Файлы без правок копируются как есть, сообщаем об этом отдельной строкой
+        unchanged_note = f"\nБез изменений: {unchanged_files}" if unchanged_files else ""
+        if skipped_files:
+            unchanged_note += f"\nПропущено (не изменились с прошлого запуска): {skipped_files}"
+
         # Показываем сообщение о результатах обработки
         if len(errors) > 0:
             # Если есть ошибки, но были успешные файлы
             if successful_files > 0:
-                message = f"Обработано успешно: {successful_files} файлов\n\nОшибки ({len(errors)}):\n"
+                message = f"Обработано успешно: {successful_files} файлов{unchanged_note}\n\nОшибки ({len(errors)}):\n"
                 # Показываем первые 3 ошибки, чтобы не перегружать окно
                 for i, error in enumerate(errors[:3]):
                     message += f"\n{i + 1}. {error}"
@@ -353,11 +385,11 @@ class Application:
 
                 messagebox.showwarning("Обработка завершена с ошибками", message)
             else:
-                # Если все файлы с ошибками
-                messagebox.showerror("Ошибка", f"Не удалось обработать файлы. Ошибок: {len(errors)}")
+                # Если все файлы с ошибками, показываем первую
+                messagebox.showerror("Ошибка", f"Не удалось обработать файлы. Ошибок: {len(errors)}\n\n{errors[0]}")
         else:
             # Если всё успешно
-            messagebox.showinfo("✅ Готово!", f"Успешно обработано файлов: {successful_files}")
+            messagebox.showinfo("✅ Готово!", f"Успешно обработано файлов: {successful_files}{unchanged_note}")
 
         # Сбрасываем статус и прогресс
         self.status_var.set("Готов к работе")
@@ -368,6 +400,20 @@ class Application:
         if not files:
             return
 
+        # Настройки читаем здесь, в потоке интерфейса: переменные Tk нельзя трогать из рабочего потока
+        try:
+            workers = self.workers_var.get()
+        except (TclError, ValueError):
+            workers = 0
+        if workers < 1:
+            messagebox.showerror("Ошибка", "Количество процессов должно быть целым числом не меньше 1")
+            return
+        options = {
+            'workers': workers,
+            'with_spellcheck': self.spellcheck_var.get(),
+            'incremental': self.incremental_var.get(),
+        }
+
         # Настраиваем каталог для выходных файлов
         output_dir = os.path.join(os.path.dirname(files[0]), "output_files")
         os.makedirs(output_dir, exist_ok=True)
@@ -380,10 +426,16 @@ class Application:
         # Обновляем статус
         self.status_var.set(f"Подготовка к обработке {len(files)} файлов...")
 
+        # Копию списка слов берем здесь, в потоке интерфейса. Несохраненные изменения
+        # передаются явно, иначе действуют настройки из файла
+        short_words = frozenset(self.short_words)
+        if short_words == current_config().short_words:
+            short_words = None
+
         # Запускаем обработку в отдельном потоке
         worker_thread = threading.Thread(
             target=self.process_worker,
-            args=(files, output_dir),
+            args=(files, output_dir, short_words, options),
             daemon=True
         )
         worker_thread.start()
@@ -0,0 +1,359 @@
+"""
+Наблюдение за папками: новые и измененные .docx обрабатываются по мере поступления.
+
+В Linux изменения приходят через inotify, в остальных системах (или с --polling)
+папки периодически сканируются. Файл уходит в обработку, только когда его размер
+и время изменения не меняются settle секунд и он читается как zip-архив, то есть
+запись закончена. Файлы блокировки Word (~$*.docx) пропускаются. Результаты
+пишутся в output_files рядом с исходными файлами, обработанные файлы отмечаются
+в манифесте и после перезапуска повторно не обрабатываются.
+
+Запуск из корня проекта:
+    python watcher.py inbox/ -j 4
+    python watcher.py inbox/ scans/ --settle 5 --polling --interval 2
+"""
+import os
+import sys
+import time
+import select
+import signal
+import struct
+import logging
+import zipfile
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from cli import is_docx, output_path_for
+from manifest import ManifestSet
+from service import DocumentService, percentile
+
+# События inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+# Через сколько секунд ожидания напоминать о файле, который так и не стал целым архивом
+STALLED_WARNING = 60.0
+
+
+class InotifySource:
+    """Изменения в папках через inotify (только Linux, через ctypes без сторонних библиотек)."""
+
+    def __init__(self, directories):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        self.directories = {}
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        for directory in directories:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, os.strerror(errno), directory)
+            self.directories[wd] = directory
+
+    def wait(self, timeout):
+        """
+        Ждет изменений не дольше timeout секунд.
+
+        Returns:
+            Список измененных путей или None, если события потеряны и папки нужно пересканировать
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                logging.warning(f"Папка больше не отслеживается: {self.directories.pop(wd, wd)}")
+            elif name and wd in self.directories:
+                paths.append(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Изменения в папках через периодическое сканирование (размер и время изменения файлов)."""
+
+    def __init__(self, directories, interval=1.0):
+        self.directories = list(directories)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                logging.warning(f"Не удалось прочитать папку {directory}: {e}")
+        return snapshot
+
+    def wait(self, timeout):
+        """Ждет до следующего сканирования. Returns: список новых и измененных путей."""
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = [path for path, state in snapshot.items() if self._snapshot.get(path) != state]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_source(directories, polling=False, interval=1.0):
+    """Создает источник изменений: inotify, если он доступен, иначе сканирование."""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifySource(directories)
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify недоступен, папки будут сканироваться каждые {interval} с: {e}")
+    return PollingSource(directories, interval)
+
+
+def list_documents(directories):
+    """Документы, уже лежащие в папках на момент запуска."""
+    paths = []
+    for directory in directories:
+        try:
+            paths.extend(sorted(os.path.join(directory, name) for name in os.listdir(directory)))
+        except OSError as e:
+            logging.warning(f"Не удалось прочитать папку {directory}: {e}")
+    return [path for path in paths if is_docx(path) and os.path.isfile(path)]
+
+
+class FolderWatcher:
+    """
+    Следит за папками и передает дописанные документы в пул DocumentService.
+
+    Очередь (backlog) - файлы, которые дописаны и ждут воркера или обрабатываются.
+    Задержка файла считается от его обнаружения до готового результата,
+    включая ожидание окончания записи.
+    """
+
+    def __init__(self, directories, service, settle=2.0, polling=False, interval=1.0, report_interval=30.0,
+                 clock=time.monotonic):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.service = service
+        self.settle = settle
+        self.report_interval = report_interval
+        self.clock = clock
+        self.source = create_source(self.directories, polling, interval)
+        self.manifests = ManifestSet(service.options)
+        self.dispatcher = ThreadPoolExecutor(max_workers=service.workers)
+
+        self.waiting = {}  # путь -> [размер, mtime_ns, время последнего изменения, время обнаружения]
+        self.active = set()  # Пути, отправленные в обработку
+        self.stalled = set()  # Пути, о которых уже предупредили
+        self.latencies = []
+        self.processed = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._last_report = clock()
+        self._last_status = None
+
+    def _notice(self, path):
+        """Ставит документ на ожидание окончания записи."""
+        if is_docx(path) and path not in self.waiting:
+            now = self.clock()
+            self.waiting[path] = [None, None, now, now]
+
+    def _check_waiting(self):
+        """Отправляет в обработку файлы, которые перестали меняться."""
+        now = self.clock()
+        for path, entry in list(self.waiting.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Файл удалили или переименовали, не дождавшись обработки
+                del self.waiting[path]
+                continue
+
+            state = [stat.st_size, stat.st_mtime_ns]
+            if entry[:2] != state:
+                entry[:3] = state + [now]
+                continue
+            if now - entry[2] < self.settle:
+                continue
+            if not zipfile.is_zipfile(path):
+                # Размер не меняется, но архив неполный: копирование могло приостановиться
+                if now - entry[3] >= STALLED_WARNING and path not in self.stalled:
+                    logging.warning(f"Файл давно не меняется, но не читается как .docx: {path}")
+                    self.stalled.add(path)
+                continue
+
+            output_path = output_path_for(path)
+            with self._lock:
+                if path in self.active:
+                    # Файл изменили во время обработки: проверим его снова после завершения
+                    continue
+                del self.waiting[path]
+                self.stalled.discard(path)
+                pending, _ = self.manifests.split([(path, output_path)])
+                if not pending:
+                    logging.info(f"Файл не изменился с прошлой обработки, пропущен: {path}")
+                    continue
+                self.active.add(path)
+            self.dispatcher.submit(self._process, path, output_path, entry[3])
+
+    def _process(self, path, output_path, detected):
+        """Обрабатывает один файл в потоке диспетчера (сама обработка идет в процессе пула)."""
+        result = error = None
+        try:
+            result = self.service.process_path(path, output_path)
+        except Exception as e:
+            error = e
+        latency = self.clock() - detected
+
+        with self._lock:
+            self.active.discard(path)
+            self.manifests.record(path, output_path, result, error)
+            self.manifests.save()
+            if error is None:
+                self.processed += 1
+                self.latencies.append(latency)
+                del self.latencies[:-1000]
+            else:
+                self.errors += 1
+            backlog = len(self.active)
+
+        if error is None:
+            logging.info(f"Готово за {latency:.2f} с с момента появления ({result['edits']} правок, "
+                         f"в очереди {backlog}): {path}")
+        else:
+            expected = isinstance(error, (FileNotFoundError, PermissionError))
+            logging.error(f"Ошибка обработки файла {path}: {error}", exc_info=None if expected else error)
+
+    def status(self):
+        """Сводка для периодического отчета."""
+        with self._lock:
+            latencies = list(self.latencies)
+            status = {
+                'waiting': len(self.waiting),
+                'backlog': len(self.active),
+                'processed': self.processed,
+                'errors': self.errors,
+            }
+        status['latency_p50'] = percentile(latencies, 0.5)
+        status['latency_p90'] = percentile(latencies, 0.9)
+        status['service'] = self.service.stats.snapshot()
+        return status
+
+    def _report(self):
+        now = self.clock()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        status = self.status()
+        # В простое одна и та же сводка не повторяется
+        summary = (status['waiting'], status['backlog'], status['processed'], status['errors'])
+        if summary == self._last_status:
+            return
+        self._last_status = summary
+        latency = ''
+        if status['latency_p50'] is not None:
+            latency = f", задержка p50 {status['latency_p50']:.2f} с, p90 {status['latency_p90']:.2f} с"
+        logging.info(f"Ожидают окончания записи: {status['waiting']}, в очереди: {status['backlog']}, "
+                     f"обработано: {status['processed']}, ошибок: {status['errors']}{latency}")
+
+    def run(self, stop=None):
+        """Основной цикл; завершается, когда установлен stop (threading.Event)."""
+        for path in list_documents(self.directories):
+            self._notice(path)
+        logging.info(f"Наблюдение за папками: {', '.join(self.directories)} "
+                     f"({type(self.source).__name__}), уже в папках: {len(self.waiting)}")
+
+        tick = min(1.0, max(self.settle / 2, 0.1))
+        while stop is None or not stop.is_set():
+            changed = self.source.wait(tick)
+            if changed is None:
+                logging.warning("Очередь событий inotify переполнена, папки сканируются заново")
+                changed = list_documents(self.directories)
+            for path in changed:
+                self._notice(path)
+            self._check_waiting()
+            self._report()
+
+    def close(self):
+        """Дожидается отправленных файлов и освобождает ресурсы."""
+        self.dispatcher.shutdown(wait=True)
+        self.source.close()
+        with self._lock:
+            self.manifests.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directories', nargs='+', help="Папки для наблюдения")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="Количество процессов (по умолчанию из app_config.json или по числу ядер)")
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help="Сколько секунд файл не должен меняться перед обработкой")
+    parser.add_argument('--polling', action='store_true', help="Сканировать папки вместо inotify")
+    parser.add_argument('--interval', type=float, default=1.0, help="Период сканирования, секунды")
+    parser.add_argument('--report-interval', type=float, default=30.0,
+                        help="Период отчета об очереди и задержке, секунды")
+    parser.add_argument('--spellcheck', action='store_true', help="Включить проверку орфографии")
+    parser.add_argument('--engine', choices=('docx', 'stream'), default='docx')
+    parser.add_argument('--coalesce-runs', action='store_true', default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | %(message)s',
+        datefmt='%H:%M:%S',
+        stream=sys.stderr
+    )
+    missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+    if missing:
+        parser.error(f"Папки не найдены: {', '.join(missing)}")
+
+    service = DocumentService(args.workers, args.spellcheck, args.engine, args.coalesce_runs)
+    watcher = FolderWatcher(args.directories, service, args.settle, args.polling, args.interval,
+                            args.report_interval)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        service.close()
+        logging.info("Наблюдение остановлено")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main()